@@ -8,8 +8,12 @@ from flask_cors import CORS
 sys.path.append(os.getcwd())
 sys.path.append(os.path.abspath(os.path.dirname(p=__file__)))
 from src.config.AppConfig import AppConfig
-from src.service import NeuralNetworkService
+from src.service.BrawlStarsApiClient import BrawlStarsApiClient
+from src.service.InferenceScheduler import InferenceScheduler
+from src.service.ModelRegistry import ModelRegistry
 from src.utils import battlesUtils, accountUtils
+from src.utils.cacheUtils import TTLCache
+from src.utils.responseUtils import CachedPayload
 
 # Set up logging
 logging.basicConfig(
@@ -27,42 +31,52 @@ app = Flask(__name__)
 
 CORS(app, supports_credentials=True, origins=appConfig.origins)
 
-# Construct the correct paths using BASE_DIR
 app.secret_key = appConfig.SECRET_KEY
-data_path = os.path.join(
-    BASE_DIR, "data", "model", f"version_{appConfig.game_version}", "mappings.pkl"
-)
 
-model_path = os.path.join(
-    BASE_DIR, "data", "model", f"version_{appConfig.game_version}", "nn_model_all.pth"
+# Loads data/model/version_<game_version> and hot-swaps newer versions
+modelRegistry = ModelRegistry(
+    appConfig,
+    os.path.join(BASE_DIR, "data", "model"),
+    poll_interval=appConfig.MODEL_REGISTRY_POLL_SECONDS,
 )
-
-# Check if files exist (debugging)
-if not os.path.exists(data_path):
-    raise FileNotFoundError(f"Data file not found: {data_path}")
-if not os.path.exists(model_path):
-    raise FileNotFoundError(f"Model file not found: {model_path}")
+neuralNetworkService = modelRegistry.activate(appConfig.game_version)
 
 print("All required files found!")
 
+# Coalesce concurrent requests into model batches (needs a threaded server)
+inferenceScheduler = None
+if appConfig.INFERENCE_BATCHING:
+    inferenceScheduler = InferenceScheduler(
+        neuralNetworkService,
+        max_batch_size=appConfig.INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=appConfig.INFERENCE_BATCH_WINDOW_MS,
+    )
+    inferenceScheduler.start()
+
+
+def use_model_version(service):
+    """Route new requests to the service of the version just swapped in."""
+    global neuralNetworkService
+    neuralNetworkService = service
+    if inferenceScheduler is not None:
+        inferenceScheduler.neuralNetworkService = service
 
-neuralNetworkService = NeuralNetworkService.NeuralNetworkService(
-    data_path=data_path,
-    model_path=model_path,
-    version=appConfig.game_version,
-    appConfig=appConfig,
+
+modelRegistry.add_listener(use_model_version)
+modelRegistry.start()
+
+# Pooled, rate limited connections shared by every Brawl Stars API call
+brawlStarsApiClient = BrawlStarsApiClient.from_config(appConfig)
+accountCache = TTLCache(
+    maxsize=appConfig.ACCOUNT_CACHE_SIZE, ttl=appConfig.ACCOUNT_CACHE_TTL_SECONDS
 )
 
 
 @app.route("/")
 def index():
-    brawlers_name = []
-    brawler_img_url = []
-    for brawler in appConfig.data_index["brawlers"]:
-        brawlers_name.append(brawler["name"])
-        brawler_img_url.append(brawler["imageUrl"])
-
-    brawlers = list(zip(brawlers_name, brawler_img_url))
+    brawlers = [
+        (brawler["name"], brawler["imageUrl"]) for brawler in appConfig.brawler_catalog
+    ]
 
     return render_template(
         "index.html", maps=appConfig.data_index["maps"], brawlers=brawlers
@@ -71,17 +85,85 @@ def index():
 
 @app.route("/get_brawlers", methods=["GET"])
 def get_brawlers():
-    return appConfig.data_index["brawlers"]
+    return list(appConfig.brawler_catalog.brawlers)
 
 
 @app.route("/get_maps", methods=["GET"])
 def get_maps():
-    return appConfig.data_maps
+    return modelRegistry.active.data_maps
 
 
 @app.route("/get_game_versions", methods=["GET"])
 def get_game_versions():
-    return appConfig.data_game_version
+    return modelRegistry.active.data_game_version
+
+
+def parse_draft(data):
+    """Extract a draft state from a /simulate_draft style request body."""
+    catalog = appConfig.brawler_catalog
+    return {
+        "map_name": data.get("map", ""),
+        "available_brawlers": catalog.canonical_names(
+            data.get("available_brawlers", [])
+        ),
+        "excluded": catalog.canonical_names(data.get("excluded_brawlers", [])),
+        "friends": catalog.canonical_names(data.get("initial_team")),
+        "enemies": catalog.canonical_names(data.get("initial_opponent")),
+    }
+
+
+def recommend_brawlers(service, draft):
+    """Top brawlers for a draft, through the inference scheduler when enabled."""
+    if inferenceScheduler is not None:
+        return inferenceScheduler.predict_best_brawler(draft, service=service)
+
+    return service.predict_best_brawler(
+        draft["friends"],
+        draft["enemies"],
+        draft["map_name"],
+        draft["excluded"],
+        available_brawlers=draft["available_brawlers"],
+    )
+
+
+def estimate_winrate(service, matchup):
+    """Winrate of a matchup, through the inference scheduler when enabled."""
+    if inferenceScheduler is not None:
+        return inferenceScheduler.predict_winrate(matchup, service=service)
+
+    return service.predict_winrate(
+        matchup["friends"], matchup["enemies"], matchup["map_name"]
+    )
+
+
+def with_brawler_images(top_brawlers):
+    """Pair each (brawler, score) prediction with the brawler image url."""
+    catalog = appConfig.brawler_catalog
+    return [(brawler, catalog.image_url(brawler[0])) for brawler in top_brawlers]
+
+
+@app.route("/get_cache_stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify(neuralNetworkService.prediction_cache.stats())
+
+
+@app.route("/get_model_versions", methods=["GET"])
+def get_model_versions():
+    return jsonify(modelRegistry.stats())
+
+
+@app.route("/get_api_stats", methods=["GET"])
+def get_api_stats():
+    return jsonify(
+        {**brawlStarsApiClient.stats(), "account_cache": accountCache.stats()}
+    )
+
+
+@app.route("/get_inference_stats", methods=["GET"])
+def get_inference_stats():
+    if inferenceScheduler is None:
+        return jsonify({"running": False})
+    return jsonify(inferenceScheduler.stats())
 
 
 @app.route("/simulate_draft", methods=["POST"])
@@ -89,44 +171,33 @@ def simulate_draft():
     try:
         start_time = int(round(time.time() * 1000))
         # Extract parameters from the request body
-        data = request.get_json()
-        map_name = data.get("map", "")
-
-        # Use getlist() to retrieve all values for multi-select fields
-        available_brawlers = [
-            b.strip().upper() for b in data.get("available_brawlers", [])
-        ]
-        excluded_brawlers = [
-            b.strip().upper() for b in data.get("excluded_brawlers", [])
-        ]
-        friend_brawlers = [b.strip().upper() for b in data.get("initial_team")]
-        enemy_brawlers = [b.strip().upper() for b in data.get("initial_opponent")]
-
-        # Get predictions
-        top10_brawlers = neuralNetworkService.predict_best_brawler(
-            friend_brawlers,
-            enemy_brawlers,
-            map_name,
-            excluded_brawlers,
-            available_brawlers=available_brawlers,
+        draft = parse_draft(request.get_json())
+        # Serve the whole request from one model version, even if it is swapped
+        service = neuralNetworkService
+
+        # Opening draft states are served from the precomputed table
+        top10_brawlers = service.lookup_opening_picks(
+            draft["friends"],
+            draft["enemies"],
+            draft["map_name"],
+            draft["excluded"],
+            available_brawlers=draft["available_brawlers"],
         )
 
-        brawler_img_url = []
-        for brawler in top10_brawlers:
-            for brawler_raw in appConfig.data_index["brawlers"]:
-                if brawler[0] == brawler_raw["name"].upper():
-                    brawler_img_url.append(brawler_raw["imageUrl"])
+        # Get predictions
+        if top10_brawlers is None:
+            top10_brawlers = recommend_brawlers(service, draft)
 
-        response = list(zip(top10_brawlers, brawler_img_url))
+        response = with_brawler_images(top10_brawlers)
 
         # Display results
         if appConfig.logs_level > 0:
             print("============ /simulate_draft response ============")
-            print(f"Map : {map_name}")
-            print(f"Available Brawlers : {available_brawlers}")
-            print(f"Excluded Brawlers : {excluded_brawlers}")
-            print(f"Friend Brawlers : {friend_brawlers}")
-            print(f"Enemy Brawlers : {enemy_brawlers}")
+            print(f"Map : {draft['map_name']}")
+            print(f"Available Brawlers : {draft['available_brawlers']}")
+            print(f"Excluded Brawlers : {draft['excluded']}")
+            print(f"Friend Brawlers : {draft['friends']}")
+            print(f"Enemy Brawlers : {draft['enemies']}")
             print("Top 10 Recommended Brawlers:")
             for brawler, prob in top10_brawlers:
                 print(f"{brawler}: {prob:.4f}")
@@ -138,6 +209,31 @@ def simulate_draft():
         return jsonify({"error with simulate draft endpoint": str(e)}), 500
 
 
+@app.route("/simulate_draft_batch", methods=["POST"])
+def simulate_draft_batch():
+    try:
+        start_time = int(round(time.time() * 1000))
+        # Each item has the same shape as a /simulate_draft request body
+        data = request.get_json()
+        drafts = [parse_draft(item) for item in data.get("drafts", [])]
+        service = neuralNetworkService
+
+        # Get predictions for every draft in one batch
+        predictions = service.predict_best_brawler_batch(drafts)
+
+        response = [with_brawler_images(top10) for top10 in predictions]
+
+        if appConfig.logs_level > 0:
+            print("============ /simulate_draft_batch response ============")
+            print(f"Drafts : {len(drafts)}")
+            print("in ", int(round(time.time() * 1000)) - start_time, "ms")
+
+        return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error with simulate draft batch endpoint": str(e)}), 500
+
+
 @app.route("/predict_winrate", methods=["POST"])
 def predict_winrate():
     try:
@@ -147,11 +243,17 @@ def predict_winrate():
         map_name = data.get("map", "")
 
         # Use getlist() to retrieve all values for multi-select fields
-        friend_brawlers = [b.strip().upper() for b in data.get("initial_team")]
-        enemy_brawlers = [b.strip().upper() for b in data.get("initial_opponent")]
-
-        predicted_winrate = neuralNetworkService.predict_winrate(
-            friend_brawlers, enemy_brawlers, map_name
+        catalog = appConfig.brawler_catalog
+        friend_brawlers = catalog.canonical_names(data.get("initial_team"))
+        enemy_brawlers = catalog.canonical_names(data.get("initial_opponent"))
+
+        predicted_winrate = estimate_winrate(
+            neuralNetworkService,
+            {
+                "friends": friend_brawlers,
+                "enemies": enemy_brawlers,
+                "map_name": map_name,
+            },
         )
 
         # Display results
@@ -169,31 +271,80 @@ def predict_winrate():
         return jsonify({"error with predict winrate": str(e)}), 500
 
 
-@app.route("/tier_list", methods=["POST"])
-def get_tier_list():
+@app.route("/predict_winrate_batch", methods=["POST"])
+def predict_winrate_batch():
     try:
+        # Each item has the same shape as a /predict_winrate request body
         data = request.get_json()
-        map_name = data.get("map", "")
+        catalog = appConfig.brawler_catalog
+        matchups = [
+            {
+                "map_name": item.get("map", ""),
+                "friends": catalog.canonical_names(item.get("initial_team")),
+                "enemies": catalog.canonical_names(item.get("initial_opponent")),
+            }
+            for item in data.get("matchups", [])
+        ]
+
+        return jsonify(neuralNetworkService.predict_winrate_batch(matchups))
 
-        for item in appConfig.data_tier_list:
-            if item["mapName"] == map_name:
-                return jsonify(item["tierList"])
+    except Exception as e:
+        return jsonify({"error with predict winrate batch": str(e)}), 500
+
+
+EMPTY_LIST_PAYLOAD = CachedPayload([])
+
+
+def cached_payload_response(payload):
+    """
+    Serve a pre-serialized payload, compressed when the client accepts it.
+    GET requests whose If-None-Match matches the ETag get an empty 304.
+    """
+    body, etag, encoding = payload.encoded(request.accept_encodings)
+
+    if request.method in ("GET", "HEAD") and request.if_none_match.contains_raw(
+        f'"{etag}"'
+    ):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@app.route("/tier_list", methods=["GET", "POST"])
+def get_tier_list():
+    try:
+        if request.method == "GET":
+            map_name = request.args.get("map", "")
+        else:
+            map_name = request.get_json().get("map", "")
+
+        payload = modelRegistry.active.tier_list_index.get(map_name)
+        if payload is None:
+            return jsonify({"error": f"No tier list for map {map_name!r}"}), 404
+        return cached_payload_response(payload)
     except Exception as e:
         return jsonify({"error with tier list endpoint": str(e)}), 500
 
 
-@app.route("/stats", methods=["POST"])
+@app.route("/stats", methods=["GET", "POST"])
 def get_stats_per_map():
     try:
-        data = request.get_json()
-        map_name = data.get("map", "")
-
-        filtered_df = (
-            appConfig.battle_stats[appConfig.battle_stats["map"] == map_name]
-            if map_name
-            else appConfig.battle_stats
+        if request.method == "GET":
+            map_name = request.args.get("map", "")
+        else:
+            map_name = request.get_json().get("map", "")
+
+        index = modelRegistry.active.battle_stats_index
+        payload = (
+            index.get(map_name, EMPTY_LIST_PAYLOAD) if map_name else index.all_payload
         )
-        return filtered_df.to_dict(orient="records")
+        return cached_payload_response(payload)
     except Exception as e:
         return jsonify({"error with stats endpoint": str(e)}), 500
 
@@ -203,10 +354,12 @@ def get_account_brawlers():
     try:
         data = request.get_json()
         player_tag = data.get("player_tag", "")
-        data_brawler_account = battlesUtils.get_account_brawlers(
+        data_brawler_account = battlesUtils.get_account_brawlers_cached(
             player_tag=player_tag,
             API_KEY=appConfig.API_KEY,
             BASE_URL=appConfig.BASE_URL,
+            cache=accountCache,
+            client=brawlStarsApiClient,
         )
         logging.info("Retrieved account info of tag: " + player_tag)
 
@@ -222,12 +375,17 @@ def get_upgrade_helper():
         data = request.get_json()
         player_tag = data.get("player_tag", "")
         logging.info("Retrieved account info of tag: " + player_tag)
+        modelVersion = modelRegistry.active
 
         return accountUtils.get_cost_and_score_by_account(
             player_tag=player_tag,
-            data=appConfig.data_tier_list,
+            data=modelVersion.tier_list,
             api_key=appConfig.API_KEY,
             base_url=appConfig.BASE_URL,
+            catalog=appConfig.brawler_catalog,
+            client=brawlStarsApiClient,
+            cache=accountCache,
+            scores=modelVersion.brawler_scores,
         )
 
     except Exception as e:
@@ -0,0 +1,365 @@
+"""
+Async entry point serving the same routes as app.py.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 10000 --workers 4
+
+The routes share app.py's config, model registry and prediction helpers, so
+both entry points load the same model and answer byte for byte the same JSON.
+Model inference runs on a bounded thread pool and the Brawl Stars API calls of
+/account and /account-upgrade-helper are awaited, so a slow upstream request
+only holds a coroutine instead of a worker and never delays draft predictions.
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.abspath(os.path.dirname(p=__file__)))
+import app as flaskApp
+from app import (
+    EMPTY_LIST_PAYLOAD,
+    appConfig,
+    estimate_winrate,
+    modelRegistry,
+    parse_draft,
+    recommend_brawlers,
+    with_brawler_images,
+)
+from src.service.BrawlStarsApiClient import AsyncBrawlStarsApiClient
+from src.utils import accountUtils, battlesUtils
+from src.utils.responseUtils import serialize_json
+
+templates = Jinja2Templates(directory=os.path.join(flaskApp.BASE_DIR, "templates"))
+# index.html builds its static urls with Flask's url_for signature
+templates.env.globals["url_for"] = lambda endpoint, filename: f"/{endpoint}/{filename}"
+
+inferenceExecutor = ThreadPoolExecutor(
+    max_workers=appConfig.ASGI_INFERENCE_WORKERS, thread_name_prefix="inference"
+)
+# Requests over the limit wait on the event loop instead of queuing in the pool
+inferenceSlots = asyncio.Semaphore(appConfig.ASGI_MAX_PENDING_INFERENCES)
+
+
+async def run_inference(fn, *args, **kwargs):
+    """Run a CPU bound call on the inference pool without blocking the loop."""
+    async with inferenceSlots:
+        return await asyncio.get_running_loop().run_in_executor(
+            inferenceExecutor, functools.partial(fn, *args, **kwargs)
+        )
+
+
+def json_response(data, status_code=200):
+    return Response(
+        serialize_json(data), status_code=status_code, media_type="application/json"
+    )
+
+
+def accepted_encodings(request):
+    """Content codings of the Accept-Encoding header, without the q=0 ones."""
+    encodings = set()
+    for value in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = value.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+def cached_payload_response(request, payload):
+    """Same as app.cached_payload_response for Starlette requests."""
+    body, etag, encoding = payload.encoded(accepted_encodings(request))
+    headers = {"ETag": f'"{etag}"', "Vary": "Accept-Encoding"}
+
+    if request.method in ("GET", "HEAD"):
+        if_none_match = {
+            value.strip().removeprefix("W/")
+            for value in request.headers.get("if-none-match", "").split(",")
+        }
+        if f'"{etag}"' in if_none_match or "*" in if_none_match:
+            return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def request_map_name(request):
+    if request.method == "GET":
+        return request.query_params.get("map", "")
+    data = await request.json()
+    return data.get("map", "")
+
+
+async def index(request):
+    brawlers = [
+        (brawler["name"], brawler["imageUrl"]) for brawler in appConfig.brawler_catalog
+    ]
+    return templates.TemplateResponse(
+        request,
+        "index.html",
+        {"maps": appConfig.data_index["maps"], "brawlers": brawlers},
+    )
+
+
+async def get_brawlers(request):
+    return json_response(list(appConfig.brawler_catalog.brawlers))
+
+
+async def get_maps(request):
+    return json_response(modelRegistry.active.data_maps)
+
+
+async def get_game_versions(request):
+    return json_response(modelRegistry.active.data_game_version)
+
+
+async def get_cache_stats(request):
+    return json_response(flaskApp.neuralNetworkService.prediction_cache.stats())
+
+
+async def get_model_versions(request):
+    return json_response(modelRegistry.stats())
+
+
+async def get_api_stats(request):
+    return json_response(
+        {
+            **request.app.state.apiClient.stats(),
+            "account_cache": flaskApp.accountCache.stats(),
+        }
+    )
+
+
+async def get_inference_stats(request):
+    stats = {
+        "executor_workers": appConfig.ASGI_INFERENCE_WORKERS,
+        "max_pending_inferences": appConfig.ASGI_MAX_PENDING_INFERENCES,
+    }
+    if flaskApp.inferenceScheduler is None:
+        return json_response({"running": False, **stats})
+    return json_response({**flaskApp.inferenceScheduler.stats(), **stats})
+
+
+def best_brawlers(service, draft):
+    # Opening draft states are served from the precomputed table
+    top10_brawlers = service.lookup_opening_picks(
+        draft["friends"],
+        draft["enemies"],
+        draft["map_name"],
+        draft["excluded"],
+        available_brawlers=draft["available_brawlers"],
+    )
+    if top10_brawlers is None:
+        top10_brawlers = recommend_brawlers(service, draft)
+    return top10_brawlers
+
+
+async def simulate_draft(request):
+    try:
+        start_time = int(round(time.time() * 1000))
+        draft = parse_draft(await request.json())
+        # Serve the whole request from one model version, even if it is swapped
+        service = flaskApp.neuralNetworkService
+
+        top10_brawlers = await run_inference(best_brawlers, service, draft)
+        response = with_brawler_images(top10_brawlers)
+
+        if appConfig.logs_level > 0:
+            print("============ /simulate_draft response ============")
+            print(f"Map : {draft['map_name']}")
+            print(f"Friend Brawlers : {draft['friends']}")
+            print(f"Enemy Brawlers : {draft['enemies']}")
+            print("in ", int(round(time.time() * 1000)) - start_time, "ms")
+
+        return json_response(response)
+
+    except Exception as e:
+        return json_response({"error with simulate draft endpoint": str(e)}, 500)
+
+
+async def simulate_draft_batch(request):
+    try:
+        data = await request.json()
+        drafts = [parse_draft(item) for item in data.get("drafts", [])]
+        service = flaskApp.neuralNetworkService
+
+        predictions = await run_inference(service.predict_best_brawler_batch, drafts)
+
+        return json_response([with_brawler_images(top10) for top10 in predictions])
+
+    except Exception as e:
+        return json_response({"error with simulate draft batch endpoint": str(e)}, 500)
+
+
+async def predict_winrate(request):
+    try:
+        data = await request.json()
+        catalog = appConfig.brawler_catalog
+        matchup = {
+            "friends": catalog.canonical_names(data.get("initial_team")),
+            "enemies": catalog.canonical_names(data.get("initial_opponent")),
+            "map_name": data.get("map", ""),
+        }
+
+        predicted_winrate = await run_inference(
+            estimate_winrate, flaskApp.neuralNetworkService, matchup
+        )
+        # app.py answers the bare number as text
+        return Response(str(predicted_winrate), media_type="text/html")
+
+    except Exception as e:
+        return json_response({"error with predict winrate": str(e)}, 500)
+
+
+async def predict_winrate_batch(request):
+    try:
+        data = await request.json()
+        catalog = appConfig.brawler_catalog
+        matchups = [
+            {
+                "map_name": item.get("map", ""),
+                "friends": catalog.canonical_names(item.get("initial_team")),
+                "enemies": catalog.canonical_names(item.get("initial_opponent")),
+            }
+            for item in data.get("matchups", [])
+        ]
+
+        predictions = await run_inference(
+            flaskApp.neuralNetworkService.predict_winrate_batch, matchups
+        )
+        return json_response(predictions)
+
+    except Exception as e:
+        return json_response({"error with predict winrate batch": str(e)}, 500)
+
+
+async def get_tier_list(request):
+    try:
+        map_name = await request_map_name(request)
+
+        payload = modelRegistry.active.tier_list_index.get(map_name)
+        if payload is None:
+            return json_response({"error": f"No tier list for map {map_name!r}"}, 404)
+        return cached_payload_response(request, payload)
+    except Exception as e:
+        return json_response({"error with tier list endpoint": str(e)}, 500)
+
+
+async def get_stats_per_map(request):
+    try:
+        map_name = await request_map_name(request)
+
+        index = modelRegistry.active.battle_stats_index
+        payload = (
+            index.get(map_name, EMPTY_LIST_PAYLOAD) if map_name else index.all_payload
+        )
+        return cached_payload_response(request, payload)
+    except Exception as e:
+        return json_response({"error with stats endpoint": str(e)}, 500)
+
+
+async def get_account(request):
+    try:
+        data = await request.json()
+        player_tag = data.get("player_tag", "")
+        data_brawler_account = await battlesUtils.get_account_brawlers_cached_async(
+            player_tag=player_tag,
+            API_KEY=appConfig.API_KEY,
+            BASE_URL=appConfig.BASE_URL,
+            cache=flaskApp.accountCache,
+            client=request.app.state.apiClient,
+        )
+
+        return json_response(
+            battlesUtils.get_brawlers_with_high_power(data_brawler_account)
+        )
+
+    except Exception as e:
+        return json_response({"error with account endpoint": str(e)}, 500)
+
+
+async def get_upgrade_helper(request):
+    try:
+        data = await request.json()
+        player_tag = data.get("player_tag", "")
+        accountStats = await battlesUtils.get_account_brawlers_cached_async(
+            player_tag=player_tag,
+            API_KEY=appConfig.API_KEY,
+            BASE_URL=appConfig.BASE_URL,
+            cache=flaskApp.accountCache,
+            client=request.app.state.apiClient,
+        )
+        modelVersion = modelRegistry.active
+
+        return json_response(
+            accountUtils.get_cost_and_score_by_account_stats(
+                accountStats,
+                data=modelVersion.tier_list,
+                catalog=appConfig.brawler_catalog,
+                scores=modelVersion.brawler_scores,
+            )
+        )
+
+    except Exception as e:
+        return json_response({"error with upgrade-helper endpoint": str(e)}, 500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # One pooled, rate limited client per worker for every Brawl Stars API call
+    app.state.apiClient = AsyncBrawlStarsApiClient.from_config(appConfig)
+    try:
+        yield
+    finally:
+        await app.state.apiClient.aclose()
+
+
+routes = [
+    Route("/", index),
+    Route("/get_brawlers", get_brawlers, methods=["GET"]),
+    Route("/get_maps", get_maps, methods=["GET"]),
+    Route("/get_game_versions", get_game_versions, methods=["GET"]),
+    Route("/get_cache_stats", get_cache_stats, methods=["GET"]),
+    Route("/get_model_versions", get_model_versions, methods=["GET"]),
+    Route("/get_api_stats", get_api_stats, methods=["GET"]),
+    Route("/get_inference_stats", get_inference_stats, methods=["GET"]),
+    Route("/simulate_draft", simulate_draft, methods=["POST"]),
+    Route("/simulate_draft_batch", simulate_draft_batch, methods=["POST"]),
+    Route("/predict_winrate", predict_winrate, methods=["POST"]),
+    Route("/predict_winrate_batch", predict_winrate_batch, methods=["POST"]),
+    Route("/tier_list", get_tier_list, methods=["GET", "POST"]),
+    Route("/stats", get_stats_per_map, methods=["GET", "POST"]),
+    Route("/account", get_account, methods=["POST"]),
+    Route("/account-upgrade-helper", get_upgrade_helper, methods=["POST"]),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=appConfig.origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    ],
+    lifespan=lifespan,
+)
@@ -6,6 +6,10 @@ from dotenv import load_dotenv
 
 sys.path.append(os.getcwd())
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from src.model.BrawlerCatalog import BrawlerCatalog
+from src.model.GameVersionTimeline import GameVersionTimeline
+from src.utils.accountUtils import aggregate_scores
+from src.utils.responseUtils import PayloadIndex
 
 
 class AppConfig:
@@ -20,6 +24,8 @@ class AppConfig:
         )
         self.API_KEY = os.getenv("API_KEY", "")
         self.POSTGRE_SQL_PASSWORD = os.getenv("POSTGRE_SQL_PASSWORD", "")
+        # Database connections shared by the threads, 0 uses a single connection
+        self.POSTGRE_POOL_SIZE = int(os.getenv("POSTGRE_POOL_SIZE", "0"))
         self.BASE_URL = "https://api.brawlstars.com/v1"
         self.OWN_PLAYER_TAG = os.getenv("OWN_PLAYER_TAG")
 
@@ -37,14 +43,61 @@ class AppConfig:
         self.origins.append(os.getenv("ORIGIN", "*"))
         self.port = int(os.environ.get("PORT", 10000))
 
+        # Inference
+        # torch | torchscript | numpy | int8
+        self.MODEL_FORMAT = os.getenv("MODEL_FORMAT", "torch")
+        self.PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+        self.INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "false") == "true"
+        self.INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+        self.INFERENCE_BATCH_WINDOW_MS = float(
+            os.getenv("INFERENCE_BATCH_WINDOW_MS", "2")
+        )
+        # Async entry point (asgi.py): inference threads and queued inferences
+        self.ASGI_INFERENCE_WORKERS = int(os.getenv("ASGI_INFERENCE_WORKERS", "4"))
+        self.ASGI_MAX_PENDING_INFERENCES = int(
+            os.getenv("ASGI_MAX_PENDING_INFERENCES", "64")
+        )
+
+        # Brawl Stars API client: requests in flight, requests per second
+        # (0 disables the limit), burst size, retries on 429/5xx and the
+        # longest Retry-After honored (longer ones fall back to backoff)
+        self.BRAWL_STARS_API_TIMEOUT = float(os.getenv("BRAWL_STARS_API_TIMEOUT", "10"))
+        self.BRAWL_STARS_API_MAX_CONCURRENCY = int(
+            os.getenv("BRAWL_STARS_API_MAX_CONCURRENCY", "16")
+        )
+        self.BRAWL_STARS_API_RATE = float(os.getenv("BRAWL_STARS_API_RATE", "30"))
+        self.BRAWL_STARS_API_BURST = int(os.getenv("BRAWL_STARS_API_BURST", "30"))
+        self.BRAWL_STARS_API_MAX_RETRIES = int(
+            os.getenv("BRAWL_STARS_API_MAX_RETRIES", "3")
+        )
+        self.BRAWL_STARS_API_MAX_RETRY_AFTER = float(
+            os.getenv("BRAWL_STARS_API_MAX_RETRY_AFTER", "30")
+        )
+        # Player profiles shared by /account and /account-upgrade-helper
+        self.ACCOUNT_CACHE_TTL_SECONDS = float(
+            os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "60")
+        )
+        self.ACCOUNT_CACHE_SIZE = int(os.getenv("ACCOUNT_CACHE_SIZE", "1024"))
+
+        # Seconds between checks for a new model version, 0 disables hot swaps
+        self.MODEL_REGISTRY_POLL_SECONDS = float(
+            os.getenv("MODEL_REGISTRY_POLL_SECONDS", "60")
+        )
+
         self.data_game_version = None
         self.data_all_game_version = None
+        self.game_version_timeline = None
         self.data_index = None
+        self.brawler_catalog = None
         self.data_version = None
         self.data_maps = None
+        self.data_all_maps = None
         self.game_version = None
         self.data_tier_list = None
+        self.tier_list_index = None
+        self.brawler_scores = None
         self.battle_stats = None
+        self.battle_stats_index = None
 
         self.initApp()
         self.resolveMaps()
@@ -62,24 +115,53 @@ class AppConfig:
             self.setBattleStatsData()
 
     def setBattleStatsData(self):
+        self.battle_stats = self.loadBattleStats(self.game_version)
+        self.battle_stats_index = self.buildBattleStatsIndex(self.battle_stats)
+
+    def buildBattleStatsIndex(self, battle_stats):
+        """Pre-serialize the /stats payload of every map and of all maps at once."""
+        records = battle_stats.to_dict(orient="records")
+        records_by_map = {}
+        for record in records:
+            records_by_map.setdefault(record["map"], []).append(record)
+        return PayloadIndex(records_by_map, all_payload=records)
+
+    def loadBattleStats(self, game_version):
         battle_stats_path = os.path.join(
-            self.BASE_DIR, "data", "model", f"version_{self.game_version}", "stats.pkl"
+            self.BASE_DIR, "data", "model", f"version_{game_version}", "stats.pkl"
         )
         with open(battle_stats_path, "rb") as f:
-            self.battle_stats = pickle.load(f)
+            battle_stats = pickle.load(f)
             print("Successfully loaded stats")
+        return battle_stats
 
     def setTierList(self):
+        self.data_tier_list = self.loadTierList(self.game_version)
+        self.tier_list_index = self.buildTierListIndex(self.data_tier_list)
+        self.brawler_scores = self.buildBrawlerScores(self.data_tier_list)
+
+    def buildTierListIndex(self, data_tier_list):
+        """Pre-serialize the /tier_list payload of every map."""
+        return PayloadIndex(
+            {item["mapName"]: item["tierList"] for item in data_tier_list}
+        )
+
+    def buildBrawlerScores(self, data_tier_list):
+        """Score of every brawler summed over the tier lists, for the upgrade helper."""
+        return dict(aggregate_scores(data_tier_list or []))
+
+    def loadTierList(self, game_version):
         tierlist_path = os.path.join(
             self.BASE_DIR,
             "data",
             "model",
-            f"version_{self.game_version}",
+            f"version_{game_version}",
             "tierlist.json",
         )
         with open(tierlist_path, "r") as file:
-            self.data_tier_list = json.load(file)
+            data_tier_list = json.load(file)
             print("Successfully loaded tierlist")
+        return data_tier_list
 
     def setDataIndex(self):
         data_index_path = os.path.join(self.BASE_DIR, "data", "brawlersMaps.json")
@@ -89,14 +171,17 @@ class AppConfig:
     ##### MAPS #####
 
     def resolveMaps(self):
+        self.data_maps = self.getRankedMaps(self.data_game_version)
+
+    def getRankedMaps(self, data_game_version):
         currentRankedMaps = []
         insertedMapNames = set()
 
-        for map in self.data_maps:
+        for map in self.data_all_maps:
             mapName = map["name"]
 
             if mapName not in insertedMapNames:
-                for currentRankedMap in self.data_game_version["ranked_maps"]:
+                for currentRankedMap in data_game_version["ranked_maps"]:
                     if mapName.lower() == currentRankedMap.lower():
                         mapsToAdd = {
                             "name": mapName,
@@ -109,7 +194,7 @@ class AppConfig:
                         break
 
         print("Current ranked maps resolved:", len(currentRankedMaps))
-        self.data_maps = currentRankedMaps
+        return currentRankedMaps
 
     def setDataMaps(self):
         # Load data from JSON file
@@ -117,7 +202,8 @@ class AppConfig:
 
         with open(data_maps_path, "r", encoding="utf-8") as file:
             data = json.load(file)
-            self.data_maps = data["maps"]
+            self.data_all_maps = data["maps"]
+            self.data_maps = self.data_all_maps
 
     def setBrawler(self):
         brawlers = []
@@ -132,7 +218,7 @@ class AppConfig:
 
         # Set brawlers updated
         self.data_index["brawlers"] = brawlers
-        pass
+        self.brawler_catalog = BrawlerCatalog(brawlers)
 
     def setDataGameVersion(self):
         # Load data from JSON file
@@ -140,6 +226,7 @@ class AppConfig:
 
         with open(game_version_path, "r") as file:
             self.data_all_game_version = json.load(file)
+        self.game_version_timeline = GameVersionTimeline(self.data_all_game_version)
 
     def setLatestGameVersion(self):
         # Sort by version number in descending order
@@ -0,0 +1,67 @@
+from types import MappingProxyType
+
+from src.utils.battlesUtils import check_brawler_name
+
+
+class BrawlerCatalog:
+    """
+    Immutable brawler lookup keyed by canonical name.
+
+    The canonical name is the one the model and the battle data use: the
+    uppercased name with the check_brawler_name rules applied (8-BIT -> 8BIT).
+    Built once from brawlersMaps.json, so request handlers never scan the
+    brawler list or compare names case by case.
+    """
+
+    def __init__(self, brawlers):
+        """
+        Arguments:
+            brawlers: List of brawler dicts of brawlersMaps.json.
+        """
+        entries = {}
+        for brawler in brawlers:
+            entries[self.canonical_name(brawler["name"])] = MappingProxyType(
+                {
+                    "id": brawler.get("id"),
+                    "name": brawler["name"],
+                    "imageUrl": brawler["imageUrl"],
+                }
+            )
+
+        self._brawlers = tuple(brawlers)
+        self._entries = MappingProxyType(entries)
+        self._image_urls = MappingProxyType(
+            {name: entry["imageUrl"] for name, entry in entries.items()}
+        )
+
+    @staticmethod
+    def canonical_name(name):
+        return check_brawler_name(name.strip().upper())
+
+    def canonical_names(self, names):
+        return [self.canonical_name(name) for name in names]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return self.canonical_name(name) in self._entries
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    @property
+    def brawlers(self):
+        """Brawler dicts as listed in brawlersMaps.json."""
+        return self._brawlers
+
+    @property
+    def image_urls(self):
+        """Canonical name to image url."""
+        return self._image_urls
+
+    def get(self, name, default=None):
+        return self._entries.get(self.canonical_name(name), default)
+
+    def image_url(self, name):
+        return self._image_urls.get(self.canonical_name(name))
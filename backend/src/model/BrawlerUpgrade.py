@@ -1,44 +1,81 @@
+import numpy as np
+
+
+def suffix_sums(costs):
+    """suffix_sums(costs)[i] is the cost from level i + 1 to the max level."""
+    return np.concatenate([np.cumsum(costs[::-1])[::-1], [0]])
+
+
 class BrawlerUpgrade:
+    # These arrays represent the cost to upgrade from:
+    # Level 1->2 at index 0, 2->3 at index 1, ..., 10->11 at index 9.
+    POWER_POINTS_NEEDED = [20, 35, 75, 140, 290, 480, 800, 1200, 890, 1440]
+    COINS_NEEDED = [20, 50, 100, 180, 310, 520, 860, 1400, 1875, 2800]
+    # Cost to max level indexed by current power - 1, level 11 costs nothing
+    POWER_POINTS_TO_MAX = suffix_sums(POWER_POINTS_NEEDED)
+    COINS_TO_MAX = suffix_sums(COINS_NEEDED)
+
+    STAR_POWER_COST = 2000  # Cost per Star Power
+    GADGET_COST = 1000  # Cost per Gadget
+    GEAR_COST_MIN = 1000  # Minimum cost for a Gear
+    HC_COST_MAX = 5000
+
     def __init__(self, name, current_power, gears, star_powers, gadgets):
         self.name = name
         self.current_power = current_power  # brawler's current power level (1 to 11)
         self.gears = gears
         self.star_powers = star_powers
         self.gadgets = gadgets
-        # These arrays represent the cost to upgrade from:
-        # Level 1->2 at index 0, 2->3 at index 1, ..., 10->11 at index 9.
-        self.power_points_needed = [20, 35, 75, 140, 290, 480, 800, 1200, 890, 1440]
-        self.coins_needed = [20, 50, 100, 180, 310, 520, 860, 1400, 1875, 2800]
-        self.star_power_cost = 2000  # Cost per Star Power
-        self.gadget_cost = 1000  # Cost per Gadget
-        self.gear_cost_min = 1000  # Minimum cost for a Gear
-        self.hc_cost_max = 5000
+        self.power_points_needed = self.POWER_POINTS_NEEDED
+        self.coins_needed = self.COINS_NEEDED
+        self.star_power_cost = self.STAR_POWER_COST
+        self.gadget_cost = self.GADGET_COST
+        self.gear_cost_min = self.GEAR_COST_MIN
+        self.hc_cost_max = self.HC_COST_MAX
 
         # Totals
         self.total_power_points = 0
         self.total_coins = 0
 
     def calculate_upgrade_cost(self):
-        # Use current_power - 1 to index correctly into the arrays.
-        total_power_points = sum(self.power_points_needed[self.current_power - 1 :])
-        total_coins = sum(self.coins_needed[self.current_power - 1 :])
+        total_power_points, total_coins = self.upgrade_costs(
+            [self.current_power],
+            [len(self.star_powers)],
+            [len(self.gadgets)],
+            [len(self.gears)],
+        )
+        self.total_power_points = int(total_power_points[0])
+        self.total_coins = int(total_coins[0])
+        return self.total_power_points, self.total_coins
+
+    @classmethod
+    def upgrade_costs(cls, powers, star_power_counts, gadget_counts, gear_counts):
+        """
+        Power points and coins to max out many brawlers at once.
+
+        Arguments:
+            powers: Current power level (1 to 11) of each brawler.
+            star_power_counts: Number of Star Powers of each brawler.
+            gadget_counts: Number of Gadgets of each brawler.
+            gear_counts: Number of Gears of each brawler.
+
+        Returns:
+            tuple: (total_power_points, total_coins) integer arrays
+        """
+        # Use current_power - 1 to index correctly into the tables.
+        levels = np.asarray(powers, dtype=np.int64) - 1
+        total_power_points = cls.POWER_POINTS_TO_MAX[levels]
+        total_coins = cls.COINS_TO_MAX[levels] + cls.HC_COST_MAX
 
         # Additional costs for missing Star Power, Gadget, and Gears.
-        star_power_count = (
-            1 if len(self.star_powers) < 1 else 0
-        )  # Need 1 SP if missing.
-        gadget_count = 1 if len(self.gadgets) < 1 else 0  # Need 1 Gadget if missing.
-        gear_count = 2 - len(self.gears)  # Need a total of 2 gears.
-        if len(self.gears) > 1:
-            gear_count = 0
-
-        total_coins += self.hc_cost_max
-        total_coins += star_power_count * self.star_power_cost
-        total_coins += gadget_count * self.gadget_cost
+        # Need 1 SP and 1 Gadget if missing, and a total of 2 gears.
+        total_coins += (np.asarray(star_power_counts) < 1) * cls.STAR_POWER_COST
+        total_coins += (np.asarray(gadget_counts) < 1) * cls.GADGET_COST
+        missing_gears = np.clip(2 - np.asarray(gear_counts, dtype=np.int64), 0, 2)
         # Use the average cost for a Gear.
-        total_coins += gear_count * self.gear_cost_min
+        total_coins += missing_gears * cls.GEAR_COST_MIN
 
-        self.total_power_points, self.total_coins = total_power_points, total_coins
+        return total_power_points, total_coins
 
     def print_upgrade_cost(self):
         total_power_points, total_coins = self.calculate_upgrade_cost()
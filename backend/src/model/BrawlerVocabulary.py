@@ -0,0 +1,72 @@
+from types import MappingProxyType
+
+
+class BrawlerVocabulary:
+    """
+    Immutable lookup tables between brawler/map names and model indices.
+
+    Built once when the mappings are loaded or built, so prediction paths never
+    have to invert brawler_to_idx on the fly.
+    """
+
+    def __init__(self, brawler_to_idx, map_to_idx, brawler_images=None):
+        """
+        Arguments:
+            brawler_to_idx: Dict mapping brawler names to model indices.
+            map_to_idx: Dict mapping map names to model indices.
+            brawler_images: Optional dict mapping uppercase brawler names to image urls.
+        """
+        idx_to_brawler = [None] * (max(brawler_to_idx.values(), default=-1) + 1)
+        for brawler, idx in brawler_to_idx.items():
+            idx_to_brawler[idx] = brawler
+
+        brawler_images = brawler_images or {}
+
+        # Read-only views: the vocabulary is shared by every prediction call
+        self._idx_to_brawler = tuple(idx_to_brawler)
+        self._brawler_to_idx = MappingProxyType(dict(brawler_to_idx))
+        self._map_to_idx = MappingProxyType(dict(map_to_idx))
+        self._image_urls = MappingProxyType(
+            {brawler: brawler_images.get(brawler) for brawler in brawler_to_idx}
+        )
+
+    def __len__(self):
+        return len(self._idx_to_brawler)
+
+    def __contains__(self, brawler):
+        return brawler in self._brawler_to_idx
+
+    @property
+    def brawler_names(self):
+        """Brawler names ordered by model index."""
+        return self._idx_to_brawler
+
+    @property
+    def brawler_to_idx(self):
+        return self._brawler_to_idx
+
+    @property
+    def map_to_idx(self):
+        return self._map_to_idx
+
+    def brawler_name(self, idx, default="Unknown"):
+        if 0 <= idx < len(self._idx_to_brawler):
+            return self._idx_to_brawler[idx] or default
+        return default
+
+    def brawler_index(self, brawler, default=None):
+        return self._brawler_to_idx.get(brawler, default)
+
+    def brawler_indices(self, brawlers):
+        """Indices of the known brawlers in the list, unknown names are skipped."""
+        return [
+            self._brawler_to_idx[brawler]
+            for brawler in brawlers
+            if brawler in self._brawler_to_idx
+        ]
+
+    def map_index(self, map_name, default=0):
+        return self._map_to_idx.get(map_name, default)
+
+    def image_url(self, brawler):
+        return self._image_urls.get(brawler)
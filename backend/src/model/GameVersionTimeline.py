@@ -0,0 +1,58 @@
+from bisect import bisect_right
+from datetime import date, datetime
+
+
+class GameVersionTimeline:
+    """
+    Season table of a battle date, looked up by bisection.
+
+    Built once from game_version.json: the release dates are parsed and sorted
+    a single time into ordinal days, so routing a battle to its table is a
+    binary search instead of a parse, sort and scan of every version.
+    """
+
+    def __init__(self, versions):
+        """
+        Arguments:
+            versions: List of version dicts of game_version.json.
+        """
+        entries = []
+        for entry in versions:
+            try:
+                release = datetime.strptime(entry["date"], "%Y-%m-%d").date()
+            except ValueError:
+                print(
+                    f"Warning: Skipping invalid date {entry['date']} for version {entry['version']}"
+                )
+                continue
+            entries.append((release.toordinal(), entry["version"]))
+        # Stable, so versions released the same day keep the file order
+        entries.sort(key=lambda entry: entry[0])
+
+        self._ordinals = tuple(ordinal for ordinal, _ in entries)
+        self._tables = tuple(f"battles_s{version}" for _, version in entries)
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def table_for_ordinal(self, ordinal):
+        """
+        Table of the last version released on or before the day, or of the
+        first version for days before it.
+        """
+        index = bisect_right(self._ordinals, ordinal) - 1
+        return self._tables[max(index, 0)]
+
+    def table_for_date(self, target_date):
+        """Table of a 'yyyy-mm-dd' date."""
+        return self.table_for_ordinal(
+            datetime.strptime(target_date, "%Y-%m-%d").date().toordinal()
+        )
+
+    def table_for_battle_time(self, battle_time):
+        """Table of a battleTime of the API, e.g. 20250101T120000.000Z."""
+        return self.table_for_ordinal(
+            date(
+                int(battle_time[0:4]), int(battle_time[4:6]), int(battle_time[6:8])
+            ).toordinal()
+        )
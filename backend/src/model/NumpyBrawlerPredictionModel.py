@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class NumpyBrawlerPredictionModel:
+    """
+    NumPy implementation of BrawlerPredictionModel for serving.
+
+    The weights are read from the npz written by
+    NeuralNetworkTrainingService.export_numpy_model, so torch is never needed to
+    run predictions. Inputs are integer arrays with the same shapes as the torch
+    model and the output is a float32 array of logits.
+    """
+
+    def __init__(self, weights, pad_idx=0, num_friends=3, num_enemies=3):
+        """
+        Arguments:
+            weights: Dict of the model state dict as numpy arrays.
+            pad_idx: Padding index for missing brawlers.
+            num_friends: Number of friend brawlers.
+            num_enemies: Number of enemy brawlers.
+        """
+        self.pad_idx = pad_idx
+        self.num_friends = num_friends
+        self.num_enemies = num_enemies
+
+        self.brawler_embedding = np.ascontiguousarray(
+            weights["brawler_embedding.weight"], dtype=np.float32
+        )
+        self.map_embedding = np.ascontiguousarray(
+            weights["map_embedding.weight"], dtype=np.float32
+        )
+        # Linear weights keep the (out, in) torch layout, forward multiplies by
+        # their transposed view so read-only mapped weights are never copied
+        self.fc1_weight = np.ascontiguousarray(weights["fc1.weight"], np.float32)
+        self.fc1_bias = np.ascontiguousarray(weights["fc1.bias"], dtype=np.float32)
+        self.fc2_weight = np.ascontiguousarray(weights["fc2.weight"], np.float32)
+        self.fc2_bias = np.ascontiguousarray(weights["fc2.bias"], dtype=np.float32)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            weights = {key: data[key] for key in data.files}
+        return cls(
+            weights,
+            pad_idx=int(weights["pad_idx"]),
+            num_friends=int(weights["num_friends"]),
+            num_enemies=int(weights["num_enemies"]),
+        )
+
+    @staticmethod
+    def save(path, state_dict, pad_idx=0, num_friends=3, num_enemies=3):
+        """Write a state dict of numpy arrays in the format read by load."""
+        np.savez(
+            path,
+            pad_idx=pad_idx,
+            num_friends=num_friends,
+            num_enemies=num_enemies,
+            **state_dict,
+        )
+
+    def eval(self):
+        # Same interface as the torch model, there is no training mode
+        return self
+
+    def forward(self, friends, enemies, map_idx):
+        """
+        Arguments:
+            friends: Array of shape (batch, num_friends) containing indices of friendly brawlers.
+            enemies: Array of shape (batch, num_enemies) containing indices of enemy brawlers.
+            map_idx: Array of shape (batch, 1) containing map indices.
+        """
+        batch_size = friends.shape[0]
+        x = np.concatenate(
+            [
+                self.brawler_embedding[friends].reshape(batch_size, -1),
+                self.brawler_embedding[enemies].reshape(batch_size, -1),
+                self.map_embedding[map_idx[:, 0]],
+            ],
+            axis=1,
+        )
+        x = np.maximum(x @ self.fc1_weight.T + self.fc1_bias, 0)
+        return x @ self.fc2_weight.T + self.fc2_bias
+
+    __call__ = forward
@@ -8,58 +8,67 @@ sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
 
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from backend.src.service import PostgreService
+from backend.src.service.BattleCrawler import BattleCrawler
+from backend.src.service.BrawlStarsApiClient import AsyncBrawlStarsApiClient
 from backend.src.utils.jsonUtils import read_json
-import backend.src.utils.battlesUtils as battlesUtils
 from backend.src.config import AppConfig
 
 # Main variables
 appConfig = AppConfig.AppConfig()
-postgreService = PostgreService.PostgreService(appConfig=appConfig)
-max_threads = 60
-processed_players = 0
+max_concurrency = 60
+# Batches written in parallel, each on its own pooled connection
+write_concurrency = 4
+postgreService = PostgreService.PostgreService(
+    appConfig=appConfig, pool_size=max(appConfig.POSTGRE_POOL_SIZE, write_concurrency)
+)
+# Tags whose battles are written, a stopped crawl resumes from there and a
+# finished one deletes it
+checkpoint_path = os.path.join(
+    appConfig.BASE_DIR, "data", "crawler", f"checkpoint_s{appConfig.game_version}.txt"
+)
 
 # Data
 brawlerData = read_json("./backend/data/brawlersMaps.json")
 brawler_map = {brawler["id"]: brawler for brawler in brawlerData["brawlers"]}
 
+
+async def main(tags):
+    # Keep-alive connections for every fetcher, rate limited by BRAWL_STARS_API_RATE
+    apiClient = AsyncBrawlStarsApiClient.from_config(
+        appConfig, max_concurrency=max_concurrency
+    )
+    crawler = BattleCrawler(
+        postgreService,
+        brawler_map,
+        appConfig.API_KEY,
+        appConfig.BASE_URL,
+        apiClient,
+        fetch_concurrency=max_concurrency,
+        write_concurrency=write_concurrency,
+        checkpoint_path=checkpoint_path,
+    )
+    # Fetch every player again, even if the last crawl did not finish
+    if "--restart" in sys.argv:
+        crawler.checkpoint.reset()
+    try:
+        stats = await crawler.run(tags)
+    finally:
+        await apiClient.aclose()
+    print("job finished")
+    print(stats)
+    print(apiClient.stats())
+    print(postgreService.stats())
+
+
 # Main
 players = postgreService.get_all_players_from_rank(15, "above")
 postgreService.create_battles_table_version(appConfig.game_version)
 
-total_players = len(players)
-progress_step = max(1, total_players // 100)  # Ensure at least 1 step
-
-print("Start battles retriever for " + str(total_players) + " players")
-
-with ThreadPoolExecutor(max_workers=max_threads) as executor:
-    futures = [
-        executor.submit(
-            battlesUtils.get_all_battles_from_tag,
-            player[0],
-            postgreService,
-            brawler_map,
-            appConfig.API_KEY,
-            appConfig.BASE_URL,
-        )
-        for player in players
-    ]
-    # Wait for all futures to complete
-    for future in futures:
-        future.result()
-        processed_players += 1
-        if processed_players % progress_step == 0 or processed_players == total_players:
-            print(
-                f"Progress: {processed_players}/{total_players} ({(processed_players / total_players) * 100:.0f}%)"
-            )
-    print("job finished")
+print("Start battles retriever for " + str(len(players)) + " players")
+asyncio.run(main([player[0] for player in players]))
 
 
 # # Test with my own tag
-# with ThreadPoolExecutor(max_workers=max_threads) as executor:
-#     futures = [executor.submit(battlesUtils.get_all_battles_from_tag, appConfig.OWN_PLAYER_TAG, postgreService, brawler_map, appConfig.API_KEY, appConfig.BASE_URL)]
-#     # Wait for all futures to complete
-#     for future in futures:
-#         future.result()
-#     print("job finished")
+# asyncio.run(main([appConfig.OWN_PLAYER_TAG]))
@@ -0,0 +1,139 @@
+"""
+Startup time benchmark of the backend workers.
+
+Every run starts a fresh interpreter (so nothing is already imported) that
+imports and initializes the modules app.py needs one at a time, then imports
+app itself, which builds its own service on already imported modules. The
+script reports the median time of each step, the slowest modules of the
+`-X importtime` breakdown, which heavy training dependencies ended up imported
+and the peak resident memory, for each MODEL_FORMAT.
+
+Usage:
+    python src/scripts/benchmarkStartup.py [--formats torch numpy int8] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEAVY_MODULES = ["torch", "pandas", "matplotlib", "psycopg2", "tqdm"]
+
+CHILD_CODE = """
+import contextlib, importlib, io, json, os, resource, sys, time
+sys.path.insert(0, os.getcwd())
+steps = []
+
+def timed(label, fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    steps.append((label, time.perf_counter() - start))
+    return result
+
+timed("import flask", lambda: importlib.import_module("flask"))
+appConfigModule = timed(
+    "import AppConfig", lambda: importlib.import_module("src.config.AppConfig")
+)
+appConfig = timed("init AppConfig", appConfigModule.AppConfig)
+serviceModule = timed(
+    "import NeuralNetworkService",
+    lambda: importlib.import_module("src.service.NeuralNetworkService"),
+)
+model_dir = os.path.join("data", "model", f"version_{appConfig.game_version}")
+timed(
+    "init NeuralNetworkService",
+    lambda: serviceModule.NeuralNetworkService(
+        appConfig=appConfig,
+        data_path=os.path.join(model_dir, "mappings.pkl"),
+        model_path=os.path.join(model_dir, "nn_model_all.pth"),
+        version=appConfig.game_version,
+    ),
+)
+timed("import app", lambda: importlib.import_module("app"))
+
+print("BENCHMARK " + json.dumps({
+    "steps": steps,
+    "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Cumulative import time in seconds of every top-level module."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented, only keep the modules imported directly
+        if name.startswith("  "):
+            continue
+        modules[name.strip()] = int(cumulative) / 1e6
+    return modules
+
+
+def run_once(model_format):
+    env = dict(os.environ, MODEL_FORMAT=model_format)
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n" + CHILD_CODE
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Startup failed for {model_format}:\n{process.stderr}")
+
+    line = next(
+        line for line in process.stdout.splitlines() if line.startswith("BENCHMARK ")
+    )
+    result = json.loads(line[len("BENCHMARK ") :])
+    result["imports"] = parse_importtime(process.stderr)
+    return result
+
+
+def benchmark(model_format, runs, top):
+    results = [run_once(model_format) for _ in range(runs)]
+
+    print(f"\n=== MODEL_FORMAT={model_format} ({runs} runs, median) ===")
+    for i, (label, _) in enumerate(results[0]["steps"]):
+        seconds = statistics.median(result["steps"][i][1] for result in results)
+        print(f"{label:<30} {seconds * 1000:9.1f} ms")
+    total = statistics.median(
+        sum(seconds for _, seconds in result["steps"]) for result in results
+    )
+    print(f"{'total':<30} {total * 1000:9.1f} ms")
+
+    print("\nSlowest top-level imports:")
+    imports = {
+        name: statistics.median(result["imports"].get(name, 0) for result in results)
+        for name in results[0]["imports"]
+    }
+    for name, seconds in sorted(imports.items(), key=lambda x: -x[1])[:top]:
+        print(f"{name:<30} {seconds * 1000:9.1f} ms")
+
+    print(f"\nHeavy modules imported: {results[0]['heavy_modules'] or 'none'}")
+    max_rss = statistics.median(result["max_rss_mb"] for result in results)
+    print(f"Peak resident memory: {max_rss:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--formats", nargs="+", default=["torch", "numpy"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Imports to list")
+    args = parser.parse_args()
+
+    for model_format in args.formats:
+        benchmark(model_format, args.runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
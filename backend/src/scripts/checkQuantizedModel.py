@@ -0,0 +1,185 @@
+"""
+Accuracy regression check of the int8 serving mode against the float model.
+
+Every battle of the held-out set gives one draft state per winning brawler: the
+two other winners as friends, the losing team as enemies and the hidden winner
+as the expected pick. Both models recommend a top 10 for each state and predict
+the win rate of the full teams, then the script compares them and exits with
+status 1 when the int8 model regresses.
+
+Held-out battles are the ones after --since, by default after the model file
+was last written: the model is trained on the whole battles table, so only
+battles crawled after training are unseen. A model file copied later only
+makes the held-out set smaller. The script fails when no battle is left.
+
+Usage:
+    python src/scripts/checkQuantizedModel.py [--since 20250401T000000.000Z] [--limit 5000]
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+from backend.src.service import NeuralNetworkService, NeuralNetworkTrainingService
+import backend.src.config.AppConfig as AppConfig
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def training_cutoff(model_path):
+    """battleTime of the last write of the model file, e.g. 20250401T000000.000Z."""
+    written = datetime.fromtimestamp(os.path.getmtime(model_path), timezone.utc)
+    return written.strftime("%Y%m%dT%H%M%S.000Z")
+
+
+def build_cases(df, vocabulary):
+    """Draft states (with the hidden winner) and matchups of a battles dataframe."""
+    drafts, targets, matchups = [], [], []
+    for _, row in df.iterrows():
+        map_name = row["map"].strip()
+        win_team = [b.strip() for b in row["wteam"].split("-")]
+        lose_team = [b.strip() for b in row["lteam"].split("-")]
+        if len(win_team) != 3 or not all(b in vocabulary for b in win_team):
+            continue
+        if not lose_team or not all(b in vocabulary for b in lose_team):
+            continue
+
+        matchups.append(
+            {"friends": win_team, "enemies": lose_team, "map_name": map_name}
+        )
+        for i, target in enumerate(win_team):
+            drafts.append(
+                {
+                    "friends": win_team[:i] + win_team[i + 1 :],
+                    "enemies": lose_team,
+                    "map_name": map_name,
+                    "excluded": [],
+                    "available_brawlers": [],
+                }
+            )
+            targets.append(target)
+    return drafts, targets, matchups
+
+
+def compare(floatService, int8Service, drafts, targets, matchups, batch_size=512):
+    """Top 10 and win rate agreement of the int8 model with the float model."""
+    overlap = top1_agreement = float_hits = int8_hits = 0
+    for start in range(0, len(drafts), batch_size):
+        batch = drafts[start : start + batch_size]
+        float_top = floatService.infer_best_brawler_batch(batch, nbBrawlers=10)
+        int8_top = int8Service.infer_best_brawler_batch(batch, nbBrawlers=10)
+        for target, float_picks, int8_picks in zip(
+            targets[start : start + batch_size], float_top, int8_top
+        ):
+            float_names = [brawler for brawler, _ in float_picks]
+            int8_names = [brawler for brawler, _ in int8_picks]
+            overlap += len(set(float_names) & set(int8_names)) / max(
+                len(float_names), 1
+            )
+            top1_agreement += float_names[:1] == int8_names[:1]
+            float_hits += target in float_names
+            int8_hits += target in int8_names
+
+    winrate_errors = []
+    float_correct = int8_correct = 0
+    for start in range(0, len(matchups), batch_size):
+        batch = matchups[start : start + batch_size]
+        float_winrates = floatService.infer_winrate_batch(batch)
+        int8_winrates = int8Service.infer_winrate_batch(batch)
+        for float_winrate, int8_winrate in zip(float_winrates, int8_winrates):
+            winrate_errors.append(abs(float_winrate - int8_winrate))
+            # Matchups are written from the winning team's side
+            float_correct += float_winrate > 50
+            int8_correct += int8_winrate > 50
+
+    num_drafts = max(len(drafts), 1)
+    num_matchups = max(len(matchups), 1)
+    return {
+        "drafts": len(drafts),
+        "matchups": len(matchups),
+        "top10_overlap": overlap / num_drafts,
+        "top1_agreement": top1_agreement / num_drafts,
+        "float_hit_rate": float_hits / num_drafts,
+        "int8_hit_rate": int8_hits / num_drafts,
+        "winrate_mean_abs_diff": sum(winrate_errors) / num_matchups,
+        "winrate_max_abs_diff": max(winrate_errors, default=0.0),
+        "float_winner_accuracy": float_correct / num_matchups,
+        "int8_winner_accuracy": int8_correct / num_matchups,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--since",
+        help="Only use battles after this timestamp, defaults to the training cutoff",
+    )
+    parser.add_argument("--limit", type=int, default=5000, help="Battles to use")
+    parser.add_argument("--min-overlap", type=float, default=0.97)
+    parser.add_argument("--max-hit-rate-drop", type=float, default=0.005)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.005)
+    args = parser.parse_args()
+
+    appConfig = AppConfig.AppConfig()
+    version = appConfig.game_version
+    data_path = os.path.join(
+        BASE_DIR, "data", "model", f"version_{version}", "mappings.pkl"
+    )
+    model_path = os.path.join(
+        BASE_DIR, "data", "model", f"version_{version}", "nn_model_all.pth"
+    )
+
+    floatService = NeuralNetworkTrainingService.NeuralNetworkTrainingService(
+        data_path=data_path,
+        model_path=model_path,
+        version=version,
+        appConfig=appConfig,
+    )
+    int8Service = NeuralNetworkService.NeuralNetworkService(
+        data_path=data_path,
+        model_path=model_path,
+        version=version,
+        appConfig=appConfig,
+        model_format="int8",
+    )
+
+    since = args.since or training_cutoff(model_path)
+    print(f"Using battles after {since}")
+    df = floatService.fetch_battle_data()
+    df = df[df["timestamp"] > since]
+    if df.empty:
+        print("No held-out battles, crawl battles after the training cutoff first.")
+        sys.exit(1)
+    df = df.sort_values("timestamp").tail(args.limit)
+
+    drafts, targets, matchups = build_cases(df, floatService.vocabulary)
+    report = compare(floatService, int8Service, drafts, targets, matchups)
+    for key, value in report.items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+
+    failures = []
+    if report["top10_overlap"] < args.min_overlap:
+        failures.append("top 10 overlap")
+    if report["float_hit_rate"] - report["int8_hit_rate"] > args.max_hit_rate_drop:
+        failures.append("hidden pick hit rate")
+    if (
+        report["float_winner_accuracy"] - report["int8_winner_accuracy"]
+        > args.max_accuracy_drop
+    ):
+        failures.append("winner accuracy")
+
+    if failures:
+        print("Int8 model regressed on:", ", ".join(failures))
+        sys.exit(1)
+    print("Int8 model is within tolerance of the float model.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
-from backend.src.service import NeuralNetworkService, PostgreService
+from backend.src.service import NeuralNetworkTrainingService, PostgreService
 import backend.src.config.AppConfig as AppConfig
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -35,7 +35,7 @@ game_version_path = os.path.join(BASE_DIR, "data", "game_version.json")
 
 postgreService = PostgreService.PostgreService(appConfig=appConfig)
 
-neuralNetworkService = NeuralNetworkService.NeuralNetworkService(
+neuralNetworkService = NeuralNetworkTrainingService.NeuralNetworkTrainingService(
     data_path=data_path,
     model_path=model_path,
     version=appConfig.game_version,
@@ -48,9 +48,15 @@ neuralNetworkService.train_model(
     num_epochs=10, batch_size=64, num_friends=3, num_enemies=3
 )
 neuralNetworkService.save_mappings(neuralNetworkService.data_path)
+neuralNetworkService.export_torchscript()
 neuralNetworkService.write_tier_list(tierlist_path)
 neuralNetworkService.save_stats_battle(stats_path)
 neuralNetworkService.save_counter_matrix()
+neuralNetworkService.load_counter_matrix()
+neuralNetworkService.save_opening_picks()
+neuralNetworkService.export_numpy_model()
+neuralNetworkService.load_opening_picks()
+neuralNetworkService.export_artifact()
 
 # Apply modification to game_version.json
 postgreService.update_game_version(appConfig.game_version, game_version_path)
@@ -8,7 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
-from backend.src.service import NeuralNetworkService
+from backend.src.service import NeuralNetworkTrainingService
 import backend.src.config.AppConfig as AppConfig
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,7 +29,7 @@ tierlist_path = os.path.join(
     BASE_DIR, "data", "model", f"version_{appConfig.game_version}", "tierlist.json"
 )
 
-neuralNetworkService = NeuralNetworkService.NeuralNetworkService(
+neuralNetworkService = NeuralNetworkTrainingService.NeuralNetworkTrainingService(
     data_path=data_path,
     model_path=model_path,
     version=appConfig.game_version,
@@ -39,3 +39,8 @@ neuralNetworkService = NeuralNetworkService.NeuralNetworkService(
 
 neuralNetworkService.write_tier_list(tierlist_path)
 neuralNetworkService.save_stats_battle(stats_path)
+neuralNetworkService.save_opening_picks()
+neuralNetworkService.export_torchscript()
+neuralNetworkService.export_numpy_model()
+neuralNetworkService.load_opening_picks()
+neuralNetworkService.export_artifact()
@@ -0,0 +1,409 @@
+import asyncio
+import os
+import time
+
+from src.utils import battlesUtils
+
+# API statuses that fetching the same tag again would not change
+PERMANENT_FETCH_ERRORS = (403, 404)
+
+
+class CrawlCheckpoint:
+    """
+    Append-only file of the player tags whose battles are written.
+
+    A tag is only recorded once its rows are committed, or once the API has
+    answered that its log cannot be fetched, so a crawl that stops midway
+    resumes with the players it had not finished. The file is deleted once a
+    crawl has tried every player, so the next crawl fetches them all again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tags = set()
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as file:
+                self.tags = {line.strip() for line in file if line.strip()}
+
+    def __contains__(self, tag):
+        return tag in self.tags
+
+    def __len__(self):
+        return len(self.tags)
+
+    def add(self, tags):
+        tags = [tag for tag in tags if tag not in self.tags]
+        self.tags.update(tags)
+        if self.path is None or not tags:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a") as file:
+            file.writelines(f"{tag}\n" for tag in tags)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def reset(self):
+        self.tags = set()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CrawlDeduplicator:
+    """
+    Battles and player ranks queued for writing or written during a crawl.
+
+    A battle is listed in the log of each of its 6 players and a player shows
+    up in the battles of many others, so most rows of a crawl are repeats.
+    Rows are added with the tag of the log that queued them, so their copies
+    in the next logs are dropped while the write is in flight, and discarded
+    if the write fails, so that a later log holding them writes them again.
+    A player is written again only if its rank differs from the last one
+    queued, which is all the upsert would change.
+    """
+
+    def __init__(self):
+        # Battle id -> tag of the log writing it
+        self.battles = {}
+        # Player tag -> (last rank, tag of the log writing it)
+        self.player_ranks = {}
+
+    def add_battle(self, battle_id, owner):
+        """None if the battle is new to the crawl, else the tag writing it."""
+        if battle_id in self.battles:
+            return self.battles[battle_id]
+        self.battles[battle_id] = owner
+        return None
+
+    def add_player(self, tag, last_rank, owner):
+        """None if the player is new to the crawl or its rank changed, else the
+        tag writing it."""
+        queued = self.player_ranks.get(tag)
+        if queued is not None and queued[0] == last_rank:
+            return queued[1]
+        self.player_ranks[tag] = (last_rank, owner)
+        return None
+
+    def discard(self, rows):
+        """Forget the (battle, players) rows of a failed write."""
+        for battle, players in rows:
+            self.battles.pop(battle[0][0], None)
+            for player in players:
+                # The rank written before is unknown, so the next one is written
+                self.player_ranks.pop(player[0], None)
+
+    def __len__(self):
+        return len(self.battles)
+
+
+class BattleCrawler:
+    """
+    Asyncio pipeline crawling the battle logs of a list of players.
+
+        tags -> fetch (fetch_concurrency tasks) -> transform -> batched write
+
+    Stages are connected by bounded queues: when the database falls behind the
+    queues fill up and the fetchers wait, so memory stays bounded and the API
+    is only called as fast as rows can be written. The fetchers share an
+    AsyncBrawlStarsApiClient, whose rate limit caps the crawl. Writes run in
+    threads since the database driver blocks, write_concurrency batches at a
+    time when the PostgreService has a connection pool.
+    """
+
+    def __init__(
+        self,
+        postgreService,
+        brawlers,
+        api_key,
+        base_url,
+        client,
+        fetch_concurrency=60,
+        queue_size=256,
+        batch_size=500,
+        write_concurrency=1,
+        flush_interval=2.0,
+        checkpoint_path=None,
+        progress_interval=10.0,
+        deduplicate=True,
+    ):
+        """
+        Arguments:
+            postgreService: PostgreService the battles and players are written to.
+            brawlers: Dict mapping brawler ids to names, for battles without names.
+            client: AsyncBrawlStarsApiClient used by every fetcher.
+            fetch_concurrency: Number of battle logs fetched at the same time.
+            queue_size: Capacity of every queue between two stages.
+            batch_size: Rows written per database batch.
+            write_concurrency: Batches written at the same time, at most the
+                pool size of postgreService.
+            flush_interval: Seconds before a partial batch is written anyway.
+            checkpoint_path: File of the tags written by an unfinished crawl,
+                None to disable resuming.
+            progress_interval: Seconds between progress lines, 0 disables them.
+            deduplicate: Drop the battles and player ranks already queued or
+                written by this crawl before they reach the database.
+        """
+        self.postgreService = postgreService
+        self.brawlers = brawlers
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client = client
+        self.fetch_concurrency = fetch_concurrency
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.write_concurrency = write_concurrency
+        self.flush_interval = flush_interval
+        self.progress_interval = progress_interval
+        self.checkpoint = CrawlCheckpoint(checkpoint_path)
+        self.deduplicator = CrawlDeduplicator() if deduplicate else None
+        # Tags whose rows are committed, and the uncommitted tags each log
+        # dropped rows of as duplicates
+        self.committed = set()
+        self.depends_on = {}
+
+        # Metrics by stage
+        self.counters = {
+            "tags_total": 0,
+            "tags_skipped": 0,
+            "tags_fetched": 0,
+            "fetch_errors": 0,
+            "tags_failed": 0,
+            "battles_transformed": 0,
+            "battles_unranked": 0,
+            "battles_duplicate": 0,
+            "players_duplicate": 0,
+            "transform_errors": 0,
+            "battles_written": 0,
+            "players_written": 0,
+            "batches_written": 0,
+            "write_errors": 0,
+            "tags_done": 0,
+        }
+        self.start_time = None
+
+    async def run(self, tags):
+        """Crawl the battle logs of tags, returns the counters."""
+        self.start_time = time.perf_counter()
+        tag_queue = asyncio.Queue(self.queue_size)
+        log_queue = asyncio.Queue(self.queue_size)
+        row_queue = asyncio.Queue(self.queue_size)
+
+        fetchers = [
+            asyncio.create_task(self.fetch(tag_queue, log_queue))
+            for _ in range(self.fetch_concurrency)
+        ]
+        transformer = asyncio.create_task(self.transform(log_queue, row_queue))
+        writers = [
+            asyncio.create_task(self.write(row_queue))
+            for _ in range(self.write_concurrency)
+        ]
+        reporter = None
+        if self.progress_interval > 0:
+            reporter = asyncio.create_task(self.report())
+
+        try:
+            await self.feed(tags, tag_queue)
+            # Each stage stops on None, once every upstream task has stopped
+            for _ in fetchers:
+                await tag_queue.put(None)
+            await asyncio.gather(*fetchers)
+            await log_queue.put(None)
+            await transformer
+            for _ in writers:
+                await row_queue.put(None)
+            await asyncio.gather(*writers)
+        finally:
+            for task in [*fetchers, transformer, *writers]:
+                task.cancel()
+            if reporter is not None:
+                reporter.cancel()
+
+        self.print_progress()
+        counters = self.counters
+        tried = counters["tags_done"] + counters["tags_failed"]
+        if tried + counters["tags_skipped"] == counters["tags_total"]:
+            # Every player is written or cannot be, the next crawl starts over
+            self.checkpoint.reset()
+        return self.stats()
+
+    async def feed(self, tags, tag_queue):
+        for tag in tags:
+            self.counters["tags_total"] += 1
+            if tag in self.checkpoint:
+                self.counters["tags_skipped"] += 1
+                continue
+            # Waits while the fetchers are busy (backpressure)
+            await tag_queue.put(tag)
+
+    async def fetch(self, tag_queue, log_queue):
+        while (tag := await tag_queue.get()) is not None:
+            try:
+                data = await battlesUtils.get_battle_log_async(
+                    tag, self.api_key, self.base_url, self.client
+                )
+            except Exception as e:
+                data = {"error": type(e).__name__, "message": str(e)}
+
+            if "error" in data:
+                self.counters["fetch_errors"] += 1
+                if data["error"] in PERMANENT_FETCH_ERRORS:
+                    # Unknown or banned player, the resumed crawl skips it too
+                    self.checkpoint.add([tag])
+                    self.counters["tags_failed"] += 1
+                # Otherwise not checkpointed, so the resumed crawl retries it
+                continue
+            self.counters["tags_fetched"] += 1
+            await log_queue.put((tag, data))
+
+    async def transform(self, log_queue, row_queue):
+        while (item := await log_queue.get()) is not None:
+            tag, data = item
+            rows = []
+            for rawBattle in data.get("items", []):
+                try:
+                    battle_rows = battlesUtils.extract_battle(self.brawlers, rawBattle)
+                except Exception:
+                    # A malformed battle only skips itself, not the whole log
+                    self.counters["transform_errors"] += 1
+                    continue
+                if battle_rows is None:
+                    self.counters["battles_unranked"] += 1
+                    continue
+                if self.deduplicator is not None:
+                    battle_rows = self.deduplicate(tag, *battle_rows)
+                    if battle_rows is None:
+                        continue
+                self.counters["battles_transformed"] += 1
+                rows.append(battle_rows)
+            await row_queue.put((tag, rows))
+
+    def deduplicate(self, tag, battle, players):
+        """Rows of a battle left to write, None if it was already written."""
+        owners = set()
+        # The id is a 1-tuple, as insert_battle_stats expects it
+        owner = self.deduplicator.add_battle(battle[0][0], tag)
+        if owner is not None:
+            self.counters["battles_duplicate"] += 1
+            self.wait_for(tag, {owner})
+            return None
+
+        new_players = []
+        for player in players:
+            owner = self.deduplicator.add_player(player[0], player[1], tag)
+            if owner is None:
+                new_players.append(player)
+            else:
+                owners.add(owner)
+        self.counters["players_duplicate"] += len(players) - len(new_players)
+        self.wait_for(tag, owners)
+        return battle, new_players
+
+    def wait_for(self, tag, owners):
+        """Record the uncommitted logs holding rows that tag dropped."""
+        owners = owners - self.committed - {tag}
+        if owners:
+            self.depends_on.setdefault(tag, set()).update(owners)
+
+    async def write(self, row_queue):
+        batch = []
+        batch_size = 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        done = False
+
+        while not done:
+            try:
+                item = await asyncio.wait_for(
+                    row_queue.get(), max(0.0, deadline - loop.time())
+                )
+            except asyncio.TimeoutError:
+                item = ()
+
+            if item is None:
+                done = True
+            elif item:
+                batch.append(item)
+                batch_size += sum(1 + len(players) for _, players in item[1])
+
+            if batch and (
+                done or batch_size >= self.batch_size or loop.time() >= deadline
+            ):
+                await self.flush(batch)
+                batch, batch_size = [], 0
+            if loop.time() >= deadline:
+                deadline = loop.time() + self.flush_interval
+
+    async def flush(self, batch):
+        """
+        Write a batch of (tag, rows) logs. A failed batch is written again one
+        log at a time, so a bad row only fails the player it came from.
+        """
+        rows = [row for _, tag_rows in batch for row in tag_rows]
+        try:
+            battles_written, players_written = await asyncio.to_thread(
+                self.write_batch, rows
+            )
+        except Exception as e:
+            self.counters["write_errors"] += 1
+            if len(batch) > 1:
+                for item in batch:
+                    await self.flush([item])
+                return
+            # Not checkpointed, so this player is retried by the next crawl
+            print(f"Error writing the {len(rows)} battles of {batch[0][0]}: {e}")
+            self.depends_on.pop(batch[0][0], None)
+            if self.deduplicator is not None:
+                self.deduplicator.discard(rows)
+            return
+
+        tags = [tag for tag, _ in batch]
+        self.committed.update(tags)
+        # A log that dropped rows of a log not committed yet is not
+        # checkpointed: if that write fails, a resumed crawl fetches both again
+        self.checkpoint.add(
+            [tag for tag in tags if self.depends_on.pop(tag, set()) <= self.committed]
+        )
+        self.counters["tags_done"] += len(batch)
+        self.counters["battles_written"] += battles_written
+        self.counters["players_written"] += players_written
+        self.counters["batches_written"] += 1
+
+    def write_batch(self, rows):
+        """
+        Write the rows of a batch of battles with two bulk statements in one
+        transaction, runs in a worker thread.
+
+        Returns:
+            tuple: (battles inserted, players upserted)
+        """
+        return self.postgreService.write_battles(
+            [battle for battle, _ in rows],
+            [player for _, battle_players in rows for player in battle_players],
+        )
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self.print_progress()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        stats = dict(self.counters)
+        stats["elapsed_seconds"] = round(elapsed, 1)
+        for counter in ["tags_fetched", "battles_transformed", "battles_written"]:
+            stats[f"{counter}_per_second"] = (
+                round(self.counters[counter] / elapsed, 1) if elapsed else 0.0
+            )
+        return stats
+
+    def print_progress(self):
+        stats = self.stats()
+        pending = stats["tags_total"] - stats["tags_skipped"]
+        print(
+            f"Progress: {stats['tags_done']}/{pending} players "
+            f"| fetched {stats['tags_fetched_per_second']}/s "
+            f"({stats['fetch_errors']} errors) "
+            f"| transformed {stats['battles_transformed_per_second']} battles/s "
+            f"({stats['battles_duplicate']} duplicates) "
+            f"| written {stats['battles_written_per_second']} battles/s "
+            f"in {stats['batches_written']} batches"
+        )
@@ -0,0 +1,307 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Throttled or transient upstream errors, worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing rate requests per second on average and
+    bursts of up to capacity requests.
+
+    A rate of 0 disables the limit. Tokens can go negative: every caller gets
+    its own slot in the future and waits for it, so a burst of threads is
+    spread evenly instead of retrying in lockstep.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, returns the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.paused_until - now)
+            if self.rate <= 0:
+                return wait
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            return max(wait, -self.tokens / self.rate)
+
+    def pause(self, seconds):
+        """Hold every caller for seconds, when the API asks to slow down."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class BaseBrawlStarsApiClient:
+    """Rate limit, retry policy and per endpoint metrics shared by both clients."""
+
+    def __init__(
+        self,
+        max_concurrency=16,
+        rate_per_second=30.0,
+        burst=None,
+        max_retries=3,
+        backoff=0.5,
+        timeout=10.0,
+        max_retry_after=30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_retry_after = max_retry_after
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate_per_second, burst)
+
+        # Metrics by endpoint
+        self.metrics = {}
+        self.metrics_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, appConfig, **overrides):
+        """Client with the BRAWL_STARS_API_* settings, overridden by keyword."""
+        settings = {
+            "max_concurrency": appConfig.BRAWL_STARS_API_MAX_CONCURRENCY,
+            "rate_per_second": appConfig.BRAWL_STARS_API_RATE,
+            "burst": appConfig.BRAWL_STARS_API_BURST,
+            "max_retries": appConfig.BRAWL_STARS_API_MAX_RETRIES,
+            "timeout": appConfig.BRAWL_STARS_API_TIMEOUT,
+            "max_retry_after": appConfig.BRAWL_STARS_API_MAX_RETRY_AFTER,
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    @staticmethod
+    def endpoint_name(url):
+        """URL path without the player or club tags, e.g. /v1/players/battlelog."""
+        segments = urlsplit(url).path.split("/")
+        return "/".join(s for s in segments if not s.startswith(("%23", "#")))
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Seconds of a Retry-After header, in seconds or an HTTP date, or None."""
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return (retry_at - datetime.now(timezone.utc)).total_seconds()
+
+    def retry_delay(self, attempt, response):
+        """
+        Seconds to wait before the next attempt, Retry-After first when it is
+        between 0 and max_retry_after, so a caller is never parked longer.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                delay = self.parse_retry_after(retry_after)
+                if delay is not None and 0 <= delay <= self.max_retry_after:
+                    return delay
+        # Exponential backoff with jitter so retries do not synchronize
+        return self.backoff * 2**attempt + random.uniform(0, self.backoff)
+
+    def should_retry(self, attempt, response):
+        if attempt >= self.max_retries:
+            return False
+        return response is None or response.status_code in RETRY_STATUSES
+
+    def record(self, endpoint, latency, response, retried):
+        with self.metrics_lock:
+            metrics = self.metrics.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "throttled": 0,
+                    "total_latency": 0.0,
+                    "max_latency": 0.0,
+                },
+            )
+            metrics["requests"] += 1
+            metrics["total_latency"] += latency
+            metrics["max_latency"] = max(metrics["max_latency"], latency)
+            if retried:
+                metrics["retries"] += 1
+            if response is None or response.status_code >= 400:
+                metrics["errors"] += 1
+            if response is not None and response.status_code == 429:
+                metrics["throttled"] += 1
+
+    def after_attempt(self, attempt, response):
+        """Seconds to wait before retrying, or None to return the response."""
+        if not self.should_retry(attempt, response):
+            return None
+        delay = self.retry_delay(attempt, response)
+        if response is not None and response.status_code == 429:
+            # Throttling applies to the API key, slow down every caller
+            self.rate_limiter.pause(delay)
+        return delay
+
+    def stats(self):
+        with self.metrics_lock:
+            endpoints = {
+                endpoint: {
+                    "requests": metrics["requests"],
+                    "errors": metrics["errors"],
+                    "retries": metrics["retries"],
+                    "throttled": metrics["throttled"],
+                    "avg_latency_ms": round(
+                        metrics["total_latency"] / metrics["requests"] * 1000, 2
+                    ),
+                    "max_latency_ms": round(metrics["max_latency"] * 1000, 2),
+                }
+                for endpoint, metrics in self.metrics.items()
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.rate_limiter.rate,
+            "burst": self.rate_limiter.capacity,
+            "max_retries": self.max_retries,
+            "endpoints": endpoints,
+        }
+
+
+class BrawlStarsApiClient(BaseBrawlStarsApiClient):
+    """
+    Pooled HTTP client of the Brawl Stars API, safe to share between threads.
+
+    Connections are kept alive in a pool of max_concurrency connections, at
+    most max_concurrency requests are in flight, a token bucket spreads them
+    to rate_per_second and 429/5xx responses are retried with backoff.
+    """
+
+    shared_client = None
+    shared_lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_concurrency, pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def shared(cls):
+        """Process wide client with the default settings."""
+        with cls.shared_lock:
+            if cls.shared_client is None:
+                cls.shared_client = cls()
+            return cls.shared_client
+
+    def get(self, url, headers=None):
+        """
+        GET url with the rate limit and retries.
+
+        Returns:
+            requests.Response: The last response, even if it is an error
+
+        Raises:
+            requests.RequestException: If the last attempt failed to connect
+        """
+        endpoint = self.endpoint_name(url)
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = error = None
+            with self.slots:
+                start = time.perf_counter()
+                try:
+                    response = self.session.get(
+                        url, headers=headers, timeout=self.timeout
+                    )
+                except requests.RequestException as e:
+                    error = e
+                self.record(endpoint, time.perf_counter() - start, response, attempt)
+
+            delay = self.after_attempt(attempt, response)
+            if delay is None:
+                if response is None:
+                    raise error
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncBrawlStarsApiClient(BaseBrawlStarsApiClient):
+    """BrawlStarsApiClient for asyncio, on a pooled httpx.AsyncClient."""
+
+    def __init__(self, **kwargs):
+        import httpx
+
+        super().__init__(**kwargs)
+        self.httpx = httpx
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self.session = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        )
+
+    async def get(self, url, headers=None):
+        """Same as BrawlStarsApiClient.get, returns an httpx.Response."""
+        endpoint = self.endpoint_name(url)
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            response = error = None
+            async with self.slots:
+                start = time.perf_counter()
+                try:
+                    response = await self.session.get(url, headers=headers)
+                except self.httpx.HTTPError as e:
+                    error = e
+                self.record(endpoint, time.perf_counter() - start, response, attempt)
+
+            delay = self.after_attempt(attempt, response)
+            if delay is None:
+                if response is None:
+                    raise error
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.session.aclose()
@@ -0,0 +1,172 @@
+from concurrent.futures import Future
+import queue
+import threading
+import time
+
+
+class InferenceScheduler:
+    """
+    Coalesce concurrent prediction requests into model batches.
+
+    Request threads enqueue draft or winrate requests and wait on a future. A
+    single worker thread collects requests until max_batch_size is reached or
+    max_wait_ms has passed since the first one, runs one batched prediction per
+    model version and kind of request and resolves every caller's future.
+    Requests whose caller gave up waiting are cancelled and never computed.
+    """
+
+    def __init__(
+        self,
+        neuralNetworkService,
+        max_batch_size=64,
+        max_wait_ms=2.0,
+        request_timeout=10.0,
+    ):
+        self.neuralNetworkService = neuralNetworkService
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.request_timeout = request_timeout
+
+        self.requests = queue.Queue()
+        self.worker = None
+        self.running = False
+        # Held to check running and enqueue, so nothing is queued once stopped
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.cancelled = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.worker = threading.Thread(
+            target=self.run, name="inference-scheduler", daemon=True
+        )
+        self.worker.start()
+
+    def stop(self):
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+            self.requests.put(None)  # Wake up the worker
+        self.worker.join()
+
+    def submit_draft(self, draft, nbBrawlers=10, service=None):
+        """Queue a draft state for predict_best_brawler_batch, returns a Future."""
+        return self.submit(("draft", nbBrawlers), draft, service)
+
+    def submit_winrate(self, matchup, service=None):
+        """Queue a matchup for predict_winrate_batch, returns a Future."""
+        return self.submit(("winrate",), matchup, service)
+
+    def submit(self, kind, payload, service=None):
+        """
+        Queue a request for service, or for the current neuralNetworkService, so
+        a request keeps the model version it started with across a swap.
+        """
+        future = Future()
+        service = service or self.neuralNetworkService
+        with self.lock:
+            if not self.running:
+                raise RuntimeError("Inference scheduler is not running")
+            self.requests.put((kind, payload, future, service))
+        return future
+
+    def wait(self, future):
+        """Result of future, cancelled if it is not ready within request_timeout."""
+        try:
+            return future.result(self.request_timeout)
+        except TimeoutError:
+            # Still queued: the worker skips it instead of computing it for nobody
+            future.cancel()
+            raise
+
+    def predict_best_brawler(self, draft, nbBrawlers=10, service=None):
+        return self.wait(self.submit_draft(draft, nbBrawlers, service))
+
+    def predict_winrate(self, matchup, service=None):
+        return self.wait(self.submit_winrate(matchup, service))
+
+    def run(self):
+        while self.running:
+            batch = self.collect_batch()
+            if batch:
+                self.process_batch(batch)
+
+        # Fail whatever is still queued once stopped
+        while not self.requests.empty():
+            request = self.requests.get_nowait()
+            if request is not None and request[2].set_running_or_notify_cancel():
+                request[2].set_exception(RuntimeError("Inference scheduler stopped"))
+
+    def collect_batch(self):
+        """Block for a first request, then gather more until the batch is full or the window closes."""
+        first = self.requests.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                break
+            batch.append(request)
+        return batch
+
+    def process_batch(self, batch):
+        # Cancelled futures belong to callers that timed out, the others can no
+        # longer be cancelled from here on
+        live = [r for r in batch if r[2].set_running_or_notify_cancel()]
+        self.cancelled += len(batch) - len(live)
+        if not live:
+            return
+
+        self.batches += 1
+        self.items += len(live)
+        self.largest_batch = max(self.largest_batch, len(live))
+
+        groups = {}
+        for kind, payload, future, service in live:
+            groups.setdefault((service, kind), []).append((payload, future))
+
+        for (service, kind), requests in groups.items():
+            payloads = [payload for payload, _ in requests]
+            try:
+                if kind[0] == "draft":
+                    results = service.predict_best_brawler_batch(
+                        payloads, nbBrawlers=kind[1]
+                    )
+                else:
+                    results = service.predict_winrate_batch(payloads)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(requests, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": self.requests.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "cancelled": self.cancelled,
+            "average_batch": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,243 @@
+import os
+import threading
+from collections import namedtuple
+
+from src.service.NeuralNetworkService import NeuralNetworkService
+
+
+class ModelVersion(
+    namedtuple(
+        "ModelVersion",
+        [
+            "version",
+            "service",
+            "data_game_version",
+            "data_maps",
+            "tier_list",
+            "tier_list_index",
+            "brawler_scores",
+            "battle_stats",
+            "battle_stats_index",
+        ],
+    )
+):
+    """
+    Everything served for one game version, loaded before it becomes active.
+
+    Immutable, so a request that reads the active version once gets the
+    service, data and payloads of a single version even across a swap.
+    """
+
+    __slots__ = ()
+
+
+class ModelRegistry:
+    """
+    Discover the trained model versions and hot-swap the active one.
+
+    Every data/model/version_* directory with mappings and model weights is a
+    candidate. The active version is the latest one of game_version.json that
+    has a model directory. A watcher thread re-reads game_version.json every
+    poll_interval seconds and, when a newer version is published, loads its
+    service, tier list and stats on the side before swapping them in.
+
+    The swap only rebinds the active ModelVersion, so in-flight requests
+    finish on the version they started with and nothing is dropped. appConfig
+    keeps the data of the version the app was started with, requests read
+    the active version instead.
+    """
+
+    def __init__(self, appConfig, model_dir, poll_interval=60.0):
+        self.appConfig = appConfig
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+
+        self.active = None
+        self.listeners = []
+        # Serializes loads so two refreshes never build the same version twice
+        self.load_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watcher = None
+
+        # Metrics
+        self.swaps = 0
+        self.last_error = None
+
+    @property
+    def service(self):
+        return self.active.service if self.active is not None else None
+
+    def add_listener(self, callback):
+        """Call callback(service) after every swap."""
+        self.listeners.append(callback)
+
+    def version_dir(self, version):
+        return os.path.join(self.model_dir, f"version_{version}")
+
+    def discover(self):
+        """
+        Versions that can be loaded, by version name.
+
+        Returns:
+            dict: Version name to model directory
+        """
+        versions = {}
+        if not os.path.isdir(self.model_dir):
+            return versions
+
+        for name in sorted(os.listdir(self.model_dir)):
+            path = os.path.join(self.model_dir, name)
+            if not name.startswith("version_") or not os.path.isdir(path):
+                continue
+            if os.path.exists(os.path.join(path, "mappings.pkl")) and os.path.exists(
+                os.path.join(path, "nn_model_all.pth")
+            ):
+                versions[name[len("version_") :]] = path
+        return versions
+
+    def latest_game_version(self):
+        """Latest entry of game_version.json that has a model directory."""
+        self.appConfig.setDataGameVersion()
+        available = self.discover()
+        candidates = [
+            game_version
+            for game_version in self.appConfig.data_all_game_version
+            if game_version["version"] in available
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda x: x["date"])
+
+    def load_version(self, version):
+        """Build the service and data of a version without touching the active one."""
+        version_dir = self.version_dir(version)
+        data_path = os.path.join(version_dir, "mappings.pkl")
+        model_path = os.path.join(version_dir, "nn_model_all.pth")
+        if not os.path.exists(data_path):
+            raise FileNotFoundError(f"Data file not found: {data_path}")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+
+        data_game_version = next(
+            (
+                game_version
+                for game_version in self.appConfig.data_all_game_version
+                if game_version["version"] == version
+            ),
+            None,
+        )
+        if data_game_version is None:
+            raise ValueError(f"Game version {version} is not in game_version.json")
+
+        print(f"Loading model version {version}...")
+        service = NeuralNetworkService(
+            data_path=data_path,
+            model_path=model_path,
+            version=version,
+            appConfig=self.appConfig,
+        )
+
+        tier_list = battle_stats = None
+        if self.appConfig.MODE and self.appConfig.MODE != "IMPORT":
+            tier_list = self.appConfig.loadTierList(version)
+            battle_stats = self.appConfig.loadBattleStats(version)
+
+        return self.build_version(
+            version, service, data_game_version, tier_list, battle_stats
+        )
+
+    def build_version(
+        self, version, service, data_game_version, tier_list=None, battle_stats=None
+    ):
+        """ModelVersion of the data, with the payloads derived from it built once."""
+        tier_list_index = brawler_scores = battle_stats_index = None
+        if tier_list is not None:
+            tier_list_index = self.appConfig.buildTierListIndex(tier_list)
+            brawler_scores = self.appConfig.buildBrawlerScores(tier_list)
+        if battle_stats is not None:
+            battle_stats_index = self.appConfig.buildBattleStatsIndex(battle_stats)
+
+        return ModelVersion(
+            version=version,
+            service=service,
+            data_game_version=data_game_version,
+            data_maps=self.appConfig.getRankedMaps(data_game_version),
+            tier_list=tier_list,
+            tier_list_index=tier_list_index,
+            brawler_scores=brawler_scores,
+            battle_stats=battle_stats,
+            battle_stats_index=battle_stats_index,
+        )
+
+    def activate(self, version):
+        """
+        Load a version and make it the active one.
+
+        Returns:
+            NeuralNetworkService: The service of the activated version
+        """
+        with self.load_lock:
+            modelVersion = self.load_version(version)
+            self.swap(modelVersion)
+        return modelVersion.service
+
+    def swap(self, modelVersion):
+        # One reference, so a request sees all of a version or none of it
+        self.active = modelVersion
+
+        for callback in self.listeners:
+            callback(modelVersion.service)
+
+        self.swaps += 1
+        print(f"Model version {modelVersion.version} is now active")
+
+    def refresh(self):
+        """
+        Activate the latest published version if it is not the active one.
+
+        Returns:
+            bool: True if a new version was swapped in
+        """
+        latest = self.latest_game_version()
+        if latest is None:
+            return False
+        if self.active is not None and latest["version"] == self.active.version:
+            return False
+        self.activate(latest["version"])
+        return True
+
+    def start(self):
+        if self.poll_interval <= 0 or self.watcher is not None:
+            return
+        self.stop_event.clear()
+        self.watcher = threading.Thread(
+            target=self.run, name="model-registry", daemon=True
+        )
+        self.watcher.start()
+
+    def stop(self):
+        if self.watcher is None:
+            return
+        self.stop_event.set()
+        self.watcher.join()
+        self.watcher = None
+
+    def run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the active version until the new one loads
+                self.last_error = str(e)
+                print(f"Error refreshing model version: {e}")
+
+    def stats(self):
+        return {
+            "active_version": self.active.version if self.active else None,
+            "available_versions": list(self.discover()),
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+            "poll_interval": self.poll_interval,
+            "watching": self.watcher is not None,
+        }
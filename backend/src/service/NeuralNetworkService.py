@@ -1,27 +1,28 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import json
-import logging
-import sys
 import os
-
-from matplotlib import pyplot as plt
+import pickle
+import sys
 
 sys.path.append(os.getcwd())
 sys.path.append(os.path.abspath(os.path.dirname(p=__file__)))
-import random
-import pickle
-import psycopg2
-import pandas as pd
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-from torch.utils.data import Dataset, DataLoader
-from tqdm import tqdm
+import numpy as np
 
-from src.utils.modelUtils import BattleDataset, BrawlerPredictionModel
+from src.model.BrawlerVocabulary import BrawlerVocabulary
+from src.model.NumpyBrawlerPredictionModel import NumpyBrawlerPredictionModel
+from src.utils.artifactUtils import read_artifact
+from src.utils.cacheUtils import LRUCache
+from src.utils.inferenceUtils import softmax, topk
 
 
 class NeuralNetworkService:
+    """
+    Serving side of the brawler prediction model: loads the mappings, model and
+    counter matrix of a game version and answers predictions.
+
+    Only numpy is imported at module level; torch is imported by the model
+    formats that need it. Training and artifact exports live in
+    NeuralNetworkTrainingService.
+    """
+
     def __init__(
         self,
         appConfig=None,
@@ -30,6 +31,7 @@ class NeuralNetworkService:
         device=None,
         version="35",
         auto_load_enable=True,
+        model_format=None,
     ):
         self.data_path = data_path
         self.model_path = model_path
@@ -39,148 +41,78 @@ class NeuralNetworkService:
         self.plot_path = self.model_path.replace(
             "nn_model_all.pth", "training_loss_plot.png"
         )
+        self.opening_picks_path = self.model_path.replace(
+            "nn_model_all.pth", "opening_picks.npz"
+        )
+        self.scripted_model_path = self.model_path.replace(
+            "nn_model_all.pth", "nn_model_scripted.pt"
+        )
+        self.numpy_model_path = self.model_path.replace(
+            "nn_model_all.pth", "nn_model_numpy.npz"
+        )
+        self.counter_matrix_array_path = self.model_path.replace(
+            "nn_model_all.pth", "counter_matrix.npy"
+        )
+        self.artifact_path = self.model_path.replace(
+            "nn_model_all.pth", "nn_model_artifact.bin"
+        )
         self.appConfig = appConfig
         self.version = version
+        if model_format is None:
+            model_format = appConfig.MODEL_FORMAT if appConfig is not None else "torch"
+        self.model_format = model_format
         self.auto_load_enable = auto_load_enable
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        # NumPy serving runs on the CPU and never imports torch
+        if device is None and model_format != "numpy":
+            import torch
+
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device or "cpu"
 
         self.brawler_to_idx = None
         self.map_to_idx = None
+        self.vocabulary = None
         self.dataset = None
         self.model = None
         self.counter_matrix = None
+        self.opening_picks = None
+
+        # Predictions keyed by draft state, evicted on model change
+        cache_size = appConfig.PREDICTION_CACHE_SIZE if appConfig is not None else 4096
+        self.prediction_cache = LRUCache(maxsize=cache_size, version=self.version)
 
-        self.load_data()
+        if self.model_format == "numpy" and os.path.exists(self.artifact_path):
+            self.load_artifact(load_model=auto_load_enable)
+        else:
+            self.load_data()
 
-        if auto_load_enable:
-            self.load_model()
-            self.load_counter_matrix()
+            if auto_load_enable:
+                self.load_model()
+                self.load_counter_matrix()
+                self.load_opening_picks()
 
     def setVersion(self, version):
         self.version = version
-
-        # Example: Pad missing friends and enemies in the dataset
-
-    def prepare_dataset(self, df, num_friends=3, num_enemies=3, pad_idx=0):
-        # Ensure the required columns exist
-        for i in range(1, num_friends + 1):
-            if f"friend{i}" not in df.columns:
-                df[f"friend{i}"] = pad_idx  # Pad missing friends with pad_idx
-
-        for i in range(1, num_enemies + 1):
-            if f"enemy{i}" not in df.columns:
-                df[f"enemy{i}"] = pad_idx  # Pad missing enemies with pad_idx
-
-        return df
+        self.prediction_cache.set_version(version)
 
     def load_data(self):
         print(f"Loading data locally at path : {self.data_path}")
-        if os.path.exists(self.data_path) and self.auto_load_enable == True:
-            print("Loading mappings from file...")
-            self.load_mappings(self.data_path)
-        else:
-            print("Data not found locally")
-            print("Loading data from SQL DB...")
-            df = self.fetch_battle_data()
-            df = self.prepare_dataset(df, num_friends=3, num_enemies=3, pad_idx=0)
-            self.brawler_to_idx, self.map_to_idx = self.build_mappings(df)
-            self.dataset = BattleDataset(df, self.brawler_to_idx, self.map_to_idx)
-            self.save_mappings(self.data_path)
-
-    def fetch_stats_battle_data(self):
-        query = """
-            WITH battle_data AS (
-                SELECT
-                    id,
-                    timestamp,
-                    map,
-                    mode,
-                    avg_rank,
-                    unnest(string_to_array(wTeam, '-')) AS brawler,
-                    'Victory' AS result
-                FROM battles_s35_3
-                WHERE avg_rank > 15
-                UNION ALL
-                SELECT
-                    id,
-                    timestamp,
-                    map,
-                    mode,
-                    avg_rank,
-                    unnest(string_to_array(lTeam, '-')) AS brawler,
-                    'Defeat' AS result
-                FROM battles_s35_3
-                WHERE avg_rank > 15
-            ),
-            brawler_stats AS (
-                SELECT
-                    brawler,
-                    map,
-                    SUM(CASE WHEN result = 'Victory' THEN 1 ELSE 0 END) AS wins,
-                    SUM(CASE WHEN result = 'Defeat' THEN 1 ELSE 0 END) AS losses
-                FROM battle_data
-                GROUP BY brawler, map
-            )
-            SELECT
-                brawler,
-                map,
-                wins,
-                losses,
-                (wins + losses) AS total_matches,
-                (wins::FLOAT / NULLIF(wins + losses, 0)) * 100 AS win_rate,
-                (wins + losses)::FLOAT / (SELECT COUNT(*) * 6 FROM battles_s35_3 WHERE avg_rank > 15) * 100 AS usage_rate
-            FROM brawler_stats
-            ORDER BY map, win_rate DESC;
-        """
-        conn = psycopg2.connect(
-            dbname="bs-project",
-            user="postgres",
-            password=self.appConfig.POSTGRE_SQL_PASSWORD,
-            host="localhost",
-            port="5432",
-        )
-        if conn is None:
-            raise ConnectionError("Could not connect to database.")
-        df = pd.read_sql_query(query, conn)
-        print("DataFrame Retrieved : ", df.count)
-        conn.close()
-        return df
-
-    def save_stats_battle(self, path):
-        print("Get stats from SQL DB...")
-        df = self.fetch_stats_battle_data()
-        print("Saving stats to file...")
-        df.to_pickle(path)
-
-    def fetch_battle_data(self):
-        conn = psycopg2.connect(
-            dbname="bs-project",
-            user="postgres",
-            password=self.appConfig.POSTGRE_SQL_PASSWORD,
-            host="localhost",
-            port="5432",
-        )
-        if conn is None:
-            raise ConnectionError("Could not connect to database.")
-        df = pd.read_sql_query(f"SELECT * FROM battles_s{self.version}", conn)
-        print("DataFrame Retrieved : ", df.count)
-        conn.close()
-        return df
+        print("Loading mappings from file...")
+        self.load_mappings(self.data_path)
 
     def idx_to_brawler(self, idx):
-        return {i: b for b, i in self.brawler_to_idx.items()}.get(idx, "Unknown")
+        return self.vocabulary.brawler_name(idx)
 
-    def build_mappings(self, df):
-        print("Building mappings...")
-        brawler_set = set()
-        for team in df["wteam"].str.split("-").dropna():
-            brawler_set.update(team)
-        for team in df["lteam"].str.split("-").dropna():
-            brawler_set.update(team)
+    def build_vocabulary(self):
+        """Build the immutable vocabulary used by every prediction path."""
+        brawler_images = {}
+        if self.appConfig is not None and self.appConfig.brawler_catalog is not None:
+            brawler_images = self.appConfig.brawler_catalog.image_urls
 
-        brawler_to_idx = {b: i for i, b in enumerate(sorted(brawler_set))}
-        map_to_idx = {m: i for i, m in enumerate(sorted(df["map"].dropna().unique()))}
-        return brawler_to_idx, map_to_idx
+        self.vocabulary = BrawlerVocabulary(
+            self.brawler_to_idx, self.map_to_idx, brawler_images=brawler_images
+        )
+        return self.vocabulary
 
     def load_mappings(self, path):
         # Check if the file exists before attempting to load
@@ -194,22 +126,23 @@ class NeuralNetworkService:
         # Assuming the loaded dictionary has the same structure
         self.brawler_to_idx = dataMappings.get("brawler_to_idx")
         self.map_to_idx = dataMappings.get("map_to_idx")
+        self.build_vocabulary()
 
-    def save_mappings(self, path):
-        dataMappings = {
-            "brawler_to_idx": self.brawler_to_idx,
-            "map_to_idx": self.map_to_idx,
-        }
-        # Ensure the directory exists
-        directory = os.path.dirname(path)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    def load_model(self, num_friends=3, num_enemies=3):
+        if self.model_format == "torchscript":
+            if os.path.exists(self.scripted_model_path):
+                self.load_scripted_model()
+                return
+            print(f"Scripted model not found at '{self.scripted_model_path}'")
+        if self.model_format == "numpy":
+            if os.path.exists(self.numpy_model_path):
+                self.load_numpy_model()
+                return
+            print(f"NumPy model not found at '{self.numpy_model_path}'")
 
-        print("Saving mappings to file at path :", path)
-        with open(path, "wb") as f:
-            pickle.dump(dataMappings, f)
+        import torch
+        from src.utils.modelUtils import BrawlerPredictionModel
 
-    def load_model(self, num_friends=3, num_enemies=3):
         print("Loading model...")
         num_brawlers = len(self.brawler_to_idx)
         num_maps = len(self.map_to_idx)
@@ -232,20 +165,110 @@ class NeuralNetworkService:
             print(f"Model not found at path '{self.model_path}'")
             raise FileNotFoundError(f"Model not found at path '{self.model_path}'")
         self.model.to(self.device)
+        if self.model_format == "int8":
+            self.quantize_model()
+        self.prediction_cache.clear()
+
+    def quantize_model(self):
+        """
+        Replace the model by a dynamically quantized int8 copy for CPU serving.
+
+        Linear layers get per-channel int8 weights with activations quantized on
+        the fly, and the embedding tables are stored as 8-bit rows with their own
+        scale. src/scripts/checkQuantizedModel.py measures the accuracy impact.
+        """
+        import torch
+        import torch.nn as nn
+        from torch.ao.quantization import (
+            float_qparams_weight_only_qconfig,
+            per_channel_dynamic_qconfig,
+            quantize_dynamic,
+        )
+
+        print("Quantizing model to int8...")
+        # Quantized kernels only run on the CPU
+        self.device = "cpu"
+        self.model = quantize_dynamic(
+            self.model.to(self.device).eval(),
+            {
+                nn.Linear: per_channel_dynamic_qconfig,
+                nn.Embedding: float_qparams_weight_only_qconfig,
+            },
+            dtype=torch.qint8,
+        )
+
+    def load_scripted_model(self):
+        """Load the frozen TorchScript export, no model class is needed."""
+        import torch
+
+        print(f"Loading scripted model at path '{self.scripted_model_path}'")
+        self.model = torch.jit.load(self.scripted_model_path, map_location=self.device)
+        self.prediction_cache.clear()
+
+    def load_numpy_model(self):
+        """Load the NumPy export, predictions then run without torch."""
+        print(f"Loading NumPy model at path '{self.numpy_model_path}'")
+        self.model = NumpyBrawlerPredictionModel.load(self.numpy_model_path)
+        self.prediction_cache.clear()
+
+    def load_artifact(self, load_model=True):
+        """
+        Load the vocabulary, model, counter matrix and opening picks from the
+        memory-mapped artifact written by NeuralNetworkTrainingService.export_artifact.
+
+        The arrays stay read-only views of the mapped file, so workers of the
+        same host share their pages instead of holding private copies.
+        """
+        print(f"Loading model artifact at path '{self.artifact_path}'")
+        metadata, arrays = read_artifact(self.artifact_path)
+
+        self.brawler_to_idx = {b: i for i, b in enumerate(metadata["brawlers"])}
+        self.map_to_idx = {m: i for i, m in enumerate(metadata["maps"])}
+        self.build_vocabulary()
+
+        if load_model:
+            weights = {
+                name[len("model.") :]: array
+                for name, array in arrays.items()
+                if name.startswith("model.")
+            }
+            self.model = NumpyBrawlerPredictionModel(weights, **metadata["model"])
+            self.counter_matrix = arrays.get("counter_matrix")
+            if "opening_picks.indices" in arrays:
+                self.opening_picks = {
+                    "map_to_pos": {
+                        m: pos for pos, m in enumerate(metadata["opening_picks_maps"])
+                    },
+                    "indices": arrays["opening_picks.indices"],
+                    "scores": arrays["opening_picks.scores"],
+                }
+            else:
+                self.load_opening_picks()
+        self.prediction_cache.clear()
+        print("Model artifact loaded successfully.")
 
     def load_counter_matrix(self):
         print("Loading counter matrix...")
 
-        if os.path.exists(self.counter_matrix_path):
+        if os.path.exists(self.counter_matrix_array_path):
+            print(
+                f"Found existing counter matrix at '{self.counter_matrix_array_path}'"
+            )
+            self.counter_matrix = np.load(self.counter_matrix_array_path)
+            self.prediction_cache.clear()
+            print("Counter matrix loaded successfully.")
+
+        elif os.path.exists(self.counter_matrix_path):
             print(f"Found existing counter matrix at '{self.counter_matrix_path}'")
 
             try:
                 with open(self.counter_matrix_path, "rb") as f:
                     self.counter_matrix = pickle.load(f)  # Load using pickle
 
-                # Ensure the matrix is moved to the correct device
-                self.counter_matrix = self.counter_matrix.clone().detach().to(self.device)
+                # Predictions post-process on the CPU with numpy
+                self.counter_matrix = self.counter_matrix.detach().cpu().numpy()
 
+                self.prediction_cache.clear()
                 print("Counter matrix loaded successfully.")
 
             except (pickle.UnpicklingError, EOFError) as e:
@@ -255,328 +278,103 @@ class NeuralNetworkService:
         else:
             print(f"Counter matrix not found at '{self.counter_matrix_path}'")
 
-    def initialize_model(self, num_brawlers, num_maps, emb_dim=16, hidden_dim=64):
-        """Initialize the BrawlerPredictionModel with the correct parameters"""
-        print(f"Initializing model with {num_brawlers} brawlers and {num_maps} maps...")
-        self.model = BrawlerPredictionModel(
-            num_brawlers=num_brawlers,
-            num_maps=num_maps,
-            emb_dim=emb_dim,
-            hidden_dim=hidden_dim,
-        ).to(self.device)
-        print("Model initialized successfully")
-        return self.model
-
-    def train_model(
-        self,
-        num_epochs=10,
-        batch_size=64,
-        num_friends=3,
-        num_enemies=3,
-        val_split=0.1,
-        patience=5,
-    ):
+    def encode_team(self, brawlers, team_size):
         """
-        Train the model.
+        Convert brawler names to model indices, padded to the model's team size.
 
         Args:
-            num_epochs (int): Number of training epochs
-            batch_size (int): Batch size
-            num_friends (int): Number of friend brawlers
-            num_enemies (int): Number of enemy brawlers
-            val_split (float): Validation split ratio
-            patience (int): Early stopping patience
-        """
-        # Ensure we have mappings
-        if self.brawler_to_idx is None or self.map_to_idx is None:
-            raise ValueError(
-                "Mappings not initialized. Please load or build mappings before training."
-            )
-
-        # Ensure model is initialized
-        if self.model is None:
-            print("Model is not initialized. Initializing model...")
-            self.initialize_model(
-                num_brawlers=len(self.brawler_to_idx), num_maps=len(self.map_to_idx)
-            )
-
-        print("Preparing for training...")
-
-        # Create validation split
-        dataset_size = len(self.dataset)
-        val_size = int(val_split * dataset_size)
-        train_size = dataset_size - val_size
-        train_dataset, val_dataset = torch.utils.data.random_split(
-            self.dataset, [train_size, val_size]
-        )
-
-        # Create dataloaders
-        train_dataloader = DataLoader(
-            train_dataset, batch_size=batch_size, shuffle=True
-        )
-        val_dataloader = DataLoader(val_dataset, batch_size=batch_size)
-
-        # Optimizer and scheduler
-        optimizer = torch.optim.Adam(
-            self.model.parameters(), lr=1e-3, weight_decay=1e-5
-        )
-        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
-            optimizer, mode="min", factor=0.5, patience=2
-        )
-        criterion = nn.CrossEntropyLoss()
-
-        # For mixed precision training
-        scaler = torch.amp.GradScaler("cuda")
-
-        # For early stopping
-        best_val_loss = float("inf")
-        patience_counter = 0
+            brawlers (list): List of brawler names
+            team_size (int): Number of slots expected by the model
 
-        # For tracking metrics
-        train_losses = []
-        val_losses = []
+        Returns:
+            list: List of brawler indices of length team_size
+        """
+        pad_idx = self.model.pad_idx
+        indices = [self.vocabulary.brawler_index(b, pad_idx) for b in brawlers]
+        indices += [pad_idx] * (team_size - len(indices))
+        return indices
 
-        print(f"Starting training for {num_epochs} epochs...")
+    def encode_drafts(self, drafts):
+        """
+        Convert a list of draft states to batched model inputs.
 
-        for epoch in range(num_epochs):
-            # Training phase
-            self.model.train()
-            total_train_loss = 0.0
+        Args:
+            drafts (list): List of dicts with keys friends, enemies and map_name
 
-            train_progress = tqdm(
-                train_dataloader, desc=f"Epoch {epoch+1}/{num_epochs}"
-            )
-            for batch in train_progress:
-                # Stack friends and enemies into tensors
-                friends = torch.stack(
-                    [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
-                ).to(self.device)
-                enemies = torch.stack(
-                    [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
-                ).to(self.device)
-                map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
-                target = batch["target"].to(self.device)
-
-                # Zero gradients
-                optimizer.zero_grad()
-
-                # Mixed precision forward pass
-                with torch.amp.autocast("cuda"):
-                    logits = self.model(friends, enemies, map_idx)
-                    loss = criterion(logits, target)
-
-                # Backward pass with scaling
-                scaler.scale(loss).backward()
-                scaler.step(optimizer)
-                scaler.update()
-
-                # Track loss
-                total_train_loss += loss.item()
-                train_progress.set_postfix(loss=loss.item())
-
-            avg_train_loss = total_train_loss / len(train_dataloader)
-            train_losses.append(avg_train_loss)
-
-            # Validation phase
-            self.model.eval()
-            total_val_loss = 0.0
-
-            with torch.no_grad():
-                val_progress = tqdm(val_dataloader, desc="Validation")
-                for batch in val_progress:
-                    # Stack friends and enemies into tensors
-                    friends = torch.stack(
-                        [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
-                    ).to(self.device)
-                    enemies = torch.stack(
-                        [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
-                    ).to(self.device)
-                    map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
-                    target = batch["target"].to(self.device)
-
-                    # Forward pass
-                    logits = self.model(friends, enemies, map_idx)
-                    loss = criterion(logits, target)
-
-                    # Track loss
-                    total_val_loss += loss.item()
-                    val_progress.set_postfix(loss=loss.item())
-
-            avg_val_loss = total_val_loss / len(val_dataloader)
-            val_losses.append(avg_val_loss)
-
-            # Update learning rate scheduler
-            scheduler.step(avg_val_loss)
+        Returns:
+            tuple: (friends, enemies, map_idx) int64 arrays of shape (N, num_friends),
+            (N, num_enemies) and (N, 1)
+        """
+        friend_indices = [
+            self.encode_team(draft["friends"], self.model.num_friends)
+            for draft in drafts
+        ]
+        enemy_indices = [
+            self.encode_team(draft["enemies"], self.model.num_enemies)
+            for draft in drafts
+        ]
+        map_indices = [
+            [self.vocabulary.map_index(draft["map_name"])] for draft in drafts
+        ]
+
+        friends = np.array(friend_indices, dtype=np.int64)
+        enemies = np.array(enemy_indices, dtype=np.int64)
+        map_idx = np.array(map_indices, dtype=np.int64)
+        return friends, enemies, map_idx
+
+    def forward_logits(self, friends, enemies, map_idx):
+        """
+        Run the loaded model on encoded drafts, whatever its backend.
 
-            print(
-                f"Epoch {epoch+1} completed - Train Loss: {avg_train_loss:.4f}, Val Loss: {avg_val_loss:.4f}"
-            )
+        Returns:
+            np.ndarray: float32 logits of shape (N, num_brawlers)
+        """
+        if isinstance(self.model, NumpyBrawlerPredictionModel):
+            return self.model(friends, enemies, map_idx)
 
-            # Early stopping check
-            if avg_val_loss < best_val_loss:
-                best_val_loss = avg_val_loss
-                patience_counter = 0
-                torch.save(self.model.state_dict(), self.model_path)
-                print(f"New best model saved with validation loss: {best_val_loss:.4f}")
-            else:
-                patience_counter += 1
-                if patience_counter >= patience:
-                    print(f"Early stopping triggered after {epoch+1} epochs")
-                    break
-
-        print(f"Training complete. Final best validation loss: {best_val_loss:.4f}")
-
-        if self.appConfig.MODE == "IMPORT":
-            # Plot training curves
-            plt.figure(figsize=(10, 5))
-            plt.plot(train_losses, label="Training Loss")
-            plt.plot(val_losses, label="Validation Loss")
-            plt.title("Training and Validation Loss")
-            plt.xlabel("Epoch")
-            plt.ylabel("Loss")
-            plt.legend()
-            plt.savefig(self.plot_path)
-            plt.close()
-
-    def train_model2(
-        self,
-        num_epochs=10,
-        batch_size=64,
-        num_friends=3,
-        num_enemies=3,
-        val_split=0.1,
-        patience=5,
-    ):
-        # Ensure we have mappings
-        if self.brawler_to_idx is None or self.map_to_idx is None:
-            raise ValueError(
-                "Mappings not initialized. Please load or build mappings before training."
-            )
+        import torch
 
-        # Ensure model is initialized
-        if self.model is None:
-            print("Model is not initialized. Initializing model...")
-            self.initialize_model(
-                num_brawlers=len(self.brawler_to_idx), num_maps=len(self.map_to_idx)
+        with torch.no_grad():
+            logits = self.model(
+                torch.from_numpy(friends).to(self.device),
+                torch.from_numpy(enemies).to(self.device),
+                torch.from_numpy(map_idx).to(self.device),
             )
+        return logits.float().cpu().numpy()
 
-        print("Preparing for training...")
-
-        # Create validation split
-        dataset_size = len(self.dataset)
-        val_size = int(val_split * dataset_size)
-        train_size = dataset_size - val_size
-        train_dataset, val_dataset = torch.utils.data.random_split(
-            self.dataset, [train_size, val_size]
-        )
-
-        # Create dataloaders
-        train_dataloader = DataLoader(
-            train_dataset, batch_size=batch_size, shuffle=True
-        )
-        val_dataloader = DataLoader(val_dataset, batch_size=batch_size)
+    def draft_key(self, kind, draft, *extra):
+        """
+        Prediction cache key of a draft state.
 
-        # Optimizer and scheduler
-        optimizer = torch.optim.Adam(self.model.parameters(), lr=1e-3)
-        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
-            optimizer, mode="min", factor=0.5, patience=2
+        The model embeds every pick slot separately, so the picks keep their
+        order: the same brawlers picked in another order are another model input.
+        Only the excluded and available brawlers, used as sets, are deduplicated.
+        """
+        return (
+            kind,
+            tuple(draft["friends"]),
+            tuple(draft["enemies"]),
+            draft["map_name"],
+            tuple(sorted(set(draft.get("excluded") or []))),
+            tuple(sorted(set(draft.get("available_brawlers") or []))),
+            *extra,
         )
-        criterion = nn.CrossEntropyLoss()
-
-        # For mixed precision training
-        scaler = torch.cuda.amp.GradScaler()
-
-        # For early stopping
-        best_val_loss = float("inf")
-        patience_counter = 0
-
-        print(f"Starting training for {num_epochs} epochs...")
-
-        for epoch in range(num_epochs):
-            # Training phase
-            self.model.train()
-            total_train_loss = 0.0
 
-            train_progress = tqdm(
-                train_dataloader, desc=f"Epoch {epoch+1}/{num_epochs}"
-            )
-            for batch in train_progress:
-                # Stack friends and enemies into tensors
-                friends = torch.stack(
-                    [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
-                ).to(self.device)
-                enemies = torch.stack(
-                    [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
-                ).to(self.device)
-                map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
-                target = batch["target"].to(self.device)
-
-                # Zero gradients
-                optimizer.zero_grad()
-
-                # Mixed precision forward pass
-                with torch.amp.autocast("cuda"):
-                    logits = self.model(friends, enemies, map_idx)
-                    loss = criterion(logits, target)
-
-                # Backward pass with scaling
-                scaler.scale(loss).backward()
-                scaler.step(optimizer)
-                scaler.update()
-
-                # Track loss
-                total_train_loss += loss.item()
-                train_progress.set_postfix(loss=loss.item())
-
-            avg_train_loss = total_train_loss / len(train_dataloader)
-
-            # Validation phase
-            self.model.eval()
-            total_val_loss = 0.0
-
-            with torch.no_grad():
-                val_progress = tqdm(val_dataloader, desc="Validation")
-                for batch in val_progress:
-                    # Stack friends and enemies into tensors
-                    friends = torch.stack(
-                        [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
-                    ).to(self.device)
-                    enemies = torch.stack(
-                        [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
-                    ).to(self.device)
-                    map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
-                    target = batch["target"].to(self.device)
-
-                    # Forward pass
-                    logits = self.model(friends, enemies, map_idx)
-                    loss = criterion(logits, target)
-
-                    # Track loss
-                    total_val_loss += loss.item()
-                    val_progress.set_postfix(loss=loss.item())
-
-            avg_val_loss = total_val_loss / len(val_dataloader)
-
-            # Update learning rate scheduler
-            scheduler.step(avg_val_loss)
-
-            print(
-                f"Epoch {epoch+1} completed - Train Loss: {avg_train_loss:.4f}, Val Loss: {avg_val_loss:.4f}"
-            )
-
-            # Early stopping check
-            if avg_val_loss < best_val_loss:
-                best_val_loss = avg_val_loss
-                patience_counter = 0
-                torch.save(self.model.state_dict(), self.model_path)
-                print(f"New best model saved with validation loss: {best_val_loss:.4f}")
-            else:
-                patience_counter += 1
-                if patience_counter >= patience:
-                    print(f"Early stopping triggered after {epoch+1} epochs")
-                    break
+    def cached_batch(self, keys, items, infer_batch):
+        """
+        Resolve a batch through the prediction cache.
 
-        print(f"Training complete. Final best validation loss: {best_val_loss:.4f}")
+        Only the items whose key is not cached are passed to infer_batch, in a
+        single call, and their results are stored in the cache.
+        """
+        results = [self.prediction_cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            inferred = infer_batch([items[i] for i in missing])
+            for i, result in zip(missing, inferred):
+                self.prediction_cache.put(keys[i], result)
+                results[i] = result
+        return results
 
     def predict_winrate(self, friends, enemies, map_name):
         """
@@ -590,64 +388,60 @@ class NeuralNetworkService:
         Returns:
             float: Estimated win rate percentage (0-100).
         """
+        matchup = {"friends": friends, "enemies": enemies, "map_name": map_name}
+        return self.predict_winrate_batch([matchup])[0]
+
+    def predict_winrate_batch(self, matchups):
+        """
+        Predict the win rate of many matchups in a single batch.
+        Matchups already in the prediction cache are not sent to the model.
+
+        Args:
+            matchups (list): List of dicts with keys friends, enemies and map_name
+
+        Returns:
+            list: Estimated win rate percentage (0-100) for each matchup
+        """
+        keys = [self.draft_key("winrate", matchup) for matchup in matchups]
+        return self.cached_batch(keys, matchups, self.infer_winrate_batch)
+
+    def infer_winrate_batch(self, matchups):
+        """Run the model on a batch of matchups, bypassing the prediction cache."""
+        if not matchups:
+            return []
+
         self.model.eval()
-        pad_idx = self.model.pad_idx
+        friends, enemies, map_idx = self.encode_drafts(matchups)
+        num_matchups = len(matchups)
 
-        # Convert brawler names to indices
-        friend_indices = [self.brawler_to_idx.get(b, pad_idx) for b in friends]
-        enemy_indices = [self.brawler_to_idx.get(b, pad_idx) for b in enemies]
+        # Stack both orientations (friends vs enemies, then mirrored) in one batch
+        team_a = np.concatenate([friends, enemies])
+        team_b = np.concatenate([enemies, friends])
+        maps = np.concatenate([map_idx, map_idx])
 
-        # Ensure proper padding
-        friend_indices += [pad_idx] * (self.model.num_friends - len(friend_indices))
-        enemy_indices += [pad_idx] * (self.model.num_enemies - len(enemy_indices))
+        # Make predictions
+        logits = self.forward_logits(team_a, team_b, maps)  # Shape: (2N, num_brawlers)
 
-        # Convert inputs to tensors and move to device
-        map_idx = torch.tensor(
-            [[self.map_to_idx.get(map_name, 0)]], dtype=torch.long, device=self.device
-        )
-        friends_tensor = torch.tensor(
-            [friend_indices], dtype=torch.long, device=self.device
-        )
-        enemies_tensor = torch.tensor(
-            [enemy_indices], dtype=torch.long, device=self.device
+        # Normalize logits using softmax
+        all_probabilities = softmax(logits)
+        probabilities = all_probabilities[:num_matchups]
+        mirror_probabilities = all_probabilities[num_matchups:]
+
+        # Extract friend and enemy scores, averaging instead of summing
+        friend_scores = np.take_along_axis(probabilities, friends, axis=1).mean(axis=1)
+        enemy_scores = np.take_along_axis(mirror_probabilities, enemies, axis=1).mean(
+            axis=1
         )
 
-        # Make predictions
-        with torch.no_grad():
-            logits = self.model(
-                friends_tensor, enemies_tensor, map_idx
-            )  # Shape: (1, num_brawlers)
-            mirror_logits = self.model(enemies_tensor, friends_tensor, map_idx)
-
-            # Normalize logits using softmax
-            probabilities = torch.softmax(logits, dim=1)
-            mirror_probabilities = torch.softmax(mirror_logits, dim=1)
-
-            # Extract friend and enemy scores
-            friend_scores = (
-                probabilities[0, friend_indices].mean().item()
-            )  # Averaging instead of summing
-            enemy_scores = mirror_probabilities[0, enemy_indices].mean().item()
-
-            # Compute relative strength
-            relative_strength = friend_scores - enemy_scores
-
-            # Apply a calibrated sigmoid function
-            scale = 5  # Tune this parameter based on validation data
-            win_rate = (
-                100
-                * (
-                    1
-                    / (
-                        1
-                        + torch.exp(
-                            torch.tensor(-relative_strength * scale, device=self.device)
-                        )
-                    )
-                ).item()
-            )
+        # Compute relative strength
+        relative_strength = friend_scores.astype(np.float64) - enemy_scores
+
+        # Apply a calibrated sigmoid function
+        scale = 5  # Tune this parameter based on validation data
+        exponent = (-relative_strength * scale).astype(np.float32)
+        win_rates = 1 / (1 + np.exp(exponent))
 
-        return round(win_rate, 2)
+        return [round(100 * win_rate, 2) for win_rate in win_rates.tolist()]
 
     def predict_best_brawler(
         self,
@@ -672,321 +466,105 @@ class NeuralNetworkService:
         Returns:
             list: List of tuples (brawler_name, win_rate) sorted by win rate
         """
-        self.model.eval()
-        pad_idx = self.model.pad_idx
-
-        # Convert brawler names to indices
-        friend_indices = [self.brawler_to_idx.get(b, pad_idx) for b in friends]
-        enemy_indices = [self.brawler_to_idx.get(b, pad_idx) for b in enemies]
-
-        # Pad friends and enemies to match the model's expected input size
-        while len(friend_indices) < self.model.num_friends:
-            friend_indices.append(pad_idx)
-        while len(enemy_indices) < self.model.num_enemies:
-            enemy_indices.append(pad_idx)
-
-        # Convert to tensors and move to the correct device
-        map_idx = torch.tensor(
-            [[self.map_to_idx.get(map_name, 0)]], dtype=torch.long
-        ).to(self.device)
-        friends_tensor = torch.tensor([friend_indices], dtype=torch.long).to(
-            self.device
-        )
-        enemies_tensor = torch.tensor([enemy_indices], dtype=torch.long).to(self.device)
-
-        # Combine already picked and explicitly excluded brawlers
-        all_excluded = excluded.copy()
-        all_excluded.extend(friends)
-        all_excluded.extend(enemies)
-
-        # Make predictions
-        with torch.no_grad():
-            # Get raw logits from the model
-            logits = self.model(friends_tensor, enemies_tensor, map_idx)
-
-            # Create a baseline score from the model output
-            base_scores = F.softmax(logits, dim=1)
-
-            # Create a counter boost matrix - this will directly boost counter picks
-            counter_boost = torch.zeros_like(base_scores)
+        draft = {
+            "friends": friends,
+            "enemies": enemies,
+            "map_name": map_name,
+            "excluded": excluded,
+            "available_brawlers": available_brawlers,
+        }
+        return self.predict_best_brawler_batch([draft], nbBrawlers=nbBrawlers)[0]
 
-            # For each enemy, find brawlers that counter them and boost their scores
-            counter_strength = (
-                2.0  # How strongly to boost counter picks (adjust as needed)
-            )
+    def predict_best_brawler_batch(self, drafts, nbBrawlers=10):
+        """
+        Predict the best brawler choices for many draft states in a single batch.
 
-            for enemy in enemies:
-                if enemy in self.brawler_to_idx:
-                    enemy_idx = self.brawler_to_idx[enemy]
+        Args:
+            drafts (list): List of dicts with keys friends, enemies, map_name and
+                optionally excluded and available_brawlers (same meaning as in
+                predict_best_brawler)
+            nbBrawlers (int): Number of top brawlers to return per draft
 
-                    # Apply counter relationships - using a counter matrix or function
-                    # This is where we explicitly boost counter picks
-                    for brawler_idx in range(len(self.brawler_to_idx)):
-                        # Get counter relationship (how well brawler_idx counters this enemy)
-                        counter_value = self.get_counter_strength(
-                            brawler_idx, enemy_idx
-                        )
+        Returns:
+            list: For each draft, a list of tuples (brawler_name, win_rate) sorted by win rate
+        """
+        keys = [self.draft_key("draft", draft, nbBrawlers) for draft in drafts]
+        results = self.cached_batch(
+            keys,
+            drafts,
+            lambda missing: self.infer_best_brawler_batch(missing, nbBrawlers),
+        )
+        # Copy so callers can't mutate the cached lists
+        return [list(result) for result in results]
 
-                        # Boost the score for strong counters
-                        if counter_value > 0.5:  # This is a strong counter
-                            counter_boost[0, brawler_idx] += (
-                                counter_value * counter_strength
-                            )
+    def infer_best_brawler_batch(self, drafts, nbBrawlers=10):
+        """Run the model on a batch of draft states, bypassing the prediction cache."""
+        if not drafts:
+            return []
 
-            # Combine base scores with counter boosts
-            combined_scores = base_scores + counter_boost
+        self.model.eval()
+        friends, enemies, map_idx = self.encode_drafts(drafts)
 
-            # Filter excluded and unavailable brawlers
-            win_rate_scores = torch.zeros_like(combined_scores)
+        # Brawlers allowed in each row: available ones (or all) minus excluded and picked
+        allowed = np.zeros((len(drafts), len(self.vocabulary)), dtype=bool)
+        for row, draft in enumerate(drafts):
+            all_excluded = set(draft.get("excluded") or [])
+            all_excluded.update(draft["friends"])
+            all_excluded.update(draft["enemies"])
 
+            available_brawlers = draft.get("available_brawlers") or []
             if available_brawlers:
-                # Only set scores for brawlers in available_brawlers and not in excluded
-                for brawler_name in available_brawlers:
-                    if (
-                        brawler_name in self.brawler_to_idx
-                        and brawler_name not in all_excluded
-                    ):
-                        idx = self.brawler_to_idx[brawler_name]
-                        win_rate_scores[0, idx] = combined_scores[0, idx]
+                available = [b for b in available_brawlers if b not in all_excluded]
+                allowed[row, self.vocabulary.brawler_indices(available)] = True
             else:
-                # If no available_brawlers provided, use all except excluded
-                win_rate_scores = combined_scores.clone()
-                for b in all_excluded:
-                    if b in self.brawler_to_idx:
-                        win_rate_scores[0, self.brawler_to_idx[b]] = 0.0
-
-            # Normalize to sum to 1 (optional)
-            total = win_rate_scores.sum()
-            if total > 0:
-                win_rate_scores = win_rate_scores / total
-
-            # Get the number of brawlers with non-zero scores
-            non_zero_count = (win_rate_scores > 0).sum().item()
-            k = min(nbBrawlers, non_zero_count)
+                allowed[row] = True
+                allowed[row, self.vocabulary.brawler_indices(all_excluded)] = False
 
-            if k > 0:
-                # Get top-k brawlers
-                topk = torch.topk(win_rate_scores, k=k, dim=1)
-
-                # Convert to win rate percentages (0-100%)
-                win_rates = [
-                    (self.idx_to_brawler(idx), float(prob * 100))
-                    for idx, prob in zip(
-                        topk.indices.squeeze(0).tolist(),
-                        topk.values.squeeze(0).tolist(),
-                    )
-                    if prob > 0
-                ]  # Only include brawlers with non-zero probability
-            else:
-                win_rates = []
+        # Get raw logits from the model
+        logits = self.forward_logits(friends, enemies, map_idx)
 
-            return win_rates
+        # Create a baseline score from the model output
+        base_scores = softmax(logits)
 
-    def save_counter_matrix(self):
-        """
-        Build a counter relationship matrix for brawlers with multi-threading and progress tracking.
-        """
-        print("Start saving counter matrix...")
-        num_brawlers = len(self.brawler_to_idx)
-        print(f"Number of brawlers: {num_brawlers}")
+        # Create a counter boost matrix - this will directly boost counter picks
+        counter_boost = np.stack(
+            [self.get_counter_boost(draft["enemies"]) for draft in drafts]
+        )
 
-        counter_matrix = torch.zeros((num_brawlers, num_brawlers), device=self.device)
+        # Combine base scores with counter boosts
+        combined_scores = base_scores + counter_boost
 
-        if not hasattr(self, "dataset") or self.dataset is None:
-            print("No dataset found. Exiting function.")
-            return
+        # Filter excluded and unavailable brawlers
+        win_rate_scores = np.where(allowed, combined_scores, 0).astype(np.float32)
 
-        print("Dataset found, processing matchups in parallel...")
+        # Normalize each row to sum to 1 (optional)
+        total = win_rate_scores.sum(axis=1, keepdims=True)
+        np.divide(win_rate_scores, total, out=win_rate_scores, where=total > 0)
 
-        matchup_counts = {}
-        matchup_wins = {}
+        # Get the number of brawlers with non-zero scores per row
+        non_zero_counts = (win_rate_scores > 0).sum(axis=1).tolist()
+        k_max = min(nbBrawlers, max(non_zero_counts))
 
-        def process_data_point(data_point):
-            """Process a single data point and return the results"""
-            try:
-                friends = [
-                    data_point[f"friend{i+1}"] for i in range(self.model.num_friends)
-                ]
-                enemies = [
-                    data_point[f"enemy{i+1}"] for i in range(self.model.num_enemies)
-                ]
-
-                # Determine winner
-                if "target" in data_point:
-                    target_brawler = data_point["target"]
-                    winner = 1 if target_brawler in friends else 0
-                elif "win" in data_point:
-                    winner = 1 if data_point["win"] else 0
-                elif "victory" in data_point:
-                    winner = 1 if data_point["victory"] else 0
-                else:
-                    return None  # Skip if we can't determine the winner
-
-                local_matchup_counts = {}
-                local_matchup_wins = {}
-
-                for friend in friends:
-                    for enemy in enemies:
-                        key = (friend, enemy)
-                        local_matchup_counts[key] = local_matchup_counts.get(key, 0) + 1
-                        if winner == 1:
-                            local_matchup_wins[key] = local_matchup_wins.get(key, 0) + 1
-
-                return local_matchup_counts, local_matchup_wins
-
-            except KeyError as e:
-                return f"Skipping data point due to missing key: {e}"
-
-        # Process dataset in parallel with tqdm progress tracking
-        with ThreadPoolExecutor() as executor:
-            future_to_data = {
-                executor.submit(process_data_point, data): data for data in self.dataset
-            }
+        if k_max == 0:
+            return [[] for _ in drafts]
 
-            with tqdm(
-                total=len(self.dataset), desc="Processing Matchups", unit=" match"
-            ) as pbar:
-                for future in as_completed(future_to_data):
-                    result = future.result()
-                    pbar.update(1)  # Update progress bar
-
-                    if isinstance(result, str):  # If error message was returned
-                        print(result)
-                    elif result is not None:
-                        local_counts, local_wins = result
-                        for key, value in local_counts.items():
-                            matchup_counts[key] = matchup_counts.get(key, 0) + value
-                        for key, value in local_wins.items():
-                            matchup_wins[key] = matchup_wins.get(key, 0) + value
-
-        print("Finished processing dataset. Calculating counter strengths...")
-
-        with tqdm(
-            total=len(matchup_counts),
-            desc="Calculating Counter Strengths",
-            unit=" pair",
-        ) as pbar:
-            for (friend, enemy), count in matchup_counts.items():
-                if count >= 10:  # Only consider matchups with enough data
-                    win_rate = matchup_wins.get((friend, enemy), 0) / count
-                    counter_strength = (
-                        win_rate - 0.5
-                    ) * 2  # Rescale from [0.5, 1.0] to [0, 1.0]
-                    counter_strength = max(0, counter_strength)  # Ensure non-negative
-                    counter_matrix[friend, enemy] = counter_strength
-                    pbar.update(1)  # Update progress bar
-
-        counter_matrix = counter_matrix * 0.8 + 0.1
-
-        try:
-            counter_matrix_cpu = counter_matrix.cpu()
-            with open(self.counter_matrix_path, "wb") as f:
-                pickle.dump(counter_matrix_cpu, f)
-            print(f"Counter matrix saved successfully at {self.counter_matrix_path}")
-        except Exception as e:
-            print(f"Error saving counter matrix: {e}")
-            """
-            Build a counter relationship matrix for brawlers with multi-threading.
-            """
-            print("Start saving counter matrix...")
-            num_brawlers = len(self.brawler_to_idx)
-            print(f"Number of brawlers: {num_brawlers}")
-
-            counter_matrix = torch.zeros(
-                (num_brawlers, num_brawlers), device=self.device
-            )
+        # Get top-k brawlers of every row at once
+        topk_indices, topk_values = topk(win_rate_scores, k_max)
+        topk_indices = topk_indices.tolist()
+        topk_values = topk_values.tolist()
 
-            if not hasattr(self, "dataset") or self.dataset is None:
-                print("No dataset found. Exiting function.")
-                return
+        results = []
+        for row, non_zero_count in enumerate(non_zero_counts):
+            k = min(nbBrawlers, non_zero_count)
+            # Convert to win rate percentages (0-100%)
+            win_rates = [
+                (self.idx_to_brawler(idx), float(prob * 100))
+                for idx, prob in zip(topk_indices[row][:k], topk_values[row][:k])
+                if prob > 0
+            ]  # Only include brawlers with non-zero probability
+            results.append(win_rates)
 
-            print("Dataset found, processing matchups in parallel...")
-
-            matchup_counts = {}
-            matchup_wins = {}
-
-            def process_data_point(data_point):
-                """Process a single data point and return the results"""
-                try:
-                    friends = [
-                        data_point[f"friend{i+1}"]
-                        for i in range(self.model.num_friends)
-                    ]
-                    enemies = [
-                        data_point[f"enemy{i+1}"] for i in range(self.model.num_enemies)
-                    ]
-
-                    # Determine winner
-                    if "target" in data_point:
-                        target_brawler = data_point["target"]
-                        winner = 1 if target_brawler in friends else 0
-                    elif "win" in data_point:
-                        winner = 1 if data_point["win"] else 0
-                    elif "victory" in data_point:
-                        winner = 1 if data_point["victory"] else 0
-                    else:
-                        return None  # Skip if we can't determine the winner
-
-                    local_matchup_counts = {}
-                    local_matchup_wins = {}
-
-                    for friend in friends:
-                        for enemy in enemies:
-                            key = (friend, enemy)
-                            local_matchup_counts[key] = (
-                                local_matchup_counts.get(key, 0) + 1
-                            )
-                            if winner == 1:
-                                local_matchup_wins[key] = (
-                                    local_matchup_wins.get(key, 0) + 1
-                                )
-
-                    return local_matchup_counts, local_matchup_wins
-
-                except KeyError as e:
-                    print(f"Skipping data point due to missing key: {e}")
-                    return None
-
-            # Process dataset in parallel
-            with ThreadPoolExecutor() as executor:
-                future_to_data = {
-                    executor.submit(process_data_point, data): data
-                    for data in self.dataset
-                }
-                for future in as_completed(future_to_data):
-                    result = future.result()
-                    if result is not None:
-                        local_counts, local_wins = result
-                        for key, value in local_counts.items():
-                            matchup_counts[key] = matchup_counts.get(key, 0) + value
-                        for key, value in local_wins.items():
-                            matchup_wins[key] = matchup_wins.get(key, 0) + value
-
-            print("Finished processing dataset. Calculating counter strengths...")
-
-            for (friend, enemy), count in matchup_counts.items():
-                if count >= 10:  # Only consider matchups with enough data
-                    win_rate = matchup_wins.get((friend, enemy), 0) / count
-                    counter_strength = (
-                        win_rate - 0.5
-                    ) * 2  # Rescale from [0.5, 1.0] to [0, 1.0]
-                    counter_strength = max(0, counter_strength)  # Ensure non-negative
-                    counter_matrix[friend, enemy] = counter_strength
-                    print(
-                        f"Set counter strength for ({friend}, {enemy}): {counter_strength:.4f}"
-                    )
-
-            counter_matrix = counter_matrix * 0.8 + 0.1
-
-            try:
-                counter_matrix_cpu = counter_matrix.cpu()
-                with open(self.counter_matrix_path, "wb") as f:
-                    pickle.dump(counter_matrix_cpu, f)
-                print(
-                    f"Counter matrix saved successfully at {self.counter_matrix_path}"
-                )
-            except Exception as e:
-                print(f"Error saving counter matrix: {e}")
+        return results
 
     def get_counter_strength(self, brawler_idx, enemy_idx):
         """
@@ -1000,33 +578,91 @@ class NeuralNetworkService:
         Returns:
             float: Counter strength value between 0 and 1
         """
-        # print(self.counter_matrix[brawler_idx, enemy_idx].item())
-        return self.counter_matrix[brawler_idx, enemy_idx].item()
-
-    def write_tier_list(self, tierlist_path):
-        dataScoring = []
-        for rankedMap in self.appConfig.dataMaps:
-            nbBrawlers = len(self.appConfig.dataIndex["brawlers"])
-            mapName = rankedMap["name"]
-            excluded_brawlers = []
-            friend_brawlers = []
-            enemy_brawlers = []
-
-            row = {
-                "mapName": mapName,
-                "tierList": self.predict_best_brawler(
-                    friends=friend_brawlers,
-                    enemies=enemy_brawlers,
-                    map_name=mapName,
-                    excluded=excluded_brawlers,
-                    nbBrawlers=nbBrawlers - 2,
-                ),
-            }
+        return float(self.counter_matrix[brawler_idx, enemy_idx])
+
+    def get_counter_boost(self, enemies, counter_strength=2.0, threshold=0.5):
+        """
+        Compute the counter-pick boost of every brawler against the given enemies.
+
+        The enemy columns of the counter matrix are gathered in one operation,
+        values below the strong-counter threshold are dropped, and the rest are
+        summed per brawler and scaled by counter_strength.
 
-            dataScoring.append(row)
+        Args:
+            enemies (list): List of enemy brawler names (unknown names are ignored)
+            counter_strength (float): How strongly to boost counter picks
+            threshold (float): Minimum counter value considered a strong counter
+
+        Returns:
+            np.ndarray: float32 boost of shape (num_brawlers,)
+        """
+        enemy_indices = self.vocabulary.brawler_indices(enemies)
+        if not enemy_indices:
+            return np.zeros(len(self.vocabulary), dtype=np.float32)
+
+        # Shape: (num_brawlers, num_enemies) - how well each brawler counters each enemy
+        counter_values = self.counter_matrix[:, enemy_indices]
+        strong_counters = np.where(counter_values > threshold, counter_values, 0)
+        return strong_counters.sum(axis=1, dtype=np.float32) * np.float32(
+            counter_strength
+        )
+
+    def load_opening_picks(self):
+        print("Loading opening picks...")
 
-        # Save to a JSON file (override mode)
-        with open(tierlist_path, "w") as json_file:
-            json.dump(dataScoring, json_file, indent=4)
+        if not os.path.exists(self.opening_picks_path):
+            print(f"Opening picks not found at '{self.opening_picks_path}'")
+            return
+
+        with np.load(self.opening_picks_path, allow_pickle=False) as data:
+            if list(data["brawlers"]) != list(self.vocabulary.brawler_names):
+                print("Opening picks were built with other mappings, ignoring them.")
+                return
 
-        print(f"Data saved to {tierlist_path}")
+            self.opening_picks = {
+                "map_to_pos": {m: pos for pos, m in enumerate(data["maps"].tolist())},
+                "indices": data["indices"],
+                "scores": data["scores"],
+            }
+        print("Opening picks loaded successfully.")
+
+    def lookup_opening_picks(
+        self,
+        friends,
+        enemies,
+        map_name,
+        excluded=[],
+        nbBrawlers=10,
+        available_brawlers=[],
+    ):
+        """
+        Look up predict_best_brawler in the precomputed opening picks table.
+
+        Returns:
+            list: Same result as predict_best_brawler, or None when the draft state
+            is not in the table and the model has to be used instead
+        """
+        if self.opening_picks is None or excluded or available_brawlers:
+            return None
+        if len(friends) > 1 or len(enemies) > 1:
+            return None
+
+        map_pos = self.opening_picks["map_to_pos"].get(map_name)
+        top_k = self.opening_picks["indices"].shape[-1]
+        if map_pos is None or nbBrawlers > top_k:
+            return None
+
+        picks = list(friends) + list(enemies)
+        if len(self.vocabulary.brawler_indices(picks)) != len(picks):
+            return None
+
+        friend_slot = self.vocabulary.brawler_index(friends[0]) + 1 if friends else 0
+        enemy_slot = self.vocabulary.brawler_index(enemies[0]) + 1 if enemies else 0
+        indices = self.opening_picks["indices"][map_pos, friend_slot, enemy_slot]
+        scores = self.opening_picks["scores"][map_pos, friend_slot, enemy_slot]
+
+        return [
+            (self.vocabulary.brawler_name(int(idx)), float(score))
+            for idx, score in zip(indices[:nbBrawlers], scores[:nbBrawlers])
+            if idx >= 0
+        ]
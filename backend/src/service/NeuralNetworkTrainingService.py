@@ -0,0 +1,858 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import sys
+import os
+
+from matplotlib import pyplot as plt
+
+sys.path.append(os.getcwd())
+sys.path.append(os.path.abspath(os.path.dirname(p=__file__)))
+import pickle
+import numpy as np
+import psycopg2
+import pandas as pd
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+from tqdm import tqdm
+
+from src.model.NumpyBrawlerPredictionModel import NumpyBrawlerPredictionModel
+from src.service.NeuralNetworkService import NeuralNetworkService
+from src.utils.artifactUtils import write_artifact
+from src.utils.modelUtils import BattleDataset, BrawlerPredictionModel
+
+
+class NeuralNetworkTrainingService(NeuralNetworkService):
+    """
+    NeuralNetworkService with the training, database and export code used by
+    the offline scripts.
+    """
+
+    def __init__(
+        self,
+        appConfig=None,
+        data_path="",
+        model_path="",
+        device=None,
+        version="35",
+        auto_load_enable=True,
+    ):
+        # Training and exports need the float torch model whatever MODEL_FORMAT is
+        super().__init__(
+            appConfig=appConfig,
+            data_path=data_path,
+            model_path=model_path,
+            device=device or ("cuda" if torch.cuda.is_available() else "cpu"),
+            version=version,
+            auto_load_enable=auto_load_enable,
+            model_format="torch",
+        )
+
+        # Example: Pad missing friends and enemies in the dataset
+
+    def prepare_dataset(self, df, num_friends=3, num_enemies=3, pad_idx=0):
+        # Ensure the required columns exist
+        for i in range(1, num_friends + 1):
+            if f"friend{i}" not in df.columns:
+                df[f"friend{i}"] = pad_idx  # Pad missing friends with pad_idx
+
+        for i in range(1, num_enemies + 1):
+            if f"enemy{i}" not in df.columns:
+                df[f"enemy{i}"] = pad_idx  # Pad missing enemies with pad_idx
+
+        return df
+
+    def load_data(self):
+        print(f"Loading data locally at path : {self.data_path}")
+        if os.path.exists(self.data_path) and self.auto_load_enable == True:
+            print("Loading mappings from file...")
+            self.load_mappings(self.data_path)
+        else:
+            print("Data not found locally")
+            print("Loading data from SQL DB...")
+            df = self.fetch_battle_data()
+            df = self.prepare_dataset(df, num_friends=3, num_enemies=3, pad_idx=0)
+            self.brawler_to_idx, self.map_to_idx = self.build_mappings(df)
+            self.build_vocabulary()
+            self.dataset = BattleDataset(df, self.brawler_to_idx, self.map_to_idx)
+            self.save_mappings(self.data_path)
+
+    def fetch_stats_battle_data(self):
+        query = """
+            WITH battle_data AS (
+                SELECT
+                    id,
+                    timestamp,
+                    map,
+                    mode,
+                    avg_rank,
+                    unnest(string_to_array(wTeam, '-')) AS brawler,
+                    'Victory' AS result
+                FROM battles_s35_3
+                WHERE avg_rank > 15
+                UNION ALL
+                SELECT
+                    id,
+                    timestamp,
+                    map,
+                    mode,
+                    avg_rank,
+                    unnest(string_to_array(lTeam, '-')) AS brawler,
+                    'Defeat' AS result
+                FROM battles_s35_3
+                WHERE avg_rank > 15
+            ),
+            brawler_stats AS (
+                SELECT
+                    brawler,
+                    map,
+                    SUM(CASE WHEN result = 'Victory' THEN 1 ELSE 0 END) AS wins,
+                    SUM(CASE WHEN result = 'Defeat' THEN 1 ELSE 0 END) AS losses
+                FROM battle_data
+                GROUP BY brawler, map
+            )
+            SELECT
+                brawler,
+                map,
+                wins,
+                losses,
+                (wins + losses) AS total_matches,
+                (wins::FLOAT / NULLIF(wins + losses, 0)) * 100 AS win_rate,
+                (wins + losses)::FLOAT / (SELECT COUNT(*) * 6 FROM battles_s35_3 WHERE avg_rank > 15) * 100 AS usage_rate
+            FROM brawler_stats
+            ORDER BY map, win_rate DESC;
+        """
+        conn = psycopg2.connect(
+            dbname="bs-project",
+            user="postgres",
+            password=self.appConfig.POSTGRE_SQL_PASSWORD,
+            host="localhost",
+            port="5432",
+        )
+        if conn is None:
+            raise ConnectionError("Could not connect to database.")
+        df = pd.read_sql_query(query, conn)
+        print("DataFrame Retrieved : ", df.count)
+        conn.close()
+        return df
+
+    def save_stats_battle(self, path):
+        print("Get stats from SQL DB...")
+        df = self.fetch_stats_battle_data()
+        print("Saving stats to file...")
+        df.to_pickle(path)
+
+    def fetch_battle_data(self):
+        conn = psycopg2.connect(
+            dbname="bs-project",
+            user="postgres",
+            password=self.appConfig.POSTGRE_SQL_PASSWORD,
+            host="localhost",
+            port="5432",
+        )
+        if conn is None:
+            raise ConnectionError("Could not connect to database.")
+        df = pd.read_sql_query(f"SELECT * FROM battles_s{self.version}", conn)
+        print("DataFrame Retrieved : ", df.count)
+        conn.close()
+        return df
+
+    def build_mappings(self, df):
+        print("Building mappings...")
+        brawler_set = set()
+        for team in df["wteam"].str.split("-").dropna():
+            brawler_set.update(team)
+        for team in df["lteam"].str.split("-").dropna():
+            brawler_set.update(team)
+
+        brawler_to_idx = {b: i for i, b in enumerate(sorted(brawler_set))}
+        map_to_idx = {m: i for i, m in enumerate(sorted(df["map"].dropna().unique()))}
+        return brawler_to_idx, map_to_idx
+
+    def save_mappings(self, path):
+        dataMappings = {
+            "brawler_to_idx": self.brawler_to_idx,
+            "map_to_idx": self.map_to_idx,
+        }
+        # Ensure the directory exists
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        print("Saving mappings to file at path :", path)
+        with open(path, "wb") as f:
+            pickle.dump(dataMappings, f)
+
+    def export_numpy_model(self):
+        """
+        Export the model weights as float32 numpy arrays for the NumPy backend.
+        The counter matrix is exported next to it when loaded.
+        """
+        print("Exporting NumPy model...")
+        state_dict = {
+            name: tensor.detach().float().cpu().numpy()
+            for name, tensor in self.model.state_dict().items()
+        }
+        NumpyBrawlerPredictionModel.save(
+            self.numpy_model_path,
+            state_dict,
+            pad_idx=self.model.pad_idx,
+            num_friends=self.model.num_friends,
+            num_enemies=self.model.num_enemies,
+        )
+        if self.counter_matrix is not None:
+            np.save(self.counter_matrix_array_path, self.counter_matrix)
+        print(f"NumPy model saved successfully at {self.numpy_model_path}")
+
+    def export_artifact(self):
+        """
+        Export the weights, counter matrix, vocabulary and opening picks (when
+        loaded) as a single memory-mappable artifact for the NumPy backend.
+        """
+        print("Exporting model artifact...")
+        arrays = {
+            f"model.{name}": tensor.detach().float().cpu().numpy()
+            for name, tensor in self.model.state_dict().items()
+        }
+        metadata = {
+            "game_version": self.version,
+            "brawlers": list(self.vocabulary.brawler_names),
+            "maps": sorted(self.map_to_idx, key=self.map_to_idx.get),
+            "model": {
+                "pad_idx": self.model.pad_idx,
+                "num_friends": self.model.num_friends,
+                "num_enemies": self.model.num_enemies,
+            },
+        }
+        if self.counter_matrix is not None:
+            arrays["counter_matrix"] = np.asarray(self.counter_matrix, np.float32)
+        if self.opening_picks is not None:
+            arrays["opening_picks.indices"] = self.opening_picks["indices"]
+            arrays["opening_picks.scores"] = self.opening_picks["scores"]
+            map_to_pos = self.opening_picks["map_to_pos"]
+            metadata["opening_picks_maps"] = sorted(map_to_pos, key=map_to_pos.get)
+
+        write_artifact(self.artifact_path, arrays, metadata)
+        print(f"Model artifact saved successfully at {self.artifact_path}")
+
+    def export_torchscript(self):
+        """
+        Export the model as a scripted, frozen and inference-optimized TorchScript module.
+
+        pad_idx, num_friends and num_enemies are kept as attributes since the
+        prediction code reads them from the model.
+        """
+        print("Exporting TorchScript model...")
+        self.model.eval()
+        scripted_model = torch.jit.script(self.model)
+        frozen_model = torch.jit.freeze(
+            scripted_model, preserved_attrs=["pad_idx", "num_friends", "num_enemies"]
+        )
+        frozen_model = torch.jit.optimize_for_inference(frozen_model)
+        torch.jit.save(frozen_model, self.scripted_model_path)
+        print(f"TorchScript model saved successfully at {self.scripted_model_path}")
+
+    def initialize_model(self, num_brawlers, num_maps, emb_dim=16, hidden_dim=64):
+        """Initialize the BrawlerPredictionModel with the correct parameters"""
+        print(f"Initializing model with {num_brawlers} brawlers and {num_maps} maps...")
+        self.model = BrawlerPredictionModel(
+            num_brawlers=num_brawlers,
+            num_maps=num_maps,
+            emb_dim=emb_dim,
+            hidden_dim=hidden_dim,
+        ).to(self.device)
+        print("Model initialized successfully")
+        return self.model
+
+    def train_model(
+        self,
+        num_epochs=10,
+        batch_size=64,
+        num_friends=3,
+        num_enemies=3,
+        val_split=0.1,
+        patience=5,
+    ):
+        """
+        Train the model.
+
+        Args:
+            num_epochs (int): Number of training epochs
+            batch_size (int): Batch size
+            num_friends (int): Number of friend brawlers
+            num_enemies (int): Number of enemy brawlers
+            val_split (float): Validation split ratio
+            patience (int): Early stopping patience
+        """
+        # Ensure we have mappings
+        if self.brawler_to_idx is None or self.map_to_idx is None:
+            raise ValueError(
+                "Mappings not initialized. Please load or build mappings before training."
+            )
+
+        # Ensure model is initialized
+        if self.model is None:
+            print("Model is not initialized. Initializing model...")
+            self.initialize_model(
+                num_brawlers=len(self.brawler_to_idx), num_maps=len(self.map_to_idx)
+            )
+
+        print("Preparing for training...")
+
+        # Create validation split
+        dataset_size = len(self.dataset)
+        val_size = int(val_split * dataset_size)
+        train_size = dataset_size - val_size
+        train_dataset, val_dataset = torch.utils.data.random_split(
+            self.dataset, [train_size, val_size]
+        )
+
+        # Create dataloaders
+        train_dataloader = DataLoader(
+            train_dataset, batch_size=batch_size, shuffle=True
+        )
+        val_dataloader = DataLoader(val_dataset, batch_size=batch_size)
+
+        # Optimizer and scheduler
+        optimizer = torch.optim.Adam(
+            self.model.parameters(), lr=1e-3, weight_decay=1e-5
+        )
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+            optimizer, mode="min", factor=0.5, patience=2
+        )
+        criterion = nn.CrossEntropyLoss()
+
+        # For mixed precision training
+        scaler = torch.amp.GradScaler("cuda")
+
+        # For early stopping
+        best_val_loss = float("inf")
+        patience_counter = 0
+
+        # For tracking metrics
+        train_losses = []
+        val_losses = []
+
+        print(f"Starting training for {num_epochs} epochs...")
+
+        for epoch in range(num_epochs):
+            # Training phase
+            self.model.train()
+            total_train_loss = 0.0
+
+            train_progress = tqdm(
+                train_dataloader, desc=f"Epoch {epoch+1}/{num_epochs}"
+            )
+            for batch in train_progress:
+                # Stack friends and enemies into tensors
+                friends = torch.stack(
+                    [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
+                ).to(self.device)
+                enemies = torch.stack(
+                    [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
+                ).to(self.device)
+                map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
+                target = batch["target"].to(self.device)
+
+                # Zero gradients
+                optimizer.zero_grad()
+
+                # Mixed precision forward pass
+                with torch.amp.autocast("cuda"):
+                    logits = self.model(friends, enemies, map_idx)
+                    loss = criterion(logits, target)
+
+                # Backward pass with scaling
+                scaler.scale(loss).backward()
+                scaler.step(optimizer)
+                scaler.update()
+
+                # Track loss
+                total_train_loss += loss.item()
+                train_progress.set_postfix(loss=loss.item())
+
+            avg_train_loss = total_train_loss / len(train_dataloader)
+            train_losses.append(avg_train_loss)
+
+            # Validation phase
+            self.model.eval()
+            total_val_loss = 0.0
+
+            with torch.no_grad():
+                val_progress = tqdm(val_dataloader, desc="Validation")
+                for batch in val_progress:
+                    # Stack friends and enemies into tensors
+                    friends = torch.stack(
+                        [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
+                    ).to(self.device)
+                    enemies = torch.stack(
+                        [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
+                    ).to(self.device)
+                    map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
+                    target = batch["target"].to(self.device)
+
+                    # Forward pass
+                    logits = self.model(friends, enemies, map_idx)
+                    loss = criterion(logits, target)
+
+                    # Track loss
+                    total_val_loss += loss.item()
+                    val_progress.set_postfix(loss=loss.item())
+
+            avg_val_loss = total_val_loss / len(val_dataloader)
+            val_losses.append(avg_val_loss)
+
+            # Update learning rate scheduler
+            scheduler.step(avg_val_loss)
+
+            print(
+                f"Epoch {epoch+1} completed - Train Loss: {avg_train_loss:.4f}, Val Loss: {avg_val_loss:.4f}"
+            )
+
+            # Early stopping check
+            if avg_val_loss < best_val_loss:
+                best_val_loss = avg_val_loss
+                patience_counter = 0
+                torch.save(self.model.state_dict(), self.model_path)
+                print(f"New best model saved with validation loss: {best_val_loss:.4f}")
+            else:
+                patience_counter += 1
+                if patience_counter >= patience:
+                    print(f"Early stopping triggered after {epoch+1} epochs")
+                    break
+
+        print(f"Training complete. Final best validation loss: {best_val_loss:.4f}")
+
+        if self.appConfig.MODE == "IMPORT":
+            # Plot training curves
+            plt.figure(figsize=(10, 5))
+            plt.plot(train_losses, label="Training Loss")
+            plt.plot(val_losses, label="Validation Loss")
+            plt.title("Training and Validation Loss")
+            plt.xlabel("Epoch")
+            plt.ylabel("Loss")
+            plt.legend()
+            plt.savefig(self.plot_path)
+            plt.close()
+
+    def train_model2(
+        self,
+        num_epochs=10,
+        batch_size=64,
+        num_friends=3,
+        num_enemies=3,
+        val_split=0.1,
+        patience=5,
+    ):
+        # Ensure we have mappings
+        if self.brawler_to_idx is None or self.map_to_idx is None:
+            raise ValueError(
+                "Mappings not initialized. Please load or build mappings before training."
+            )
+
+        # Ensure model is initialized
+        if self.model is None:
+            print("Model is not initialized. Initializing model...")
+            self.initialize_model(
+                num_brawlers=len(self.brawler_to_idx), num_maps=len(self.map_to_idx)
+            )
+
+        print("Preparing for training...")
+
+        # Create validation split
+        dataset_size = len(self.dataset)
+        val_size = int(val_split * dataset_size)
+        train_size = dataset_size - val_size
+        train_dataset, val_dataset = torch.utils.data.random_split(
+            self.dataset, [train_size, val_size]
+        )
+
+        # Create dataloaders
+        train_dataloader = DataLoader(
+            train_dataset, batch_size=batch_size, shuffle=True
+        )
+        val_dataloader = DataLoader(val_dataset, batch_size=batch_size)
+
+        # Optimizer and scheduler
+        optimizer = torch.optim.Adam(self.model.parameters(), lr=1e-3)
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+            optimizer, mode="min", factor=0.5, patience=2
+        )
+        criterion = nn.CrossEntropyLoss()
+
+        # For mixed precision training
+        scaler = torch.cuda.amp.GradScaler()
+
+        # For early stopping
+        best_val_loss = float("inf")
+        patience_counter = 0
+
+        print(f"Starting training for {num_epochs} epochs...")
+
+        for epoch in range(num_epochs):
+            # Training phase
+            self.model.train()
+            total_train_loss = 0.0
+
+            train_progress = tqdm(
+                train_dataloader, desc=f"Epoch {epoch+1}/{num_epochs}"
+            )
+            for batch in train_progress:
+                # Stack friends and enemies into tensors
+                friends = torch.stack(
+                    [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
+                ).to(self.device)
+                enemies = torch.stack(
+                    [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
+                ).to(self.device)
+                map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
+                target = batch["target"].to(self.device)
+
+                # Zero gradients
+                optimizer.zero_grad()
+
+                # Mixed precision forward pass
+                with torch.amp.autocast("cuda"):
+                    logits = self.model(friends, enemies, map_idx)
+                    loss = criterion(logits, target)
+
+                # Backward pass with scaling
+                scaler.scale(loss).backward()
+                scaler.step(optimizer)
+                scaler.update()
+
+                # Track loss
+                total_train_loss += loss.item()
+                train_progress.set_postfix(loss=loss.item())
+
+            avg_train_loss = total_train_loss / len(train_dataloader)
+
+            # Validation phase
+            self.model.eval()
+            total_val_loss = 0.0
+
+            with torch.no_grad():
+                val_progress = tqdm(val_dataloader, desc="Validation")
+                for batch in val_progress:
+                    # Stack friends and enemies into tensors
+                    friends = torch.stack(
+                        [batch[f"friend{i+1}"] for i in range(num_friends)], dim=1
+                    ).to(self.device)
+                    enemies = torch.stack(
+                        [batch[f"enemy{i+1}"] for i in range(num_enemies)], dim=1
+                    ).to(self.device)
+                    map_idx = batch["map_idx"].unsqueeze(1).to(self.device)
+                    target = batch["target"].to(self.device)
+
+                    # Forward pass
+                    logits = self.model(friends, enemies, map_idx)
+                    loss = criterion(logits, target)
+
+                    # Track loss
+                    total_val_loss += loss.item()
+                    val_progress.set_postfix(loss=loss.item())
+
+            avg_val_loss = total_val_loss / len(val_dataloader)
+
+            # Update learning rate scheduler
+            scheduler.step(avg_val_loss)
+
+            print(
+                f"Epoch {epoch+1} completed - Train Loss: {avg_train_loss:.4f}, Val Loss: {avg_val_loss:.4f}"
+            )
+
+            # Early stopping check
+            if avg_val_loss < best_val_loss:
+                best_val_loss = avg_val_loss
+                patience_counter = 0
+                torch.save(self.model.state_dict(), self.model_path)
+                print(f"New best model saved with validation loss: {best_val_loss:.4f}")
+            else:
+                patience_counter += 1
+                if patience_counter >= patience:
+                    print(f"Early stopping triggered after {epoch+1} epochs")
+                    break
+
+        print(f"Training complete. Final best validation loss: {best_val_loss:.4f}")
+
+    def save_counter_matrix(self):
+        """
+        Build a counter relationship matrix for brawlers with multi-threading and progress tracking.
+        """
+        print("Start saving counter matrix...")
+        num_brawlers = len(self.brawler_to_idx)
+        print(f"Number of brawlers: {num_brawlers}")
+
+        counter_matrix = torch.zeros((num_brawlers, num_brawlers), device=self.device)
+
+        if not hasattr(self, "dataset") or self.dataset is None:
+            print("No dataset found. Exiting function.")
+            return
+
+        print("Dataset found, processing matchups in parallel...")
+
+        matchup_counts = {}
+        matchup_wins = {}
+
+        def process_data_point(data_point):
+            """Process a single data point and return the results"""
+            try:
+                friends = [
+                    data_point[f"friend{i+1}"] for i in range(self.model.num_friends)
+                ]
+                enemies = [
+                    data_point[f"enemy{i+1}"] for i in range(self.model.num_enemies)
+                ]
+
+                # Determine winner
+                if "target" in data_point:
+                    target_brawler = data_point["target"]
+                    winner = 1 if target_brawler in friends else 0
+                elif "win" in data_point:
+                    winner = 1 if data_point["win"] else 0
+                elif "victory" in data_point:
+                    winner = 1 if data_point["victory"] else 0
+                else:
+                    return None  # Skip if we can't determine the winner
+
+                local_matchup_counts = {}
+                local_matchup_wins = {}
+
+                for friend in friends:
+                    for enemy in enemies:
+                        key = (friend, enemy)
+                        local_matchup_counts[key] = local_matchup_counts.get(key, 0) + 1
+                        if winner == 1:
+                            local_matchup_wins[key] = local_matchup_wins.get(key, 0) + 1
+
+                return local_matchup_counts, local_matchup_wins
+
+            except KeyError as e:
+                return f"Skipping data point due to missing key: {e}"
+
+        # Process dataset in parallel with tqdm progress tracking
+        with ThreadPoolExecutor() as executor:
+            future_to_data = {
+                executor.submit(process_data_point, data): data for data in self.dataset
+            }
+
+            with tqdm(
+                total=len(self.dataset), desc="Processing Matchups", unit=" match"
+            ) as pbar:
+                for future in as_completed(future_to_data):
+                    result = future.result()
+                    pbar.update(1)  # Update progress bar
+
+                    if isinstance(result, str):  # If error message was returned
+                        print(result)
+                    elif result is not None:
+                        local_counts, local_wins = result
+                        for key, value in local_counts.items():
+                            matchup_counts[key] = matchup_counts.get(key, 0) + value
+                        for key, value in local_wins.items():
+                            matchup_wins[key] = matchup_wins.get(key, 0) + value
+
+        print("Finished processing dataset. Calculating counter strengths...")
+
+        with tqdm(
+            total=len(matchup_counts),
+            desc="Calculating Counter Strengths",
+            unit=" pair",
+        ) as pbar:
+            for (friend, enemy), count in matchup_counts.items():
+                if count >= 10:  # Only consider matchups with enough data
+                    win_rate = matchup_wins.get((friend, enemy), 0) / count
+                    counter_strength = (
+                        win_rate - 0.5
+                    ) * 2  # Rescale from [0.5, 1.0] to [0, 1.0]
+                    counter_strength = max(0, counter_strength)  # Ensure non-negative
+                    counter_matrix[friend, enemy] = counter_strength
+                    pbar.update(1)  # Update progress bar
+
+        counter_matrix = counter_matrix * 0.8 + 0.1
+
+        try:
+            counter_matrix_cpu = counter_matrix.cpu()
+            with open(self.counter_matrix_path, "wb") as f:
+                pickle.dump(counter_matrix_cpu, f)
+            np.save(self.counter_matrix_array_path, counter_matrix_cpu.numpy())
+            print(f"Counter matrix saved successfully at {self.counter_matrix_path}")
+        except Exception as e:
+            print(f"Error saving counter matrix: {e}")
+            """
+            Build a counter relationship matrix for brawlers with multi-threading.
+            """
+            print("Start saving counter matrix...")
+            num_brawlers = len(self.brawler_to_idx)
+            print(f"Number of brawlers: {num_brawlers}")
+
+            counter_matrix = torch.zeros(
+                (num_brawlers, num_brawlers), device=self.device
+            )
+
+            if not hasattr(self, "dataset") or self.dataset is None:
+                print("No dataset found. Exiting function.")
+                return
+
+            print("Dataset found, processing matchups in parallel...")
+
+            matchup_counts = {}
+            matchup_wins = {}
+
+            def process_data_point(data_point):
+                """Process a single data point and return the results"""
+                try:
+                    friends = [
+                        data_point[f"friend{i+1}"]
+                        for i in range(self.model.num_friends)
+                    ]
+                    enemies = [
+                        data_point[f"enemy{i+1}"] for i in range(self.model.num_enemies)
+                    ]
+
+                    # Determine winner
+                    if "target" in data_point:
+                        target_brawler = data_point["target"]
+                        winner = 1 if target_brawler in friends else 0
+                    elif "win" in data_point:
+                        winner = 1 if data_point["win"] else 0
+                    elif "victory" in data_point:
+                        winner = 1 if data_point["victory"] else 0
+                    else:
+                        return None  # Skip if we can't determine the winner
+
+                    local_matchup_counts = {}
+                    local_matchup_wins = {}
+
+                    for friend in friends:
+                        for enemy in enemies:
+                            key = (friend, enemy)
+                            local_matchup_counts[key] = (
+                                local_matchup_counts.get(key, 0) + 1
+                            )
+                            if winner == 1:
+                                local_matchup_wins[key] = (
+                                    local_matchup_wins.get(key, 0) + 1
+                                )
+
+                    return local_matchup_counts, local_matchup_wins
+
+                except KeyError as e:
+                    print(f"Skipping data point due to missing key: {e}")
+                    return None
+
+            # Process dataset in parallel
+            with ThreadPoolExecutor() as executor:
+                future_to_data = {
+                    executor.submit(process_data_point, data): data
+                    for data in self.dataset
+                }
+                for future in as_completed(future_to_data):
+                    result = future.result()
+                    if result is not None:
+                        local_counts, local_wins = result
+                        for key, value in local_counts.items():
+                            matchup_counts[key] = matchup_counts.get(key, 0) + value
+                        for key, value in local_wins.items():
+                            matchup_wins[key] = matchup_wins.get(key, 0) + value
+
+            print("Finished processing dataset. Calculating counter strengths...")
+
+            for (friend, enemy), count in matchup_counts.items():
+                if count >= 10:  # Only consider matchups with enough data
+                    win_rate = matchup_wins.get((friend, enemy), 0) / count
+                    counter_strength = (
+                        win_rate - 0.5
+                    ) * 2  # Rescale from [0.5, 1.0] to [0, 1.0]
+                    counter_strength = max(0, counter_strength)  # Ensure non-negative
+                    counter_matrix[friend, enemy] = counter_strength
+                    print(
+                        f"Set counter strength for ({friend}, {enemy}): {counter_strength:.4f}"
+                    )
+
+            counter_matrix = counter_matrix * 0.8 + 0.1
+
+            try:
+                counter_matrix_cpu = counter_matrix.cpu()
+                with open(self.counter_matrix_path, "wb") as f:
+                    pickle.dump(counter_matrix_cpu, f)
+                np.save(self.counter_matrix_array_path, counter_matrix_cpu.numpy())
+                print(
+                    f"Counter matrix saved successfully at {self.counter_matrix_path}"
+                )
+            except Exception as e:
+                print(f"Error saving counter matrix: {e}")
+
+    def write_tier_list(self, tierlist_path):
+        nbBrawlers = len(self.appConfig.data_index["brawlers"])
+        drafts = [
+            {
+                "friends": [],
+                "enemies": [],
+                "map_name": rankedMap["name"],
+                "excluded": [],
+            }
+            for rankedMap in self.appConfig.data_maps
+        ]
+        tierLists = self.predict_best_brawler_batch(drafts, nbBrawlers=nbBrawlers - 2)
+
+        dataScoring = [
+            {"mapName": draft["map_name"], "tierList": tierList}
+            for draft, tierList in zip(drafts, tierLists)
+        ]
+
+        # Save to a JSON file (override mode)
+        with open(tierlist_path, "w") as json_file:
+            json.dump(dataScoring, json_file, indent=4)
+
+        print(f"Data saved to {tierlist_path}")
+
+    def save_opening_picks(self, top_k=10):
+        """
+        Precompute predict_best_brawler for every opening draft state of the ranked maps.
+
+        Opening states have at most one friend and one enemy pick and no excluded
+        or available brawlers. The table is indexed by [map, friend slot,
+        enemy slot, rank], where slot 0 means no pick and slot i + 1 is the
+        brawler of index i, and is saved next to the model weights.
+
+        Args:
+            top_k (int): Number of recommendations stored per draft state
+        """
+        print("Start saving opening picks...")
+        map_names = [rankedMap["name"] for rankedMap in self.appConfig.data_maps]
+        slots = [None] + list(self.vocabulary.brawler_names)
+        num_slots = len(slots)
+
+        indices = np.full(
+            (len(map_names), num_slots, num_slots, top_k), -1, dtype=np.int16
+        )
+        scores = np.zeros((len(map_names), num_slots, num_slots, top_k), np.float32)
+
+        for map_pos, map_name in enumerate(tqdm(map_names, desc="Opening picks")):
+            drafts = [
+                {
+                    "friends": [friend] if friend else [],
+                    "enemies": [enemy] if enemy else [],
+                    "map_name": map_name,
+                }
+                for friend in slots
+                for enemy in slots
+            ]
+            predictions = self.infer_best_brawler_batch(drafts, nbBrawlers=top_k)
+            for state, prediction in enumerate(predictions):
+                friend_slot, enemy_slot = divmod(state, num_slots)
+                for rank, (brawler, score) in enumerate(prediction):
+                    indices[map_pos, friend_slot, enemy_slot, rank] = (
+                        self.vocabulary.brawler_index(brawler)
+                    )
+                    scores[map_pos, friend_slot, enemy_slot, rank] = score
+
+        np.savez(
+            self.opening_picks_path,
+            maps=np.array(map_names),
+            brawlers=np.array(self.vocabulary.brawler_names),
+            indices=indices,
+            scores=scores,
+        )
+        print(f"Opening picks saved successfully at {self.opening_picks_path}")
@@ -1,15 +1,30 @@
-from datetime import datetime
+from contextlib import contextmanager
 import json
 import os
 import sys
+import threading
+import time
 
 sys.path.append(os.getcwd())
 sys.path.append(os.path.abspath(os.path.dirname(p=__file__)))
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from src.model.GameVersionTimeline import GameVersionTimeline
 
 
 class PostgreService:
-    def __init__(self, appConfig):
+    """
+    Database access of the players and battles tables.
+
+    With pool_size 0 every operation uses one connection, one at a time. With
+    a pool_size above 0 each operation checks out its own connection from a
+    ThreadedConnectionPool, so that many threads write in parallel; once
+    pool_size connections are in use, the next operations wait for one to be
+    returned.
+    """
+
+    def __init__(self, appConfig, pool_size=None):
         # Load environment variables from the .env file
         self.appConfig = appConfig
         # Database connection parameters
@@ -22,24 +37,118 @@ class PostgreService:
             "schema": "dbo",
         }
 
+        connect_params = {
+            "dbname": db_params["dbname"],
+            "user": db_params["user"],
+            "password": db_params["password"],
+            "host": db_params["host"],
+            "port": db_params["port"],
+        }
+        if pool_size is None:
+            pool_size = self.appConfig.POSTGRE_POOL_SIZE
+        self.pool_size = pool_size
+
         self.cursor = None
         self.conn = None
+        self.pool = None
+        # Season tables created by this service, so each is only created once
+        self.battle_tables = set()
+        self.tables_lock = threading.Lock()
+        # Blocks the callers over the connection count instead of failing
+        self.slots = threading.BoundedSemaphore(max(1, pool_size))
+
+        # Pool metrics
+        self.metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+            "in_use": 0,
+            "max_in_use": 0,
+            "rollbacks": 0,
+        }
+        self.metrics_lock = threading.Lock()
 
         # Create a connection to the PostgreSQL database
         try:
-            self.conn = psycopg2.connect(
-                dbname=db_params["dbname"],
-                user=db_params["user"],
-                password=db_params["password"],
-                host=db_params["host"],
-                port=db_params["port"],
-            )
-            self.cursor = self.conn.cursor()
+            if pool_size > 0:
+                self.pool = ThreadedConnectionPool(1, pool_size, **connect_params)
+            else:
+                self.conn = psycopg2.connect(**connect_params)
+                self.cursor = self.conn.cursor()
             print("Successfully connected to the PostgreSQL database")
         except psycopg2.Error as e:
             print(f"Error connecting to the database: {e}")
             exit(1)
 
+    @contextmanager
+    def connection(self):
+        """Connection reserved to the caller until the block exits."""
+        start = time.perf_counter()
+        waited = not self.slots.acquire(blocking=False)
+        if waited:
+            self.slots.acquire()
+        wait = time.perf_counter() - start
+
+        try:
+            conn = self.pool.getconn() if self.pool is not None else self.conn
+        except Exception:
+            self.slots.release()
+            raise
+
+        with self.metrics_lock:
+            self.metrics["checkouts"] += 1
+            self.metrics["waits"] += waited
+            self.metrics["total_wait"] += wait
+            self.metrics["max_wait"] = max(self.metrics["max_wait"], wait)
+            self.metrics["in_use"] += 1
+            self.metrics["max_in_use"] = max(
+                self.metrics["max_in_use"], self.metrics["in_use"]
+            )
+
+        try:
+            yield conn
+        finally:
+            with self.metrics_lock:
+                self.metrics["in_use"] -= 1
+            if self.pool is not None:
+                # Broken connections are dropped and replaced on the next checkout
+                self.pool.putconn(conn, close=bool(conn.closed))
+            self.slots.release()
+
+    @contextmanager
+    def transaction(self):
+        """Cursor committed when the block exits, rolled back if it raises."""
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    yield cursor
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                with self.metrics_lock:
+                    self.metrics["rollbacks"] += 1
+                raise
+
+    def stats(self):
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+        checkouts = metrics["checkouts"]
+        return {
+            "pool_size": self.pool_size,
+            "checkouts": checkouts,
+            # Checkouts that found every connection in use
+            "waits": metrics["waits"],
+            "avg_wait_ms": (
+                round(metrics["total_wait"] / checkouts * 1000, 2) if checkouts else 0.0
+            ),
+            "max_wait_ms": round(metrics["max_wait"] * 1000, 2),
+            "in_use": metrics["in_use"],
+            "max_in_use": metrics["max_in_use"],
+            "rollbacks": metrics["rollbacks"],
+        }
+
     # Function to insert data into the players table
     def insert_or_update_player(
         self, tag, last_rank, max_rank, insert_date, last_update_date, show=False
@@ -56,62 +165,182 @@ class PostgreService:
         """
 
         try:
-            if self.cursor is None or self.conn is None:
-                return "Database connection is not established"
-
-            self.conn.autocommit = (
-                False  # Ensure changes are committed only when successful
-            )
-            self.cursor.execute(
-                insert_query, (tag, last_rank, max_rank, insert_date, last_update_date)
-            )
-            self.conn.commit()
+            # Changes are committed only when successful
+            with self.transaction() as cursor:
+                cursor.execute(
+                    insert_query,
+                    (tag, last_rank, max_rank, insert_date, last_update_date),
+                )
             if show:
                 print(f"Successfully inserted or updated player with tag: {tag}")
         except psycopg2.Error as e:
-            self.conn.rollback()
             if show:
                 print(f"Error inserting/updating data: {e}")
 
+    @staticmethod
+    def merge_players(rows):
+        """
+        Split insert_or_update_player rows into two bulk upserts giving the
+        same players as upserting the rows one by one.
+
+        A bulk upsert cannot update the same row twice, so the first row of
+        each tag is upserted as is, then its later rows are merged into one
+        update: the last rank wins and max_rank holds the highest of their
+        ranks, to be folded into the stored one. Both lists are sorted by tag,
+        so concurrent batches lock the players in the same order.
+
+        Returns:
+            tuple: (first row of each tag, merged later rows of repeated tags)
+        """
+        first, repeated = {}, {}
+        for tag, last_rank, max_rank, insert_date, last_update_date in rows:
+            if tag not in first:
+                first[tag] = (tag, last_rank, max_rank, insert_date, last_update_date)
+                continue
+            previous = repeated.get(tag)
+            # GREATEST skips NULLs, so does the fold
+            ranks = (previous[2] if previous else None, last_rank)
+            max_rank = max((r for r in ranks if r is not None), default=None)
+            repeated[tag] = (tag, last_rank, max_rank, insert_date, last_update_date)
+        return (
+            [first[tag] for tag in sorted(first)],
+            [repeated[tag] for tag in sorted(repeated)],
+        )
+
+    def insert_players(self, rows):
+        """
+        Upsert insert_or_update_player rows in one statement and one commit.
+
+        Returns:
+            int: Number of players upserted
+
+        Raises:
+            psycopg2.Error: If the batch failed, nothing is written
+        """
+        with self.transaction() as cursor:
+            return self.execute_players(cursor, rows)
+
+    def execute_players(self, cursor, rows):
+        """Upsert insert_or_update_player rows with the cursor of a transaction."""
+        first_rows, repeated_rows = self.merge_players(rows)
+        if not first_rows:
+            return 0
+
+        # Same statement as insert_or_update_player
+        insert_query = """
+            INSERT INTO dbo.players (tag, last_rank, max_rank, insert_date, last_update_date)
+            VALUES %s
+            ON CONFLICT (tag)
+            DO UPDATE
+            SET
+                last_rank = EXCLUDED.last_rank,
+                max_rank = GREATEST(dbo.players.max_rank, EXCLUDED.last_rank),
+                last_update_date = EXCLUDED.last_update_date;
+        """
+        execute_values(cursor, insert_query, first_rows, page_size=len(first_rows))
+        if repeated_rows:
+            # Every tag exists by now, max_rank holds the ranks of the later rows
+            update_query = """
+                INSERT INTO dbo.players (tag, last_rank, max_rank, insert_date, last_update_date)
+                VALUES %s
+                ON CONFLICT (tag)
+                DO UPDATE
+                SET
+                    last_rank = EXCLUDED.last_rank,
+                    max_rank = GREATEST(dbo.players.max_rank, EXCLUDED.max_rank),
+                    last_update_date = EXCLUDED.last_update_date;
+            """
+            execute_values(
+                cursor, update_query, repeated_rows, page_size=len(repeated_rows)
+            )
+        return len(first_rows)
+
+    def insert_battles(self, rows):
+        """
+        Insert insert_battle_stats rows with one statement per season table and
+        one commit. Battles already stored are skipped.
+
+        Returns:
+            int: Number of battles inserted
+
+        Raises:
+            psycopg2.Error: If the batch failed, nothing is written
+        """
+        tables = self.group_battles(rows)
+        with self.transaction() as cursor:
+            return self.execute_battles(cursor, tables)
+
+    def write_battles(self, battles, players):
+        """
+        Upsert the players and insert the battles of a crawl batch in one
+        transaction, so either both are written or neither is.
+
+        Returns:
+            tuple: (battles inserted, players upserted)
+
+        Raises:
+            psycopg2.Error: If the batch failed, nothing is written
+        """
+        tables = self.group_battles(battles)
+        with self.transaction() as cursor:
+            players_written = self.execute_players(cursor, players)
+            battles_written = self.execute_battles(cursor, tables)
+        return battles_written, players_written
+
+    def group_battles(self, rows):
+        """
+        insert_battle_stats rows by season table. The tables are created first,
+        so a battle of a season without a table does not fail the others.
+        """
+        tables = {}
+        for row in rows:
+            tables.setdefault(self.get_battle_table(row[1]), []).append(row)
+        for tableName in tables:
+            self.create_battle_table(tableName)
+        return tables
+
+    def execute_battles(self, cursor, tables):
+        """Insert the grouped battles with the cursor of a transaction."""
+        inserted = 0
+        for tableName, tableRows in tables.items():
+            insert_query = f"""
+            INSERT INTO {tableName} (id, timestamp, map, mode, avg_rank, wTeam, lTeam, insert_date)
+            VALUES %s
+            ON CONFLICT (id) DO NOTHING;
+            """
+            execute_values(cursor, insert_query, tableRows, page_size=len(tableRows))
+            inserted += max(0, cursor.rowcount)
+        return inserted
+
+    def get_battle_table(self, timestamp):
+        """Season table of a battle, from its battleTime 1-tuple."""
+        return self.appConfig.game_version_timeline.table_for_battle_time(timestamp[0])
+
     def insert_battle_stats(
         self, id, timestamp, map, mode, avg_rank, wTeam, lTeam, insert_date
     ):
-        timestamp_str = timestamp[0].rstrip("Z")  # Remove the trailing 'Z'
-        date = datetime.strptime(
-            timestamp_str, "%Y%m%dT%H%M%S.%f"
-        ).date()  # Parse the date part
-
-        # Convert to a 'yyyy-mm-dd' string
-        formatted_date = date.strftime("%Y-%m-%d")
-        tableName = self.get_correct_battle_version(
-            formatted_date, self.appConfig.data_all_game_version
-        )
+        tableName = self.get_battle_table(timestamp)
         insert_query = f"""
         INSERT INTO {tableName} (id, timestamp, map, mode, avg_rank, wTeam, lTeam, insert_date)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
         """
         try:
-            if self.cursor is None or self.conn is None:
-                return "Database connection is not established"
-
-            self.cursor.execute(
-                insert_query,
-                (id, timestamp, map, mode, avg_rank, wTeam, lTeam, insert_date),
-            )
-            self.conn.commit()
+            with self.transaction() as cursor:
+                cursor.execute(
+                    insert_query,
+                    (id, timestamp, map, mode, avg_rank, wTeam, lTeam, insert_date),
+                )
             # print(f"Successfully inserted battle stats : {id} {timestamp} {map} {mode} {avg_rank} {wTeam} {lTeam} {insert_date}")
         except psycopg2.Error as e:
-            self.conn.rollback()
             # print(f"Error inserting data: {e}")
+            pass
 
     def get_all_players(self):
         select_query = "SELECT * FROM dbo.players;"
         try:
-            if self.cursor is None or self.conn is None:
-                return "Database connection is not established"
-
-            self.cursor.execute(select_query)
-            players = self.cursor.fetchall()
+            with self.transaction() as cursor:
+                cursor.execute(select_query)
+                players = cursor.fetchall()
             return players
         except psycopg2.Error as e:
             print(f"Error retrieving data: {e}")
@@ -119,10 +348,8 @@ class PostgreService:
 
     def execute_custom_query(self, query):
         try:
-            if self.cursor is None or self.conn is None:
-                return "Database connection is not established"
-
-            self.cursor.execute(query)
+            with self.transaction() as cursor:
+                cursor.execute(query)
             print(f"Query {query} executed successfully")
         except psycopg2.Error as e:
             print(f"Error executing query: {e}")
@@ -130,9 +357,15 @@ class PostgreService:
 
     import psycopg2
 
-    def create_battles_table_version(self, version):
+    def create_battle_table(self, tableName):
+        """
+        Create a season table unless this service already did.
+
+        Raises:
+            psycopg2.Error: If the table could not be created
+        """
         query = f"""
-        CREATE TABLE IF NOT EXISTS battles_s{str(version)} (
+        CREATE TABLE IF NOT EXISTS {tableName} (
             id VARCHAR(255) PRIMARY KEY,
             timestamp TIMESTAMP,
             map VARCHAR(255),
@@ -143,13 +376,18 @@ class PostgreService:
             insert_date VARCHAR(255)
         );"""
 
-        try:
-            if self.conn is None or self.cursor is None:
-                return "Database connection is not established"
+        # Serialized, since concurrent creations of a table can conflict
+        with self.tables_lock:
+            if tableName in self.battle_tables:
+                return
+            with self.transaction() as cursor:
+                cursor.execute(query)  # Committed when the block exits
+            self.battle_tables.add(tableName)
 
+    def create_battles_table_version(self, version):
+        try:
             print(f"Starting to create table battles_s{version}")
-            self.cursor.execute(query)
-            self.conn.commit()  # Ensure changes are saved
+            self.create_battle_table(f"battles_s{version}")
             print(f"Table battles_s{version} created successfully")
             return f"Table battles_s{version} created successfully"
 
@@ -168,70 +406,38 @@ class PostgreService:
 
         select_query = f"SELECT * FROM dbo.players WHERE last_rank {placeHolder} {rank} OR max_rank {placeHolder} {rank};"
         try:
-            if self.cursor is None or self.conn is None:
-                return "Database connection is not established"
-
-            self.cursor.execute(select_query)
-            players = self.cursor.fetchall()
+            with self.transaction() as cursor:
+                cursor.execute(select_query)
+                players = cursor.fetchall()
             return players
         except psycopg2.Error as e:
             print(f"Error retrieving data: {e}")
             return []
 
     def closeDbConnection(self):
-        # Close the cursor and connection
+        # Close the cursor and connection, or every connection of the pool
+        if self.pool is not None:
+            self.pool.closeall()
+            return
         self.cursor.close()
         self.conn.close()
 
     def get_correct_battle_version(self, target_date, data):
-        target_date = datetime.strptime(target_date, "%Y-%m-%d").date()
-
-        # Create a valid sorted list, skipping invalid dates
-        valid_data = []
-        for entry in data:
-            try:
-                entry_date = datetime.strptime(entry["date"], "%Y-%m-%d").date()
-                valid_data.append(entry)
-            except ValueError:
-                print(
-                    f"Warning: Skipping invalid date {entry['date']} for version {entry['version']}"
-                )
-
-        sorted_data = sorted(
-            valid_data, key=lambda x: datetime.strptime(x["date"], "%Y-%m-%d").date()
-        )
-
-        # If target_date is before the first recorded entry, return the first valid version
-        if target_date < datetime.strptime(sorted_data[0]["date"], "%Y-%m-%d").date():
-            return "battles_s" + sorted_data[0]["version"]  # Return the first version
-
-        # Iterate through sorted data to find the correct version
-        for i in range(1, len(sorted_data)):
-            current_entry = sorted_data[i]
-            current_date = datetime.strptime(current_entry["date"], "%Y-%m-%d").date()
-            previous_entry = sorted_data[i - 1]
-            previous_date = datetime.strptime(previous_entry["date"], "%Y-%m-%d").date()
-
-            # If target_date falls between two versions, return the previous version
-            if previous_date <= target_date < current_date:
-                return "battles_s" + previous_entry["version"]
-
-        # If target_date is after all entries, return the last known version
-        return "battles_s" + sorted_data[-1]["version"]
+        timeline = self.appConfig.game_version_timeline
+        if data is not self.appConfig.data_all_game_version:
+            # Versions other than the loaded ones get their own timeline
+            timeline = GameVersionTimeline(data)
+        return timeline.table_for_date(target_date)
 
     def get_battle_count(self, version):
         """Query PostgreSQL to get battle count for a specific version."""
         query = f"SELECT COUNT(*) FROM battles_s{version};"
 
         try:
-            if self.conn is None or self.cursor is None:
-                return "Database connection is not established"
-
             print(f"Starting to create table battles_s{version}")
-            cur = self.conn.cursor()
-            cur.execute(query)
-            count = cur.fetchone()[0]
-            cur.close()
+            with self.transaction() as cursor:
+                cursor.execute(query)
+                count = cursor.fetchone()[0]
             return count
         except Exception as e:
             print(f"Database error: {e}")
@@ -10,6 +10,7 @@ sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
 
+from src.model.BrawlerCatalog import BrawlerCatalog
 from src.model.BrawlerUpgrade import BrawlerUpgrade
 from src.utils import battlesUtils
 
@@ -36,32 +37,67 @@ def aggregate_scores(data: Any) -> Dict[str, float]:
     return brawler_scores  # Return the dictionary with aggregated scores
 
 
-def get_cost_and_score_by_account(player_tag, data, api_key, base_url):
-    accountStats = battlesUtils.get_account_brawlers(
-        player_tag=player_tag, API_KEY=api_key, BASE_URL=base_url
+def get_cost_and_score_by_account(
+    player_tag,
+    data,
+    api_key,
+    base_url,
+    catalog=None,
+    client=None,
+    cache=None,
+    scores=None,
+):
+    if cache is not None:
+        accountStats = battlesUtils.get_account_brawlers_cached(
+            player_tag=player_tag,
+            API_KEY=api_key,
+            BASE_URL=base_url,
+            cache=cache,
+            client=client,
+        )
+    else:
+        accountStats = battlesUtils.get_account_brawlers(
+            player_tag=player_tag, API_KEY=api_key, BASE_URL=base_url, client=client
+        )
+    return get_cost_and_score_by_account_stats(
+        accountStats, data, catalog=catalog, scores=scores
+    )
+
+
+def get_cost_and_score_by_account_stats(accountStats, data, catalog=None, scores=None):
+    """
+    Upgrade cost and meta score of every brawler of an already fetched account.
+
+    scores are the aggregate_scores of data, computed here when not given.
+    """
+    if scores is None:
+        scores = aggregate_scores(data)
+
+    accountBrawlers = [
+        accountBrawler
+        for accountBrawler in accountStats["brawlers"]
+        if accountBrawler["power"] != 11
+    ]
+    # One pass over the precomputed cost tables for the whole account
+    total_power_points, total_coins = BrawlerUpgrade.upgrade_costs(
+        [accountBrawler["power"] for accountBrawler in accountBrawlers],
+        [len(accountBrawler["starPowers"]) for accountBrawler in accountBrawlers],
+        [len(accountBrawler["gadgets"]) for accountBrawler in accountBrawlers],
+        [len(accountBrawler["gears"]) for accountBrawler in accountBrawlers],
     )
 
-    accountBrawlers = accountStats["brawlers"]
-    sorted_scores = aggregate_scores(data)
     res = []
-    for accountBrawler in accountBrawlers:
-        if accountBrawler["power"] == 11:
-            continue
-        name = battlesUtils.check_brawler_name(accountBrawler["name"])
-        brawler_upgrade = BrawlerUpgrade(
-            name=name,
-            current_power=accountBrawler["power"],
-            gears=accountBrawler["gears"],
-            star_powers=accountBrawler["starPowers"],
-            gadgets=accountBrawler["gadgets"],
-        )
-        brawler_upgrade.calculate_upgrade_cost()
+    for accountBrawler, power_points, coins in zip(
+        accountBrawlers, total_power_points.tolist(), total_coins.tolist()
+    ):
+        name = BrawlerCatalog.canonical_name(accountBrawler["name"])
         res.append(
             {
                 "name": name,
-                "score": sorted_scores.get(name),
-                "total_power_points": brawler_upgrade.total_power_points,
-                "total_coins": brawler_upgrade.total_coins,
+                "score": scores.get(name),
+                "total_power_points": power_points,
+                "total_coins": coins,
+                "imageUrl": catalog.image_url(name) if catalog else None,
             }
         )
     return res
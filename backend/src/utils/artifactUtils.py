@@ -0,0 +1,111 @@
+"""
+Read-only memory-mapped model artifacts.
+
+An artifact is a single little-endian file:
+
+    magic (8 bytes) | format version (uint32) | header length (uint32)
+    JSON header (metadata and the dtype, shape and offset of every array)
+    zero padding, then every array's raw bytes, each aligned to ALIGNMENT bytes
+
+Arrays are returned as read-only views of an mmap of the file, so nothing is
+deserialized at load time and every process mapping the same file shares the
+same physical pages.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"MPAIART\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_artifact(path, arrays, metadata=None):
+    """
+    Write numpy arrays and JSON serializable metadata to an artifact file.
+
+    The file is written next to its destination then renamed, so processes
+    that mapped the previous version keep reading a complete file.
+
+    Args:
+        path (str): Destination path
+        arrays (dict): Array name to numpy array
+        metadata (dict): Extra JSON serializable values stored in the header
+    """
+    entries = {}
+    contiguous_arrays = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        offset = align(offset)
+        entries[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        contiguous_arrays.append((offset, array))
+        offset += array.nbytes
+
+    header = json.dumps(
+        {"metadata": metadata or {}, "arrays": entries}, separators=(",", ":")
+    ).encode()
+    data_start = align(PREAMBLE.size + len(header))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for array_offset, array in contiguous_arrays:
+            f.write(b"\0" * (data_start + array_offset - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path):
+    """
+    Memory-map an artifact file.
+
+    Returns:
+        tuple: (metadata, arrays) where arrays maps names to read-only numpy
+        arrays backed by the mapped file
+
+    Raises:
+        ValueError: If the file is not an artifact or has an unsupported version
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < PREAMBLE.size:
+        raise ValueError(f"{path} is not a model artifact")
+    magic, format_version, header_length = PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a model artifact")
+    if format_version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact format version {format_version} in {path}"
+        )
+
+    header = json.loads(buffer[PREAMBLE.size : PREAMBLE.size + header_length])
+    data_start = align(PREAMBLE.size + header_length)
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        shape = tuple(entry["shape"])
+        arrays[name] = np.frombuffer(
+            buffer,
+            dtype=np.dtype(entry["dtype"]),
+            count=math.prod(shape),
+            offset=data_start + entry["offset"],
+        ).reshape(shape)
+    return header["metadata"], arrays
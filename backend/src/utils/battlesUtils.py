@@ -3,19 +3,21 @@ import json
 import math
 from typing import *
 import uuid
-import requests
+
+from src.service.BrawlStarsApiClient import BrawlStarsApiClient
 
 
 # =========== Account Battles log ===========
 
 
-def get_battle_log(player_tag, API_KEY, BASE_URL, writeEnabled=False):
+def get_battle_log(player_tag, API_KEY, BASE_URL, writeEnabled=False, client=None):
     player_tag = player_tag.replace("#", "%23")  # Encode '#' as '%23'
     url = f"{BASE_URL}/players/{player_tag}/battlelog"
 
     headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "application/json"}
 
-    response = requests.get(url, headers=headers)
+    client = client or BrawlStarsApiClient.shared()
+    response = client.get(url, headers=headers)
 
     if response.status_code == 200:
         if writeEnabled:
@@ -29,14 +31,36 @@ def get_battle_log(player_tag, API_KEY, BASE_URL, writeEnabled=False):
         return {"error": response.status_code, "message": response.text}
 
 
+async def get_battle_log_async(player_tag, API_KEY, BASE_URL, client):
+    """Same as get_battle_log, awaited on an AsyncBrawlStarsApiClient."""
+    player_tag = player_tag.replace("#", "%23")  # Encode '#' as '%23'
+    url = f"{BASE_URL}/players/{player_tag}/battlelog"
+
+    headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "application/json"}
+
+    response = await client.get(url, headers=headers)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        return {"error": response.status_code, "message": response.text}
+
+
 def get_all_battles_from_tag(
-    player_tag, postgreService, brawlers, API_KEY, BASE_URL, writeEnabled=False
+    player_tag,
+    postgreService,
+    brawlers,
+    API_KEY,
+    BASE_URL,
+    writeEnabled=False,
+    client=None,
 ):
     data = get_battle_log(
         player_tag=player_tag,
         API_KEY=API_KEY,
         BASE_URL=BASE_URL,
         writeEnabled=writeEnabled,
+        client=client,
     )
     try:
         for rawBattle in data["items"]:
@@ -46,16 +70,28 @@ def get_all_battles_from_tag(
 
 
 # =========== Account Brawlers ===========
-def get_account_brawlers(player_tag, API_KEY, BASE_URL, writeEnabled=False):
+def normalize_player_tag(player_tag):
+    """#-prefixed uppercase tag, with O read as 0 (tags never contain an O)."""
+    return "#" + player_tag.strip().lstrip("#").upper().replace("O", "0")
+
+
+def get_account_url(player_tag, BASE_URL):
     if not player_tag.startswith("#"):
         player_tag = "#" + player_tag
 
     player_tag = player_tag.replace("#", "%23")  # Encode '#' as '%23'
-    url = f"{BASE_URL}/players/{player_tag}"
+    return f"{BASE_URL}/players/{player_tag}"
+
+
+def get_account_brawlers(
+    player_tag, API_KEY, BASE_URL, writeEnabled=False, client=None
+):
+    url = get_account_url(player_tag, BASE_URL)
 
     headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "application/json"}
 
-    response = requests.get(url, headers=headers)
+    client = client or BrawlStarsApiClient.shared()
+    response = client.get(url, headers=headers)
 
     if response.status_code == 200:
         return response.json()
@@ -63,6 +99,50 @@ def get_account_brawlers(player_tag, API_KEY, BASE_URL, writeEnabled=False):
         return {"error": response.status_code, "message": response.text}
 
 
+async def get_account_brawlers_async(player_tag, API_KEY, BASE_URL, client):
+    """Same as get_account_brawlers, awaited on an AsyncBrawlStarsApiClient."""
+    url = get_account_url(player_tag, BASE_URL)
+
+    headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "application/json"}
+
+    response = await client.get(url, headers=headers)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        return {"error": response.status_code, "message": response.text}
+
+
+def get_account_brawlers_cached(player_tag, API_KEY, BASE_URL, cache, client=None):
+    """
+    get_account_brawlers through a TTLCache keyed by normalized tag. Concurrent
+    calls for the same player share one upstream request and error responses
+    are never cached.
+    """
+    player_tag = normalize_player_tag(player_tag)
+    return cache.get_or_load(
+        player_tag,
+        lambda: get_account_brawlers(
+            player_tag=player_tag, API_KEY=API_KEY, BASE_URL=BASE_URL, client=client
+        ),
+        cacheable=lambda account: "error" not in account,
+    )
+
+
+async def get_account_brawlers_cached_async(
+    player_tag, API_KEY, BASE_URL, cache, client
+):
+    """Same as get_account_brawlers_cached, awaited on an AsyncBrawlStarsApiClient."""
+    player_tag = normalize_player_tag(player_tag)
+    return await cache.get_or_load_async(
+        player_tag,
+        lambda: get_account_brawlers_async(
+            player_tag=player_tag, API_KEY=API_KEY, BASE_URL=BASE_URL, client=client
+        ),
+        cacheable=lambda account: "error" not in account,
+    )
+
+
 def get_brawlers_with_high_power(data):
     # Initialize an empty list to store the names of brawlers with power greater than 10
     brawlers_with_high_power = []
@@ -116,6 +196,25 @@ def extract_players_from_battle(
 def transform_battle(
     postgreService, brawlers, b: Dict[str, Any], insertNewPlayers=True
 ) -> Dict[str, Any]:
+    rows = extract_battle(brawlers, b, insertNewPlayers=insertNewPlayers)
+    if rows is None:
+        return
+
+    battle, players = rows
+    for player in players:
+        postgreService.insert_or_update_player(*player)
+    postgreService.insert_battle_stats(*battle)
+
+
+def extract_battle(brawlers, b: Dict[str, Any], insertNewPlayers=True):
+    """
+    Database rows of a raw battle, without writing them.
+
+    Returns:
+        tuple: (battle, players) where battle holds the insert_battle_stats
+        arguments and players the insert_or_update_player arguments of every
+        player, or None if the battle is not ranked
+    """
     # Ignore any battles that are not ranked
     if b["battle"]["type"] not in ["soloRanked", "teamRanked"]:
         # print(f"Battle id ${b['event']['id']} is not a ranked game")
@@ -125,6 +224,7 @@ def transform_battle(
     avg_rank = 0
     wTeam = None
     lTeam = None
+    players = []
 
     if b["event"]["id"] == 0 and b["event"].get("map") is None:
         b["event"]["map"] = "Competition Entry"
@@ -167,8 +267,8 @@ def transform_battle(
                     max_rank = None
                     insert_date = current_date
                     last_update_date = current_date
-                    postgreService.insert_or_update_player(
-                        tag, last_rank, max_rank, insert_date, last_update_date
+                    players.append(
+                        (tag, last_rank, max_rank, insert_date, last_update_date)
                     )
 
     avg_rank = round(math.floor(avg_rank / 6), 1)
@@ -205,9 +305,8 @@ def transform_battle(
 
     #  def insert_battle_stats(self, id, timestamp, map, mode, avg_rank, wTeam, lTeam, result):
 
-    postgreService.insert_battle_stats(
-        id, timestamp, map, mode, avg_rank, wTeam, lTeam, current_date
-    )
+    battle = (id, timestamp, map, mode, avg_rank, wTeam, lTeam, current_date)
+    return battle, players
 
 
 def check_brawler_name(name):
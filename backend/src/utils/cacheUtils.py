@@ -0,0 +1,229 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+import asyncio
+import threading
+import time
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache whose entries are tagged with a version.
+
+    Entries are evicted when the cache is full (least recently used first) and
+    when the active version changes, so a model reload never serves stale values.
+    """
+
+    def __init__(self, maxsize=4096, version=None):
+        self.maxsize = maxsize
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry_key = (self.version, key)
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return self._entries[entry_key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            entry_key = (self.version, key)
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set_version(self, version):
+        """Switch the active version and evict every entry of other versions."""
+        with self._lock:
+            self.version = version
+            stale_keys = [key for key in self._entries if key[0] != version]
+            for key in stale_keys:
+                del self._entries[key]
+            self.evictions += len(stale_keys)
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class TTLCache:
+    """
+    Thread-safe bounded cache whose entries expire ttl seconds after being stored.
+
+    get_or_load is single-flight: while a key is being loaded, concurrent
+    callers for the same key wait for that load instead of starting their own.
+    Values rejected by cacheable are handed to every waiter but not stored.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._async_loading = {}
+        self._lock = threading.Lock()
+
+    def lookup_entry(self, key):
+        """(found, value) of a fresh entry, called with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def store_entry(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self.lookup_entry(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self.store_entry(key, value)
+
+    def get_or_load(self, key, loader, cacheable=None):
+        """
+        Cached value of key, or the result of loader() shared with every
+        concurrent caller of the same key.
+
+        Raises:
+            Exception: The exception raised by loader, for every waiting caller
+        """
+        with self._lock:
+            found, value = self.lookup_entry(key)
+            if found:
+                self.hits += 1
+                return value
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if cacheable is None or cacheable(value):
+                self.store_entry(key, value)
+            del self._loading[key]
+        future.set_result(value)
+        return value
+
+    async def get_or_load_async(self, key, loader, cacheable=None):
+        """Same as get_or_load for a coroutine function loader, on one event loop."""
+        with self._lock:
+            found, value = self.lookup_entry(key)
+            if found:
+                self.hits += 1
+                return value
+            future = self._async_loading.get(key)
+            owner = future is None
+            if owner:
+                future = asyncio.get_running_loop().create_future()
+                self._async_loading[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            # A cancelled waiter must not cancel the load the others wait for
+            return await asyncio.shield(future)
+
+        try:
+            value = await loader()
+        except BaseException as e:
+            with self._lock:
+                del self._async_loading[key]
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+
+        with self._lock:
+            if cacheable is None or cacheable(value):
+                self.store_entry(key, value)
+            del self._async_loading[key]
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,25 @@
+import numpy as np
+
+
+def softmax(logits):
+    """Row-wise softmax of a (batch, n) float32 array."""
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def topk(scores, k):
+    """
+    Indices and values of the k highest scores of every row, best first.
+
+    Returns:
+        tuple: (indices, values), both of shape (batch, k)
+    """
+    if k < scores.shape[1]:
+        # Partition first so only k columns per row need sorting
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
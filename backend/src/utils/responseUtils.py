@@ -0,0 +1,65 @@
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:
+    # Optional, payloads are only precompressed with gzip without it
+    brotli = None
+
+
+def serialize_json(data):
+    """JSON bytes exactly as Flask's jsonify sends them."""
+    return (json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+
+class CachedPayload:
+    """
+    JSON response body serialized once, with its compressed variants and ETags.
+
+    The body is byte for byte what Flask's jsonify would send (sorted keys,
+    compact separators, trailing newline), so serving it changes nothing for
+    clients.
+    """
+
+    def __init__(self, data):
+        self.body = serialize_json(data)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+        # Tiny bodies can grow when compressed, only keep smaller variants
+        gzip_body = gzip.compress(self.body, mtime=0)
+        self.gzip_body = gzip_body if len(gzip_body) < len(self.body) else None
+        self.gzip_etag = f"{self.etag}-gzip"
+
+        self.br_body = None
+        if brotli is not None:
+            br_body = brotli.compress(self.body)
+            self.br_body = br_body if len(br_body) < len(self.body) else None
+        self.br_etag = f"{self.etag}-br"
+
+    def encoded(self, accept_encodings):
+        """
+        Smallest variant the client accepts.
+
+        Returns:
+            tuple: (body, etag, content encoding or None for the plain body)
+        """
+        if self.br_body is not None and "br" in accept_encodings:
+            return self.br_body, self.br_etag, "br"
+        if self.gzip_body is not None and "gzip" in accept_encodings:
+            return self.gzip_body, self.gzip_etag, "gzip"
+        return self.body, self.etag, None
+
+
+class PayloadIndex:
+    """Pre-serialized payloads of a data source, keyed by map name."""
+
+    def __init__(self, payloads, all_payload=None):
+        self.payloads = {key: CachedPayload(data) for key, data in payloads.items()}
+        self.all_payload = (
+            CachedPayload(all_payload) if all_payload is not None else None
+        )
+
+    def get(self, key, default=None):
+        return self.payloads.get(key, default)
@@ -1,13 +1,30 @@
 import os
 import sys
 import json
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from flask import Flask
 
 # Add the parent directory to the path so we can import the app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app import app, neuralNetworkService, appConfig
+from app import app, neuralNetworkService, appConfig, accountCache, modelRegistry
+from src.model.BrawlerCatalog import BrawlerCatalog
+
+
+def serve_version(tier_list=None, battle_stats=None, **fields):
+    """Patch the active model version, its payloads built from the data as on load."""
+    active = modelRegistry.active
+    with patch("builtins.print"):
+        modelVersion = modelRegistry.build_version(
+            active.version,
+            active.service,
+            active.data_game_version,
+            tier_list=tier_list,
+            battle_stats=battle_stats,
+        )
+    return patch.object(modelRegistry, "active", modelVersion._replace(**fields))
 
 
 class TestFlaskApp(unittest.TestCase):
@@ -17,6 +34,7 @@ class TestFlaskApp(unittest.TestCase):
         """Set up test client and other test variables."""
         self.app = app.test_client()
         self.app.testing = True
+        accountCache.clear()
 
         # Mock data for tests
         self.mock_brawlers = [
@@ -29,7 +47,7 @@ class TestFlaskApp(unittest.TestCase):
         self.mock_top10_brawlers = [("SHELLY", 0.9876), ("COLT", 0.8765)]
 
         self.mock_tier_list = [
-            {"mapName": "Gem Grab", "tierList": {"S": ["SHELLY"], "A": ["COLT"]}}
+            {"mapName": "Gem Grab", "tierList": [["SHELLY", 7.8], ["COLT", 6.2]]}
         ]
 
         self.mock_game_versions = ["1.0", "1.1", "1.2"]
@@ -45,31 +63,125 @@ class TestFlaskApp(unittest.TestCase):
     def test_index_route(self):
         """Test the index route."""
         with patch.object(
-            appConfig,
-            "data_index",
-            {"brawlers": self.mock_brawlers, "maps": self.mock_maps},
+            appConfig, "data_index", {"maps": self.mock_maps}
+        ), patch.object(
+            appConfig, "brawler_catalog", BrawlerCatalog(self.mock_brawlers)
         ):
             response = self.app.get("/")
             self.assertEqual(response.status_code, 200)
 
     def test_get_brawlers(self):
         """Test the get_brawlers endpoint."""
-        with patch.object(appConfig, "data_index", {"brawlers": self.mock_brawlers}):
+        with patch.object(
+            appConfig, "brawler_catalog", BrawlerCatalog(self.mock_brawlers)
+        ):
             response = self.app.get("/get_brawlers")
             self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json(), self.mock_brawlers)
 
     def test_get_maps(self):
         """Test the get_maps endpoint."""
-        with patch.object(appConfig, "data_maps", self.mock_maps):
+        with serve_version(data_maps=self.mock_maps):
             response = self.app.get("/get_maps")
             self.assertEqual(response.status_code, 200)
 
     def test_get_game_versions(self):
         """Test the get_game_versions endpoint."""
-        with patch.object(appConfig, "data_game_version", self.mock_game_versions):
+        with serve_version(data_game_version=self.mock_game_versions):
             response = self.app.get("/get_game_versions")
             self.assertEqual(response.status_code, 200)
 
+    def test_get_cache_stats(self):
+        """Test the get_cache_stats endpoint."""
+        response = self.app.get("/get_cache_stats")
+        self.assertEqual(response.status_code, 200)
+
+        stats = json.loads(response.data)
+        self.assertIn("hits", stats)
+        self.assertIn("misses", stats)
+        self.assertEqual(stats["version"], neuralNetworkService.version)
+
+    def test_get_model_versions(self):
+        """Test the get_model_versions endpoint."""
+        response = self.app.get("/get_model_versions")
+        self.assertEqual(response.status_code, 200)
+
+        stats = json.loads(response.data)
+        self.assertEqual(stats["active_version"], neuralNetworkService.version)
+        self.assertIn(neuralNetworkService.version, stats["available_versions"])
+
+    def test_hot_swap_new_version(self):
+        """Test that a version published while serving is swapped in for new requests."""
+        import torch
+
+        active = modelRegistry.active
+        published = {
+            **active.data_game_version,
+            "version": "99_1",
+            "date": "2099-01-01",
+        }
+        draft = {
+            "map": "Belle's Rock",
+            "initial_team": ["COLT", "SHELLY"],
+            "initial_opponent": ["SPIKE", "BULL", "CROW"],
+        }
+
+        with tempfile.TemporaryDirectory() as model_dir, patch.object(
+            modelRegistry, "model_dir", model_dir
+        ), patch.object(
+            appConfig,
+            "data_all_game_version",
+            appConfig.data_all_game_version + [published],
+        ), patch.object(
+            appConfig, "setDataGameVersion"
+        ), patch.object(
+            appConfig, "logs_level", 0
+        ), patch(
+            "builtins.print"
+        ):
+            source_dir = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                "data",
+                "model",
+                f"version_{active.version}",
+            )
+            for version in (active.version, "99_1"):
+                os.makedirs(modelRegistry.version_dir(version))
+                for name in ("mappings.pkl", "nn_model_all.pth", "counter_matrix.npy"):
+                    shutil.copy(
+                        os.path.join(source_dir, name),
+                        modelRegistry.version_dir(version),
+                    )
+            # Same vocabulary, opposite recommendations
+            model_path = os.path.join(
+                modelRegistry.version_dir("99_1"), "nn_model_all.pth"
+            )
+            state_dict = torch.load(model_path)
+            state_dict["fc2.weight"] = -state_dict["fc2.weight"]
+            state_dict["fc2.bias"] = -state_dict["fc2.bias"]
+            torch.save(state_dict, model_path)
+
+            before = self.app.post("/simulate_draft", json=draft).get_json()
+            try:
+                self.assertTrue(modelRegistry.refresh())
+                stats = self.app.get("/get_model_versions").get_json()
+                game_version = self.app.get("/get_game_versions").get_json()
+                after = self.app.post("/simulate_draft", json=draft).get_json()
+            finally:
+                modelRegistry.swap(active)
+
+        self.assertEqual(stats["active_version"], "99_1")
+        self.assertEqual(stats["available_versions"], [active.version, "99_1"])
+        self.assertEqual(game_version["version"], "99_1")
+        self.assertNotEqual(after[0][0][0], before[0][0][0])
+        self.assertIs(modelRegistry.service, neuralNetworkService)
+
+    def test_get_inference_stats(self):
+        """Test the get_inference_stats endpoint."""
+        response = self.app.get("/get_inference_stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("running", json.loads(response.data))
+
     def test_simulate_draft(self):
         """Test the simulate_draft endpoint."""
         with patch.object(
@@ -93,6 +205,43 @@ class TestFlaskApp(unittest.TestCase):
                     )
                     self.assertEqual(response.status_code, 200)
 
+    def test_simulate_draft_batch(self):
+        """Test the simulate_draft_batch endpoint."""
+        with patch.object(
+            neuralNetworkService,
+            "predict_best_brawler_batch",
+            return_value=[self.mock_top10_brawlers, []],
+        ) as mock_batch:
+            with patch.object(
+                appConfig, "data_index", {"brawlers": self.mock_brawlers}
+            ):
+                with patch.object(appConfig, "logs_level", 0):
+                    draft = {
+                        "map": "Gem Grab",
+                        "available_brawlers": ["shelly", "COLT"],
+                        "excluded_brawlers": [],
+                        "initial_team": ["SHELLY"],
+                        "initial_opponent": ["COLT"],
+                    }
+                    data = {"drafts": [draft, draft]}
+                    response = self.app.post(
+                        "/simulate_draft_batch",
+                        json=data,
+                        content_type="application/json",
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+                    result = json.loads(response.data)
+                    self.assertEqual(len(result), 2)
+                    self.assertEqual(result[0][0][0], ["SHELLY", 0.9876])
+                    self.assertEqual(result[1], [])
+
+                    drafts = mock_batch.call_args[0][0]
+                    self.assertEqual(len(drafts), 2)
+                    self.assertEqual(
+                        drafts[0]["available_brawlers"], ["SHELLY", "COLT"]
+                    )
+
     def test_predict_winrate(self):
         """Test the predict_winrate endpoint."""
         with patch.object(neuralNetworkService, "predict_winrate", return_value=0.67):
@@ -108,14 +257,45 @@ class TestFlaskApp(unittest.TestCase):
                 self.assertEqual(response.status_code, 200)
                 self.assertEqual(response.data.decode(), "0.67")
 
+    def test_predict_winrate_batch(self):
+        """Test the predict_winrate_batch endpoint."""
+        with patch.object(
+            neuralNetworkService, "predict_winrate_batch", return_value=[0.67, 0.33]
+        ) as mock_batch:
+            matchup = {
+                "map": "Gem Grab",
+                "initial_team": ["shelly"],
+                "initial_opponent": ["COLT"],
+            }
+            data = {"matchups": [matchup, matchup]}
+            response = self.app.post(
+                "/predict_winrate_batch", json=data, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.data), [0.67, 0.33])
+            self.assertEqual(mock_batch.call_args[0][0][0]["friends"], ["SHELLY"])
+
     def test_tier_list(self):
         """Test the tier_list endpoint."""
-        with patch.object(appConfig, "data_tier_list", self.mock_tier_list):
+        with serve_version(tier_list=self.mock_tier_list):
             data = {"map": "Gem Grab"}
             response = self.app.post(
                 "/tier_list", json=data, content_type="application/json"
             )
             self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json(), [["SHELLY", 7.8], ["COLT", 6.2]])
+
+    def test_tier_list_unknown_map(self):
+        """Test that the tier_list endpoint returns 404 for an unknown map."""
+        with serve_version(tier_list=self.mock_tier_list):
+            response = self.app.get("/tier_list?map=Unknown")
+            self.assertEqual(response.status_code, 404)
+
+            etag = self.app.get("/tier_list?map=Gem Grab").headers["ETag"]
+            response = self.app.get(
+                "/tier_list?map=Gem Grab", headers={"If-None-Match": etag}
+            )
+            self.assertEqual(response.status_code, 304)
 
     def test_stats(self):
         """Test the stats endpoint."""
@@ -124,13 +304,64 @@ class TestFlaskApp(unittest.TestCase):
         mock_df.__eq__.return_value = mock_df
         mock_df.to_dict.return_value = self.mock_stats
 
-        with patch.object(appConfig, "battle_stats", mock_df):
+        with serve_version(battle_stats=mock_df):
             data = {"map": "Gem Grab"}
             response = self.app.post(
                 "/stats", json=data, content_type="application/json"
             )
             self.assertEqual(response.status_code, 200)
 
+    def test_stats_cached_payload(self):
+        """Test that /stats serves the pre-serialized payload with its ETag."""
+        mock_df = MagicMock()
+        mock_df.to_dict.return_value = [
+            {"map": "Hard Rock Mine", "brawler": f"BRAWLER_{i}", "winRate": 0.5}
+            for i in range(50)
+        ]
+
+        with serve_version(battle_stats=mock_df):
+            response = self.app.get("/stats?map=Hard Rock Mine")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.get_json()), 50)
+            etag = response.headers["ETag"]
+
+            response = self.app.get(
+                "/stats?map=Hard Rock Mine", headers={"If-None-Match": etag}
+            )
+            self.assertEqual(response.status_code, 304)
+
+            response = self.app.get(
+                "/stats?map=Hard Rock Mine", headers={"Accept-Encoding": "gzip"}
+            )
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+
+            response = self.app.post("/stats", json={"map": "Unknown"})
+            self.assertEqual(response.get_json(), [])
+
+    def test_account_profile_is_shared(self):
+        """Test that both account endpoints share one upstream profile call."""
+        account = {
+            "brawlers": [
+                {
+                    "name": "SHELLY",
+                    "power": 10,
+                    "gears": [],
+                    "starPowers": [{"id": 1}],
+                    "gadgets": [],
+                }
+            ]
+        }
+        with patch(
+            "app.battlesUtils.get_account_brawlers", return_value=account
+        ) as mock_fetch, serve_version(tier_list=[]):
+            self.app.post("/account", json={"player_tag": "#abc"})
+            response = self.app.post(
+                "/account-upgrade-helper", json={"player_tag": "ABC"}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(mock_fetch.call_count, 1)
+            self.assertEqual(mock_fetch.call_args.kwargs["player_tag"], "#ABC")
+
     def test_account(self):
         """Test the account endpoint."""
         with patch("app.battlesUtils.get_account_brawlers", return_value={}):
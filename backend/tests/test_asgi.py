@@ -0,0 +1,143 @@
+import os
+import sys
+import asyncio
+import unittest
+import httpx
+from unittest.mock import patch, AsyncMock
+from starlette.testclient import TestClient
+
+# Add the parent directory to the path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from asgi import app as asgiApp
+from app import app, neuralNetworkService, appConfig, accountCache, modelRegistry
+
+
+def serve_version(tier_list=None, battle_stats=None, **fields):
+    """Patch the active model version, its payloads built from the data as on load."""
+    active = modelRegistry.active
+    with patch("builtins.print"):
+        modelVersion = modelRegistry.build_version(
+            active.version,
+            active.service,
+            active.data_game_version,
+            tier_list=tier_list,
+            battle_stats=battle_stats,
+        )
+    return patch.object(modelRegistry, "active", modelVersion._replace(**fields))
+
+
+class TestAsgiApp(unittest.TestCase):
+    """Test cases for the async entry point."""
+
+    def setUp(self):
+        """Set up test clients and other test variables."""
+        self.client = TestClient(asgiApp)
+        self.client.__enter__()
+        self.flask_client = app.test_client()
+        accountCache.clear()
+
+        self.mock_top10_brawlers = [("SHELLY", 0.9876), ("COLT", 0.8765)]
+        self.mock_tier_list = [
+            {"mapName": "Gem Grab", "tierList": [["SHELLY", 7.8], ["COLT", 6.2]]}
+        ]
+        self.mock_account = {
+            "brawlers": [
+                {
+                    "name": "SHELLY",
+                    "power": 10,
+                    "gears": [],
+                    "starPowers": [{"id": 1}],
+                    "gadgets": [],
+                }
+            ]
+        }
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+
+    def test_simulate_draft_matches_flask(self):
+        """Test that simulate_draft answers the same bytes as app.py."""
+        data = {
+            "map": "Gem Grab",
+            "available_brawlers": [],
+            "excluded_brawlers": [],
+            "initial_team": ["SHELLY"],
+            "initial_opponent": ["COLT"],
+        }
+        with patch.object(
+            neuralNetworkService,
+            "predict_best_brawler",
+            return_value=self.mock_top10_brawlers,
+        ), patch.object(
+            neuralNetworkService, "lookup_opening_picks", return_value=None
+        ), patch.object(
+            appConfig, "logs_level", 0
+        ):
+            response = self.client.post("/simulate_draft", json=data)
+            flask_response = self.flask_client.post("/simulate_draft", json=data)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, flask_response.data)
+
+    def test_tier_list(self):
+        """Test the tier_list endpoint with conditional GET."""
+        with serve_version(tier_list=self.mock_tier_list):
+            response = self.client.get("/tier_list?map=Gem Grab")
+            self.assertEqual(response.json(), [["SHELLY", 7.8], ["COLT", 6.2]])
+
+            response = self.client.get(
+                "/tier_list?map=Gem Grab",
+                headers={"If-None-Match": response.headers["ETag"]},
+            )
+            self.assertEqual(response.status_code, 304)
+
+            response = self.client.post("/tier_list", json={"map": "Unknown"})
+            self.assertEqual(response.status_code, 404)
+
+    def test_account_upgrade_helper_awaits_api(self):
+        """Test that the upgrade helper awaits the Brawl Stars API call."""
+        with patch(
+            "asgi.battlesUtils.get_account_brawlers_async",
+            new=AsyncMock(return_value=self.mock_account),
+        ) as mock_fetch, serve_version(
+            tier_list=[{"mapName": "Gem Grab", "tierList": [["SHELLY", 1.5]]}]
+        ):
+            response = self.client.post(
+                "/account-upgrade-helper", json={"player_tag": "12345"}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()[0]["score"], 1.5)
+            mock_fetch.assert_awaited_once()
+
+    def test_slow_account_does_not_block_drafts(self):
+        """Test that a pending API call leaves the draft routes responsive."""
+
+        async def slow_account(**kwargs):
+            await asyncio.sleep(0.5)
+            return self.mock_account
+
+        async def requests():
+            transport = httpx.ASGITransport(app=asgiApp)
+            async with asgiApp.router.lifespan_context(asgiApp), httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                account = asyncio.create_task(
+                    client.post("/account", json={"player_tag": "12345"})
+                )
+                await asyncio.sleep(0.05)
+                response = await client.post("/predict_winrate", json=data)
+                account_pending = not account.done()
+                return response, account_pending, await account
+
+        data = {"map": "Gem Grab", "initial_team": ["SHELLY"], "initial_opponent": []}
+        with patch(
+            "asgi.battlesUtils.get_account_brawlers_async", new=slow_account
+        ), patch.object(neuralNetworkService, "predict_winrate", return_value=0.6):
+            response, account_pending, account = asyncio.run(requests())
+
+        self.assertEqual(response.text, "0.6")
+        self.assertTrue(account_pending)
+        self.assertEqual(account.json(), ["SHELLY"])
+
+
+if __name__ == "__main__":
+    unittest.main()
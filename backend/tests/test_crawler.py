@@ -0,0 +1,231 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.service.BattleCrawler import BattleCrawler
+
+
+def ranked_battle(
+    battle_type="soloRanked", battle_time="20250101T120000.000Z", tags=None
+):
+    """Raw battle of the API between two teams of the same players."""
+    players = [
+        {
+            "tag": tag,
+            "brawler": {"id": 1, "name": "SHELLY", "trophies": 10, "power": 11},
+        }
+        for tag in tags or ["#P0", "#P1", "#P2"]
+    ]
+    return {
+        "battleTime": battle_time,
+        "event": {"id": 1, "mode": "gemGrab", "map": "Gem Fort"},
+        "battle": {
+            "type": battle_type,
+            "result": "victory",
+            "duration": 120,
+            "teams": [players, players],
+        },
+    }
+
+
+class FakeBattleLogClient:
+    """AsyncBrawlStarsApiClient answering battle logs, 404 for BAD and 503 for DOWN."""
+
+    def __init__(self, logs=None):
+        self.logs = logs
+        self.calls = []
+
+    async def get(self, url, headers=None):
+        self.calls.append(url)
+        if "BAD" in url:
+            return MagicMock(status_code=404, text="not found")
+        if "DOWN" in url:
+            return MagicMock(status_code=503, text="unavailable")
+        if self.logs is None:
+            items = [ranked_battle(), ranked_battle("friendly"), {"battle": {}}]
+        else:
+            items = self.logs[url.split("%23")[-1].split("/")[0]]
+        return MagicMock(status_code=200, json=lambda: {"items": items})
+
+
+class TestBattleCrawler(unittest.TestCase):
+    """Test cases for the battle crawler pipeline."""
+
+    def crawl(
+        self,
+        tags,
+        checkpoint_path=None,
+        logs=None,
+        write_battles=None,
+        batch_size=1,
+        client=None,
+        **options,
+    ):
+        """Crawl the tags with a fake API and database, returns them and the stats."""
+        client = client or FakeBattleLogClient(logs)
+        postgreService = MagicMock()
+        postgreService.write_battles.side_effect = write_battles or (
+            lambda battles, players: (len(battles), len(players))
+        )
+        crawler = BattleCrawler(
+            postgreService,
+            {},
+            "key",
+            "https://api.example.com/v1",
+            client,
+            fetch_concurrency=2,
+            queue_size=2,
+            batch_size=batch_size,
+            checkpoint_path=checkpoint_path,
+            progress_interval=0,
+            **options,
+        )
+        with patch("builtins.print"):
+            stats = asyncio.run(crawler.run(tags))
+        return client, postgreService, stats
+
+    def test_battle_crawler_resumes(self):
+        """Test that the crawler writes new ranked battles and skips checkpointed tags."""
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_path = os.path.join(tmp, "checkpoint.txt")
+
+            def crawl(tags):
+                return self.crawl(tags, checkpoint_path)
+
+            client, postgreService, stats = crawl(["#A", "#B", "#DOWN"])
+            self.assertEqual(stats["tags_done"], 2)
+            self.assertEqual(stats["fetch_errors"], 1)
+            self.assertEqual(stats["tags_failed"], 0)
+            self.assertEqual(stats["battles_unranked"], 2)
+            self.assertEqual(stats["transform_errors"], 2)
+            # Both logs hold the same battle, and its players are repeated
+            self.assertEqual(stats["battles_written"], 1)
+            self.assertEqual(stats["battles_duplicate"], 1)
+            self.assertEqual(stats["players_duplicate"], 3)
+            players = [
+                player
+                for call in postgreService.write_battles.call_args_list
+                for player in call.args[1]
+            ]
+            self.assertEqual(sorted(p[0] for p in players), ["#P0", "#P1", "#P2"])
+            self.assertTrue(os.path.exists(checkpoint_path))
+
+            # Only the tags that were not written are fetched again, an unknown
+            # tag is tried once
+            tags = ["#A", "#B", "#BAD", "#C"]
+            client, postgreService, stats = crawl(tags)
+            self.assertEqual(stats["tags_skipped"], 2)
+            self.assertEqual(len(client.calls), 2)
+            self.assertEqual(stats["tags_done"], 1)
+            self.assertEqual(stats["tags_failed"], 1)
+            # The crawl is finished once every tag is written or failed
+            self.assertFalse(os.path.exists(checkpoint_path))
+
+            # So the next crawl fetches everyone again
+            client, postgreService, stats = crawl(tags)
+            self.assertEqual(stats["tags_skipped"], 0)
+            self.assertEqual(len(client.calls), 4)
+            self.assertEqual(stats["tags_done"], 3)
+            self.assertEqual(stats["tags_failed"], 1)
+            self.assertFalse(os.path.exists(checkpoint_path))
+
+    def test_battle_crawler_isolates_bad_rows(self):
+        """Test that a failed batch is written again log by log, failing only its player."""
+        logs = {
+            tag: [
+                ranked_battle(
+                    battle_time=f"2025010{day}T120000.000Z",
+                    tags=[f"#{tag}{i}" for i in range(3)],
+                )
+            ]
+            for day, tag in enumerate(["A", "B", "C"], start=1)
+        }
+
+        def write_battles(battles, players):
+            if any(battle[1][0].startswith("20250103") for battle in battles):
+                raise ValueError("value too long for type character varying")
+            return len(battles), len(players)
+
+        client, postgreService, stats = self.crawl(
+            ["#A", "#B", "#C"], logs=logs, write_battles=write_battles, batch_size=100
+        )
+        self.assertEqual(stats["tags_done"], 2)
+        self.assertEqual(stats["battles_written"], 2)
+        self.assertEqual(stats["players_written"], 6)
+        # The whole batch, then each of its 3 logs
+        self.assertEqual(postgreService.write_battles.call_count, 4)
+        self.assertEqual(stats["write_errors"], 2)
+
+    def test_battle_crawler_rewrites_failed_battles(self):
+        """Test that battles of a failed write are written by a later log holding them."""
+        failed = threading.Event()
+
+        class FailedFirstClient(FakeBattleLogClient):
+            async def get(self, url, headers=None):
+                # B is fetched once the write of A has failed
+                while "%23B" in url and not failed.is_set():
+                    await asyncio.sleep(0.001)
+                return await super().get(url, headers)
+
+        def write_battles(battles, players):
+            if not failed.is_set():
+                failed.set()
+                raise ConnectionError("server closed the connection")
+            return len(battles), len(players)
+
+        client, postgreService, stats = self.crawl(
+            ["#A", "#B"],
+            write_battles=write_battles,
+            client=FailedFirstClient(),
+        )
+        self.assertEqual(stats["write_errors"], 1)
+        self.assertEqual(stats["battles_duplicate"], 0)
+        self.assertEqual(stats["battles_written"], 1)
+        self.assertEqual(stats["players_written"], 3)
+        battles, players = postgreService.write_battles.call_args.args
+        self.assertEqual(
+            battles, postgreService.write_battles.call_args_list[0].args[0]
+        )
+        self.assertEqual(sorted(p[0] for p in players), ["#P0", "#P1", "#P2"])
+
+    def test_battle_crawler_resumes_failed_duplicates(self):
+        """Test that a log whose duplicates failed to write is fetched again on resume."""
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_path = os.path.join(tmp, "checkpoint.txt")
+            calls = []
+
+            def write_battles(battles, players):
+                # The batch of A and B, then A alone, fail
+                calls.append(battles)
+                if len(calls) <= 2:
+                    raise ConnectionError("server closed the connection")
+                return len(battles), len(players)
+
+            client, postgreService, stats = self.crawl(
+                ["#A", "#B"],
+                checkpoint_path,
+                write_battles=write_battles,
+                batch_size=100,
+            )
+            # B only held the battle of A, so it is written but not checkpointed
+            self.assertEqual(stats["tags_done"], 1)
+            self.assertEqual(stats["battles_written"], 0)
+            self.assertEqual(calls[-1], [])
+
+            client, postgreService, stats = self.crawl(
+                ["#A", "#B"], checkpoint_path, batch_size=100
+            )
+            self.assertEqual(stats["tags_skipped"], 0)
+            self.assertEqual(len(client.calls), 2)
+            self.assertEqual(stats["battles_written"], 1)
+            self.assertFalse(os.path.exists(checkpoint_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,372 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.model.NumpyBrawlerPredictionModel import NumpyBrawlerPredictionModel
+from src.service.InferenceScheduler import InferenceScheduler
+from src.service.NeuralNetworkService import NeuralNetworkService
+from src.service.NeuralNetworkTrainingService import NeuralNetworkTrainingService
+
+MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "model",
+    "version_36_1",
+)
+
+# Predictions of the shipped model before any serving optimization, for drafts
+# whose picks are not in alphabetical order
+BASELINE_DRAFTS = [
+    (
+        ["COLT", "SHELLY"],
+        ["SPIKE", "BULL", "CROW"],
+        "Belle's Rock",
+        [
+            ("BROCK", 6.2231),
+            ("EDGAR", 5.8066),
+            ("RICO", 4.947),
+            ("GENE", 4.3851),
+            ("DARRYL", 3.9863),
+        ],
+        49.63,
+    ),
+    (
+        ["SPIKE", "BULL"],
+        ["SHELLY"],
+        "Below Zero",
+        [
+            ("MORTIS", 5.367),
+            ("STU", 4.934),
+            ("MAX", 4.7372),
+            ("CHESTER", 4.5118),
+            ("MELODIE", 4.1699),
+        ],
+        50.72,
+    ),
+    (
+        ["CROW", "COLT", "SHELLY"],
+        ["PIPER", "BULL"],
+        "Center Stage",
+        [
+            ("CHESTER", 6.5426),
+            ("SURGE", 6.3728),
+            ("TARA", 4.4562),
+            ("NITA", 4.394),
+            ("RICO", 4.3527),
+        ],
+        51.51,
+    ),
+]
+
+
+def load_service(model_format="torch", model_dir=MODEL_DIR, **kwargs):
+    with patch("builtins.print"):
+        return NeuralNetworkService(
+            data_path=os.path.join(model_dir, "mappings.pkl"),
+            model_path=os.path.join(model_dir, "nn_model_all.pth"),
+            device="cpu",
+            version="36_1",
+            model_format=model_format,
+            **kwargs,
+        )
+
+
+class TestNeuralNetworkService(unittest.TestCase):
+    """Test cases for the prediction model serving."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = load_service()
+
+    def setUp(self):
+        self.service.prediction_cache.clear()
+
+    def test_unsorted_drafts_match_baseline(self):
+        """Test that picks are sent to the model in the order they were made."""
+        for friends, enemies, map_name, top5, winrate in BASELINE_DRAFTS:
+            result = self.service.predict_best_brawler(friends, enemies, map_name)
+            self.assertEqual([b for b, _ in result[:5]], [b for b, _ in top5])
+            for (_, score), (_, expected) in zip(result, top5):
+                self.assertAlmostEqual(score, expected, places=3)
+            self.assertEqual(
+                self.service.predict_winrate(friends, enemies, map_name), winrate
+            )
+
+    def test_cache_hit_matches_model(self):
+        """Test that cached predictions equal uncached ones, in any pick order."""
+        friends, enemies, map_name = BASELINE_DRAFTS[0][:3]
+        for order in (friends, friends[::-1]):
+            draft = {"friends": order, "enemies": enemies, "map_name": map_name}
+            uncached = self.service.infer_best_brawler_batch([draft])[0]
+            uncached_winrate = self.service.infer_winrate_batch([draft])[0]
+
+            for _ in range(2):
+                self.assertEqual(
+                    self.service.predict_best_brawler(order, enemies, map_name),
+                    uncached,
+                )
+                self.assertEqual(
+                    self.service.predict_winrate(order, enemies, map_name),
+                    uncached_winrate,
+                )
+
+        stats = self.service.prediction_cache.stats()
+        self.assertEqual(stats["misses"], 4)
+        self.assertEqual(stats["hits"], 4)
+
+    def test_opening_picks_match_model(self):
+        """Test that the opening picks table answers like the model."""
+        map_name = "Belle's Rock"
+        appConfig = SimpleNamespace(
+            data_maps=[{"name": map_name}],
+            PREDICTION_CACHE_SIZE=64,
+            brawler_catalog=None,
+        )
+        service = load_service()
+        with tempfile.TemporaryDirectory() as tmp, patch("builtins.print"), patch(
+            "src.service.NeuralNetworkTrainingService.tqdm",
+            side_effect=lambda items, **kwargs: items,
+        ):
+            trainer = NeuralNetworkTrainingService(
+                appConfig=appConfig,
+                data_path=os.path.join(MODEL_DIR, "mappings.pkl"),
+                model_path=os.path.join(MODEL_DIR, "nn_model_all.pth"),
+                device="cpu",
+                version="36_1",
+            )
+            trainer.opening_picks_path = os.path.join(tmp, "opening_picks.npz")
+            trainer.save_opening_picks(top_k=10)
+
+            service.opening_picks_path = trainer.opening_picks_path
+            service.load_opening_picks()
+        self.assertIsNotNone(service.opening_picks)
+
+        for friends, enemies in [([], []), (["SHELLY"], []), (["SHELLY"], ["COLT"])]:
+            looked_up = service.lookup_opening_picks(friends, enemies, map_name)
+            predicted = service.predict_best_brawler(friends, enemies, map_name)
+            self.assertEqual([b for b, _ in looked_up], [b for b, _ in predicted])
+            for (_, score), (_, expected) in zip(looked_up, predicted):
+                self.assertAlmostEqual(score, expected, places=4)
+
+        # States past the opening, or with filters, are left to the model
+        self.assertIsNone(
+            service.lookup_opening_picks(["SHELLY", "COLT"], [], map_name)
+        )
+        self.assertIsNone(
+            service.lookup_opening_picks(["SHELLY"], [], map_name, excluded=["COLT"])
+        )
+        self.assertIsNone(service.lookup_opening_picks(["SHELLY"], [], "Unknown"))
+
+
+class TestModelFormats(unittest.TestCase):
+    """Test that every MODEL_FORMAT answers like the torch model."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.torch_service = load_service()
+        friends, enemies, map_name = BASELINE_DRAFTS[0][:3]
+        cls.draft = {"friends": friends, "enemies": enemies, "map_name": map_name}
+        cls.inputs = cls.torch_service.encode_drafts([cls.draft])
+        cls.expected_logits = cls.torch_service.forward_logits(*cls.inputs)
+        cls.expected = cls.torch_service.infer_best_brawler_batch([cls.draft])[0]
+
+    def setUp(self):
+        """Export from a copy of the shipped model, so data/model is left as is."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.model_dir = tmp.name
+        for name in ("mappings.pkl", "nn_model_all.pth", "counter_matrix.npy"):
+            shutil.copy(os.path.join(MODEL_DIR, name), self.model_dir)
+
+        with patch("builtins.print"):
+            self.trainer = NeuralNetworkTrainingService(
+                data_path=os.path.join(self.model_dir, "mappings.pkl"),
+                model_path=os.path.join(self.model_dir, "nn_model_all.pth"),
+                device="cpu",
+                version="36_1",
+            )
+
+    def assert_matches_torch(self, model_format):
+        service = load_service(model_format, model_dir=self.model_dir)
+        np.testing.assert_allclose(
+            service.forward_logits(*self.inputs), self.expected_logits, atol=1e-5
+        )
+
+        result = service.infer_best_brawler_batch([self.draft])[0]
+        self.assertEqual([b for b, _ in result], [b for b, _ in self.expected])
+        for (_, score), (_, expected) in zip(result, self.expected):
+            self.assertAlmostEqual(score, expected, places=4)
+        return service
+
+    def test_torchscript_matches_torch(self):
+        """Test the frozen TorchScript export against the torch model."""
+        import torch
+
+        with patch("builtins.print"):
+            self.trainer.export_torchscript()
+        service = self.assert_matches_torch("torchscript")
+        self.assertIsInstance(service.model, torch.jit.ScriptModule)
+
+    def test_numpy_matches_torch(self):
+        """Test the NumPy npz export against the torch model."""
+        with patch("builtins.print"):
+            self.trainer.export_numpy_model()
+        service = self.assert_matches_torch("numpy")
+        self.assertIsInstance(service.model, NumpyBrawlerPredictionModel)
+
+    def test_artifact_matches_torch(self):
+        """Test the memory-mapped artifact export against the torch model."""
+        with patch("builtins.print"):
+            self.trainer.export_artifact()
+        # Only the artifact is exported, so the model can only come from it
+        self.assertFalse(os.path.exists(self.trainer.numpy_model_path))
+
+        service = self.assert_matches_torch("numpy")
+        self.assertIsInstance(service.model, NumpyBrawlerPredictionModel)
+        np.testing.assert_array_equal(
+            service.counter_matrix, self.torch_service.counter_matrix
+        )
+
+
+class TestInferenceScheduler(unittest.TestCase):
+    """Test cases for the micro-batching inference scheduler."""
+
+    def setUp(self):
+        self.service = MagicMock()
+        self.service.predict_best_brawler_batch.side_effect = (
+            lambda drafts, nbBrawlers: [draft["friends"] for draft in drafts]
+        )
+        self.scheduler = InferenceScheduler(self.service, max_wait_ms=50)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def block_service(self):
+        """Make the service wait for the returned event, once it has been entered."""
+        entered = threading.Event()
+        release = threading.Event()
+        predict = self.service.predict_best_brawler_batch.side_effect
+
+        def blocking_predict(drafts, nbBrawlers):
+            entered.set()
+            release.wait(1)
+            return predict(drafts, nbBrawlers)
+
+        self.service.predict_best_brawler_batch.side_effect = blocking_predict
+        return entered, release
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that queued requests run in one batch and get their own result."""
+        self.scheduler.start()
+        futures = [
+            self.scheduler.submit_draft({"friends": [f"B{i}"]}) for i in range(5)
+        ]
+
+        self.assertEqual([f.result(1) for f in futures], [[f"B{i}"] for i in range(5)])
+        self.service.predict_best_brawler_batch.assert_called_once()
+        self.assertEqual(self.scheduler.stats()["largest_batch"], 5)
+
+    def test_requests_use_their_model_version(self):
+        """Test that a request is run by the service it was submitted with."""
+        other = MagicMock()
+        other.predict_winrate_batch.side_effect = lambda matchups: [50.0] * len(
+            matchups
+        )
+        self.scheduler.start()
+
+        self.assertEqual(self.scheduler.predict_winrate({}, service=other), 50.0)
+        self.service.predict_winrate_batch.assert_not_called()
+
+    def test_model_errors_reach_every_caller(self):
+        """Test that a failed batch raises the model error in every caller."""
+        self.service.predict_best_brawler_batch.side_effect = ValueError("bad draft")
+        self.scheduler.start()
+        futures = [self.scheduler.submit_draft({"friends": []}) for _ in range(3)]
+
+        for future in futures:
+            with self.assertRaisesRegex(ValueError, "bad draft"):
+                future.result(1)
+
+    def test_timed_out_requests_are_not_computed(self):
+        """Test that a request abandoned by its caller is skipped by the worker."""
+        entered, release = self.block_service()
+        self.scheduler.request_timeout = 0.05
+        self.scheduler.start()
+        first = self.scheduler.submit_draft({"friends": ["A"]})
+        entered.wait(1)
+
+        with self.assertRaises(TimeoutError):
+            self.scheduler.predict_best_brawler({"friends": ["B"]})
+        release.set()
+
+        self.assertEqual(first.result(1), ["A"])
+        self.scheduler.stop()
+        self.assertEqual(self.service.predict_best_brawler_batch.call_count, 1)
+        self.assertEqual(self.scheduler.stats()["cancelled"], 1)
+
+    def test_stop_fails_queued_requests(self):
+        """Test that stopping the scheduler fails the requests still queued."""
+        entered, release = self.block_service()
+        self.scheduler.start()
+        first = self.scheduler.submit_draft({"friends": ["A"]})
+        entered.wait(1)
+        queued = [self.scheduler.submit_draft({"friends": ["B"]}) for _ in range(2)]
+
+        stopping = threading.Thread(target=self.scheduler.stop)
+        stopping.start()
+        while self.scheduler.running:
+            time.sleep(0.001)
+        release.set()
+        stopping.join(1)
+
+        self.assertEqual(first.result(1), ["A"])
+        for future in queued:
+            with self.assertRaisesRegex(RuntimeError, "stopped"):
+                future.result(1)
+
+    def test_request_racing_stop_is_answered(self):
+        """Test that a request enqueued while stopping is not left hanging."""
+        self.scheduler.start()
+        enqueuing = threading.Event()
+        release = threading.Event()
+        put = self.scheduler.requests.put
+
+        def slow_put(request):
+            # The request passed the running check but is not queued yet
+            if request is not None:
+                enqueuing.set()
+                release.wait(1)
+            put(request)
+
+        self.scheduler.requests.put = slow_put
+        futures = []
+        submitter = threading.Thread(
+            target=lambda: futures.append(
+                self.scheduler.submit_draft({"friends": ["A"]})
+            )
+        )
+        submitter.start()
+        enqueuing.wait(1)
+        stopping = threading.Thread(target=self.scheduler.stop)
+        stopping.start()
+        time.sleep(0.05)
+        release.set()
+        submitter.join(1)
+        stopping.join(1)
+
+        # Answered or failed by the worker, not left for request_timeout
+        self.assertTrue(futures[0].done())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,303 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config.AppConfig import AppConfig
+from src.model.BrawlerCatalog import BrawlerCatalog
+from src.model.BrawlerUpgrade import BrawlerUpgrade
+from src.model.GameVersionTimeline import GameVersionTimeline
+from src.service.BrawlStarsApiClient import BrawlStarsApiClient, TokenBucket
+from src.service.PostgreService import PostgreService
+from src.utils.cacheUtils import TTLCache
+
+with patch("builtins.print"):
+    appConfig = AppConfig()
+
+
+class TestBrawlStarsApiClient(unittest.TestCase):
+    """Test cases for the rate limited Brawl Stars API client."""
+
+    def test_api_client_retries(self):
+        """Test that the API client retries throttled and failed requests."""
+        client = BrawlStarsApiClient(rate_per_second=0, backoff=0)
+        responses = [MagicMock(status_code=code, headers={}) for code in (429, 503)]
+        responses.append(MagicMock(status_code=200, headers={}))
+        with patch.object(client.session, "get", side_effect=responses) as mock_get:
+            response = client.get("https://api.example.com/v1/players/%2312345")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(mock_get.call_count, 3)
+
+        stats = client.stats()["endpoints"]["/v1/players"]
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["throttled"], 1)
+
+    def test_api_client_retry_after(self):
+        """Test that Retry-After is honored up to max_retry_after only."""
+        client = BrawlStarsApiClient.from_config(appConfig, backoff=0)
+        self.assertEqual(client.max_retry_after, 30.0)
+
+        def delay(retry_after):
+            response = MagicMock(headers={"Retry-After": retry_after})
+            return client.retry_delay(0, response)
+
+        self.assertEqual(delay("2.5"), 2.5)
+        in_ten_seconds = time.strftime(
+            "%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 10)
+        )
+        self.assertAlmostEqual(delay(in_ten_seconds), 10, delta=1.5)
+        # Longer, negative, past and unreadable values fall back to backoff
+        for retry_after in ("3600", "-5", "Wed, 21 Oct 2015 07:28:00 GMT", "soon"):
+            self.assertEqual(delay(retry_after), 0)
+
+    def test_token_bucket(self):
+        """Test that the token bucket spreads requests past the burst."""
+        bucket = TokenBucket(rate=10, capacity=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0, 0])
+        self.assertAlmostEqual(waits[2], 0.1, places=2)
+        self.assertAlmostEqual(waits[3], 0.2, places=2)
+
+
+class TestPostgreService(unittest.TestCase):
+    """Test cases for the pooled and bulk database writes."""
+
+    def test_postgre_connection_pool(self):
+        """Test that pooled writes run in parallel up to the pool size."""
+        connections = []
+
+        def connect():
+            conn = MagicMock(closed=0)
+            cursor = conn.cursor.return_value.__enter__.return_value
+            cursor.execute.side_effect = lambda *args: time.sleep(0.02)
+            connections.append(conn)
+            return conn
+
+        pool = MagicMock()
+        pool.getconn.side_effect = connect
+        with patch(
+            "src.service.PostgreService.ThreadedConnectionPool", return_value=pool
+        ), patch("builtins.print"):
+            postgreService = PostgreService(appConfig, pool_size=2)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            for i in range(6):
+                executor.submit(
+                    postgreService.insert_or_update_player,
+                    f"#P{i}",
+                    10,
+                    None,
+                    "2025-01-01",
+                    "2025-01-01",
+                )
+
+        stats = postgreService.stats()
+        self.assertEqual(stats["checkouts"], 6)
+        self.assertEqual(stats["max_in_use"], 2)
+        self.assertGreater(stats["waits"], 0)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(pool.putconn.call_count, 6)
+        self.assertTrue(all(conn.commit.called for conn in connections))
+
+        # A failed statement is rolled back before the connection is returned
+        with self.assertRaises(ValueError):
+            with postgreService.transaction():
+                raise ValueError()
+        self.assertTrue(connections[-1].rollback.called)
+        self.assertEqual(postgreService.stats()["rollbacks"], 1)
+
+    def test_postgre_bulk_upsert(self):
+        """Test that bulk writes merge players and insert battles per season table."""
+        rows = [
+            ("#B", 12, None, "2025-01-01", "2025-01-01"),
+            ("#A", 18, None, "2025-01-01", "2025-01-01"),
+            ("#A", 16, None, "2025-01-02", "2025-01-02"),
+        ]
+        self.assertEqual(
+            PostgreService.merge_players(rows),
+            (
+                [
+                    ("#A", 18, None, "2025-01-01", "2025-01-01"),
+                    ("#B", 12, None, "2025-01-01", "2025-01-01"),
+                ],
+                [("#A", 16, 16, "2025-01-02", "2025-01-02")],
+            ),
+        )
+
+        def upsert(players, row, rank_column):
+            """The ON CONFLICT statements of dbo.players on a dict."""
+            tag, last_rank, max_rank, insert_date, last_update_date = row
+            if tag not in players:
+                players[tag] = (last_rank, max_rank)
+                return
+            ranks = (players[tag][1], row[rank_column])
+            stored = max((r for r in ranks if r is not None), default=None)
+            players[tag] = (last_rank, stored)
+
+        # New and stored players end up as if upserted one by one
+        for stored in ({}, {"#A": (20, 20)}, {"#A": (10, 10)}, {"#A": (10, None)}):
+            one_by_one, bulk = dict(stored), dict(stored)
+            for row in rows:
+                upsert(one_by_one, row, 1)
+            first_rows, repeated_rows = PostgreService.merge_players(rows)
+            for row in first_rows:
+                upsert(bulk, row, 1)
+            for row in repeated_rows:
+                upsert(bulk, row, 2)
+            self.assertEqual(bulk, one_by_one)
+
+        pool = MagicMock()
+        with patch(
+            "src.service.PostgreService.ThreadedConnectionPool", return_value=pool
+        ), patch("builtins.print"):
+            postgreService = PostgreService(appConfig, pool_size=1)
+        conn = pool.getconn.return_value
+        conn.closed = 0
+        conn.cursor.return_value.__enter__.return_value.rowcount = 1
+        battles = [
+            (("id1",), ("20250101T120000.000Z",)),
+            (("id2",), ("20250301T120000.000Z",)),
+            (("id3",), ("20250102T120000.000Z",)),
+        ]
+        tables = {"20250101": "battles_s1", "20250102": "battles_s1"}
+        with patch(
+            "src.service.PostgreService.execute_values"
+        ) as mock_execute, patch.object(
+            postgreService,
+            "get_battle_table",
+            side_effect=lambda timestamp: tables.get(timestamp[0][:8], "battles_s2"),
+        ):
+            self.assertEqual(postgreService.insert_players(rows), 2)
+            self.assertEqual(postgreService.insert_battles(battles), 2)
+
+            # The first row of each player, then the later rows of #A
+            self.assertEqual(mock_execute.call_count, 4)
+            self.assertEqual(len(mock_execute.call_args_list[0].args[2]), 2)
+            self.assertEqual(len(mock_execute.call_args_list[1].args[2]), 1)
+            self.assertIn("battles_s1", mock_execute.call_args_list[2].args[1])
+            self.assertEqual(mock_execute.call_args_list[2].args[2], battles[::2])
+            # Each season table is created once, before its first insert
+            cursor = conn.cursor.return_value.__enter__.return_value
+            created = [call.args[0] for call in cursor.execute.call_args_list]
+            self.assertEqual(len(created), 2)
+            self.assertIn("CREATE TABLE IF NOT EXISTS battles_s1 ", created[0])
+            self.assertEqual(conn.commit.call_count, 4)
+
+            # Players and battles of a crawl batch share one commit
+            self.assertEqual(postgreService.write_battles(battles, rows), (2, 2))
+            self.assertEqual(mock_execute.call_count, 8)
+            self.assertEqual(cursor.execute.call_count, 2)
+            self.assertEqual(conn.commit.call_count, 5)
+
+
+class TestGameVersionTimeline(unittest.TestCase):
+    """Test cases for the routing of battles to season tables."""
+
+    def test_game_version_timeline(self):
+        """Test that battles are routed to the season released before them."""
+        timeline = GameVersionTimeline(
+            [
+                {"version": "2", "date": "2025-02-01"},
+                {"version": "1", "date": "2025-01-01"},
+                {"version": "3", "date": "2025-03-01"},
+            ]
+        )
+        self.assertEqual(timeline.table_for_date("2024-12-31"), "battles_s1")
+        self.assertEqual(timeline.table_for_date("2025-02-01"), "battles_s2")
+        self.assertEqual(timeline.table_for_date("2025-02-28"), "battles_s2")
+        self.assertEqual(
+            timeline.table_for_battle_time("20250412T101500.000Z"), "battles_s3"
+        )
+        self.assertEqual(
+            appConfig.game_version_timeline.table_for_date("2099-01-01"),
+            f"battles_s{appConfig.game_version}",
+        )
+
+        # The loaded versions are looked up in the timeline built on load
+        postgreService = MagicMock(appConfig=appConfig)
+        with patch("src.service.PostgreService.GameVersionTimeline") as built:
+            self.assertEqual(
+                PostgreService.get_correct_battle_version(
+                    postgreService, "2099-01-01", appConfig.data_all_game_version
+                ),
+                f"battles_s{appConfig.game_version}",
+            )
+        built.assert_not_called()
+        self.assertEqual(
+            PostgreService.get_correct_battle_version(
+                postgreService, "2025-02-01", [{"version": "1", "date": "2025-01-01"}]
+            ),
+            "battles_s1",
+        )
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test cases for the account cache."""
+
+    def test_ttl_cache_single_flight(self):
+        """Test that concurrent loads of a key make one call and errors are not cached."""
+        cache = TTLCache(ttl=60)
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(1)
+            return {"brawlers": []}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(cache.get_or_load, "#ABC", loader) for _ in range(4)
+            ]
+            time.sleep(0.05)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"brawlers": []}] * 4)
+
+        error = {"error": 503}
+        not_error = lambda value: "error" not in value
+        cache.get_or_load("#DEF", lambda: error, cacheable=not_error)
+        self.assertIsNone(cache.get("#DEF"))
+
+
+class TestBrawlerModels(unittest.TestCase):
+    """Test cases for the brawler catalog and upgrade tables."""
+
+    def test_brawler_catalog(self):
+        """Test that the brawler catalog matches names in any spelling."""
+        catalog = BrawlerCatalog(
+            [{"id": 1, "name": "8Bit", "imageUrl": "https://example.com/8bit.png"}]
+        )
+        self.assertEqual(catalog.canonical_names([" 8-bit", "8BIT"]), ["8BIT"] * 2)
+        self.assertEqual(catalog.get("8-Bit")["name"], "8Bit")
+        self.assertEqual(catalog.image_url("8bit"), "https://example.com/8bit.png")
+        self.assertIsNone(catalog.image_url("SHELLY"))
+
+    def test_upgrade_costs(self):
+        """Test the precomputed upgrade cost tables against the per-level costs."""
+        power_points, coins = BrawlerUpgrade.upgrade_costs(
+            [1, 9, 11], [0, 1, 2], [1, 0, 2], [0, 1, 3]
+        )
+        self.assertEqual(
+            power_points.tolist(), [sum(BrawlerUpgrade.POWER_POINTS_NEEDED), 2330, 0]
+        )
+        self.assertEqual(
+            coins.tolist(),
+            [
+                sum(BrawlerUpgrade.COINS_NEEDED) + 5000 + 2000 + 2 * 1000,
+                1875 + 2800 + 5000 + 1000 + 1000,
+                5000,
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()